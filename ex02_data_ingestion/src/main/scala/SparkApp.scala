@@ -1,6 +1,7 @@
 import org.apache.spark.sql.{SparkSession, DataFrame}
 import org.apache.spark.sql.functions._
 import java.util.Properties
+import java.sql.{Date, DriverManager}
 import org.apache.spark.sql.SaveMode
 import java.time.YearMonth
 import scala.io.StdIn
@@ -52,6 +53,18 @@ object SparkApp extends App {
   dbProps.put("batchsize", "10000")
   dbProps.put("reWriteBatchedInserts", "true")
 
+  // Appelle une fonction SQL de ex03 prenant le 1er du mois en paramètre
+  def callMonthFunction(function: String, month: String): String = {
+    val conn = DriverManager.getConnection(postgresUrl, dbProps)
+    try {
+      val stmt = conn.prepareStatement(s"SELECT $function(?)")
+      stmt.setDate(1, Date.valueOf(s"$month-01"))
+      val rs = stmt.executeQuery()
+      rs.next()
+      rs.getString(1)
+    } finally conn.close()
+  }
+
   months.foreach { month =>
     println(s"═══ Mois: $month ═══")
     val t0 = System.currentTimeMillis()
@@ -101,13 +114,21 @@ object SparkApp extends App {
       .filter(abs(col("tip_amount")) < 1e8 || col("tip_amount").isNull)
       .filter(abs(col("tolls_amount")) < 1e8 || col("tolls_amount").isNull)
       .filter(abs(col("trip_distance")) < 1e8 || col("trip_distance").isNull)
+      // Clé de partition de fact_trips
+      .filter(col("tpep_pickup_datetime").isNotNull)
 
     val dwCount = dwDF.count()
+    val partition = callMonthFunction("ensure_month_partition", month)
+    println(s"  Partition $partition prête")
     println(s"  Insertion PostgreSQL en cours ($dwCount lignes après filtrage)...")
     dwDF.repartition(4).write.mode(SaveMode.Append).jdbc(postgresUrl, "fact_trips", dbProps)
+    println(s"  [Branche 2] fact_trips → Postgres (${rowCount} lignes)")
+
+    // Rafraîchissement des agrégats du dashboard (ex03 rollups.sql)
+    val rolledUp = callMonthFunction("refresh_rollups", month)
+    println(s"  [Rollups] agrégats rafraîchis ($rolledUp courses)")
 
     val elapsed = (System.currentTimeMillis() - t0) / 1000
-    println(s"  [Branche 2] fact_trips → Postgres (${rowCount} lignes)")
     println(s"$month terminé en ${elapsed}s\n")
   }
 
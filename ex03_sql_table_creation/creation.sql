@@ -1,4 +1,6 @@
 -- Nettoyage
+DROP FUNCTION IF EXISTS ensure_month_partition(DATE);
+DROP TABLE IF EXISTS fact_trips_load_log CASCADE;
 DROP TABLE IF EXISTS fact_trips CASCADE;
 DROP TABLE IF EXISTS dim_vendor CASCADE;
 DROP TABLE IF EXISTS dim_rate_code CASCADE;
@@ -30,9 +32,12 @@ CREATE TABLE dim_location (
     service_zone VARCHAR(50)
 );
 
--- Table de faits
+-- Table de faits, partitionnée par mois de pickup
+-- (une partition fact_trips_YYYY_MM par mois, créée par
+-- ensure_month_partition() avant chaque chargement ; les courses hors
+-- de tout mois chargé tombent dans fact_trips_default)
 CREATE TABLE fact_trips (
-    trip_id SERIAL PRIMARY KEY,
+    trip_id SERIAL,
     
     -- Clés étrangères
     vendor_id INT REFERENCES dim_vendor(vendor_id),
@@ -42,7 +47,7 @@ CREATE TABLE fact_trips (
     do_location_id INT REFERENCES dim_location(location_id),
     
     -- Données
-    tpep_pickup_datetime TIMESTAMP,
+    tpep_pickup_datetime TIMESTAMP NOT NULL,
     tpep_dropoff_datetime TIMESTAMP,
     passenger_count INT,
     trip_distance DECIMAL(10, 2),
@@ -60,13 +65,59 @@ CREATE TABLE fact_trips (
     -- Taxes 2025
     congestion_surcharge DECIMAL(10, 2),
     airport_fee DECIMAL(10, 2),
-    cbd_congestion_fee DECIMAL(10, 2)
-);
+    cbd_congestion_fee DECIMAL(10, 2),
+
+    -- La clé de partition doit faire partie de la clé primaire
+    PRIMARY KEY (trip_id, tpep_pickup_datetime)
+) PARTITION BY RANGE (tpep_pickup_datetime);
 
--- Index pour la performance
+CREATE TABLE fact_trips_default PARTITION OF fact_trips DEFAULT;
+
+-- Index pour la performance (créés sur chaque partition)
 CREATE INDEX index_pickup_datetime ON fact_trips(tpep_pickup_datetime);
 CREATE INDEX index_vendor_id ON fact_trips(vendor_id);
 CREATE INDEX index_rate_code_id ON fact_trips(rate_code_id);
 CREATE INDEX index_pu_location_id ON fact_trips(pu_location_id);
 CREATE INDEX index_do_location_id ON fact_trips(do_location_id);
-CREATE INDEX index_payment_type_id ON fact_trips(payment_type_id);
\ No newline at end of file
+CREATE INDEX index_payment_type_id ON fact_trips(payment_type_id);
+
+-- Journal des chargements mensuels de ex05 (taxi_ml.loader) : un mois
+-- présent ici n'est pas rechargé, sauf rechargement forcé
+CREATE TABLE fact_trips_load_log (
+    month DATE PRIMARY KEY,
+    source TEXT,
+    n_rows BIGINT NOT NULL,
+    n_rejected BIGINT NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- Crée (si besoin) la partition du mois contenant p_month, en y
+-- déplaçant les lignes du mois déjà tombées dans fact_trips_default.
+-- Retourne le nom de la partition.
+CREATE FUNCTION ensure_month_partition(p_month DATE) RETURNS TEXT AS $$
+DECLARE
+    m_start TIMESTAMP := date_trunc('month', p_month);
+    m_end   TIMESTAMP := date_trunc('month', p_month) + INTERVAL '1 month';
+    part    TEXT := 'fact_trips_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN part;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE fact_trips INCLUDING DEFAULTS)', part);
+    EXECUTE format(
+        'WITH moved AS (
+             DELETE FROM fact_trips_default
+             WHERE tpep_pickup_datetime >= %L AND tpep_pickup_datetime < %L
+             RETURNING *
+         )
+         INSERT INTO %I SELECT * FROM moved',
+        m_start, m_end, part
+    );
+    EXECUTE format(
+        'ALTER TABLE fact_trips ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        part, m_start, m_end
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,301 @@
+-- Tables d'agrégats (rollups) pour le dashboard
+--
+-- Chaque graphique de ex04_dashboard lit ces tables au lieu de faire
+-- un GROUP BY sur fact_trips. Elles sont rafraîchies mois par mois par
+-- refresh_rollups(mois), appelée par ex02 après chaque chargement.
+-- Les moyennes se recalculent comme SUM(sum_x) / SUM(n_x), où n_x
+-- compte les valeurs non nulles (même résultat que AVG(x)).
+-- fact_trips_sample (échantillon pondéré) et les vues approx_* servent
+-- le mode approximatif du dashboard.
+
+-- Nettoyage
+DROP FUNCTION IF EXISTS refresh_all_rollups();
+DROP FUNCTION IF EXISTS refresh_rollups(DATE);
+DROP FUNCTION IF EXISTS refresh_trip_sample(DATE, BIGINT);
+DROP TABLE IF EXISTS agg_trips_hourly CASCADE;
+DROP TABLE IF EXISTS agg_pickup_zone_daily CASCADE;
+DROP TABLE IF EXISTS agg_dropoff_zone_daily CASCADE;
+DROP TABLE IF EXISTS agg_distance_daily CASCADE;
+DROP TABLE IF EXISTS rollup_refresh_log CASCADE;
+DROP TABLE IF EXISTS fact_trips_sample CASCADE;
+
+-- Heure × paiement × vendor : KPIs, CA par jour, distribution horaire,
+-- heatmap jour × heure, paiements, vendors, comparaison mensuelle
+-- (~100k lignes par an au lieu de ~40M courses)
+CREATE TABLE agg_trips_hourly (
+    pickup_hour TIMESTAMP NOT NULL,
+    payment_type_id INT,
+    vendor_id INT,
+
+    trips BIGINT NOT NULL,
+    sum_total NUMERIC,
+    sum_distance NUMERIC,
+    sum_tip NUMERIC,
+    sum_passengers BIGINT,
+    n_total BIGINT NOT NULL,
+    n_distance BIGINT NOT NULL,
+    n_tip BIGINT NOT NULL,
+    n_passengers BIGINT NOT NULL
+);
+
+-- Jour × zone de pickup : top zones de pickup
+CREATE TABLE agg_pickup_zone_daily (
+    pickup_date DATE NOT NULL,
+    pu_location_id INT,
+    trips BIGINT NOT NULL,
+    sum_total NUMERIC
+);
+
+-- Jour × zone de dropoff : top zones de dropoff
+CREATE TABLE agg_dropoff_zone_daily (
+    pickup_date DATE NOT NULL,
+    do_location_id INT,
+    trips BIGINT NOT NULL
+);
+
+-- Jour × tranche de distance (courses plausibles uniquement :
+-- 0 < distance < 100 mi, 0 < montant < 500 $)
+--   1 : 0-1 mi, 2 : 1-3 mi, 3 : 3-5 mi, 4 : 5-10 mi, 5 : 10-20 mi, 6 : 20+ mi
+CREATE TABLE agg_distance_daily (
+    pickup_date DATE NOT NULL,
+    dist_bucket SMALLINT NOT NULL,
+    trips BIGINT NOT NULL,
+    sum_total NUMERIC
+);
+
+-- Mois disponibles et date du dernier rafraîchissement
+CREATE TABLE rollup_refresh_log (
+    month DATE PRIMARY KEY,
+    n_trips BIGINT NOT NULL,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX index_agg_hourly_pickup_hour ON agg_trips_hourly(pickup_hour);
+CREATE INDEX index_agg_pickup_zone_date ON agg_pickup_zone_daily(pickup_date);
+CREATE INDEX index_agg_dropoff_zone_date ON agg_dropoff_zone_daily(pickup_date);
+CREATE INDEX index_agg_distance_date ON agg_distance_daily(pickup_date);
+
+-- Échantillon de fact_trips pour le mode approximatif du dashboard :
+-- tirage de Bernoulli stratifié par mois (~100k courses par mois,
+-- probabilité p propre au mois). weight = 1 / p est le poids de
+-- Horvitz-Thompson : SUM(weight * x) estime SUM(x) sans biais, et
+-- SUM(weight * (weight - 1) * x^2) estime sa variance (terme additif,
+-- que l'on peut sommer sur n'importe quel regroupement).
+CREATE TABLE fact_trips_sample (
+    trip_id INT,
+    vendor_id INT,
+    payment_type_id INT,
+    pu_location_id INT,
+    do_location_id INT,
+    tpep_pickup_datetime TIMESTAMP NOT NULL,
+    tpep_dropoff_datetime TIMESTAMP,
+    passenger_count INT,
+    trip_distance DECIMAL(10, 2),
+    tip_amount DECIMAL(10, 2),
+    total_amount DECIMAL(10, 2),
+    weight DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX index_sample_pickup_datetime ON fact_trips_sample(tpep_pickup_datetime);
+
+-- Vues estimées, de même forme que les tables d'agrégats (+ colonnes
+-- var_* pour les intervalles de confiance)
+CREATE VIEW approx_trips_hourly AS
+SELECT
+    date_trunc('hour', tpep_pickup_datetime) AS pickup_hour,
+    payment_type_id,
+    vendor_id,
+    SUM(weight)                                             AS trips,
+    SUM(weight * total_amount)                              AS sum_total,
+    SUM(weight * trip_distance)                             AS sum_distance,
+    SUM(weight * tip_amount)                                AS sum_tip,
+    SUM(weight * passenger_count)                           AS sum_passengers,
+    COALESCE(SUM(weight) FILTER (WHERE total_amount IS NOT NULL), 0)    AS n_total,
+    COALESCE(SUM(weight) FILTER (WHERE trip_distance IS NOT NULL), 0)   AS n_distance,
+    COALESCE(SUM(weight) FILTER (WHERE tip_amount IS NOT NULL), 0)      AS n_tip,
+    COALESCE(SUM(weight) FILTER (WHERE passenger_count IS NOT NULL), 0) AS n_passengers,
+    SUM(weight * (weight - 1))                              AS var_trips,
+    SUM(weight * (weight - 1) * total_amount ^ 2)           AS var_total
+FROM fact_trips_sample
+GROUP BY 1, 2, 3;
+
+CREATE VIEW approx_pickup_zone_daily AS
+SELECT
+    date(tpep_pickup_datetime)                    AS pickup_date,
+    pu_location_id,
+    SUM(weight)                                   AS trips,
+    SUM(weight * total_amount)                    AS sum_total,
+    SUM(weight * (weight - 1))                    AS var_trips,
+    SUM(weight * (weight - 1) * total_amount ^ 2) AS var_total
+FROM fact_trips_sample
+GROUP BY 1, 2;
+
+CREATE VIEW approx_dropoff_zone_daily AS
+SELECT
+    date(tpep_pickup_datetime) AS pickup_date,
+    do_location_id,
+    SUM(weight)                AS trips,
+    SUM(weight * (weight - 1)) AS var_trips
+FROM fact_trips_sample
+GROUP BY 1, 2;
+
+CREATE VIEW approx_distance_daily AS
+SELECT
+    date(tpep_pickup_datetime) AS pickup_date,
+    CASE
+        WHEN trip_distance < 1  THEN 1
+        WHEN trip_distance < 3  THEN 2
+        WHEN trip_distance < 5  THEN 3
+        WHEN trip_distance < 10 THEN 4
+        WHEN trip_distance < 20 THEN 5
+        ELSE 6
+    END                        AS dist_bucket,
+    SUM(weight)                AS trips,
+    SUM(weight * total_amount) AS sum_total,
+    SUM(weight * (weight - 1)) AS var_trips
+FROM fact_trips_sample
+WHERE trip_distance > 0 AND trip_distance < 100
+  AND total_amount > 0  AND total_amount < 500
+GROUP BY 1, 2;
+
+-- Recalcule les agrégats d'un mois (courses dont le pickup tombe dans
+-- [mois, mois + 1 mois[). Idempotent : les lignes du mois sont
+-- supprimées puis réinsérées. Retourne le nombre de courses du mois.
+CREATE FUNCTION refresh_rollups(p_month DATE) RETURNS BIGINT AS $$
+DECLARE
+    m_start TIMESTAMP := date_trunc('month', p_month);
+    m_end   TIMESTAMP := date_trunc('month', p_month) + INTERVAL '1 month';
+    v_trips BIGINT;
+BEGIN
+    DELETE FROM agg_trips_hourly
+    WHERE pickup_hour >= m_start AND pickup_hour < m_end;
+    INSERT INTO agg_trips_hourly
+    SELECT
+        date_trunc('hour', tpep_pickup_datetime),
+        payment_type_id,
+        vendor_id,
+        COUNT(*),
+        SUM(total_amount),
+        SUM(trip_distance),
+        SUM(tip_amount),
+        SUM(passenger_count),
+        COUNT(total_amount),
+        COUNT(trip_distance),
+        COUNT(tip_amount),
+        COUNT(passenger_count)
+    FROM fact_trips
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end
+    GROUP BY 1, 2, 3;
+
+    DELETE FROM agg_pickup_zone_daily
+    WHERE pickup_date >= m_start AND pickup_date < m_end;
+    INSERT INTO agg_pickup_zone_daily
+    SELECT date(tpep_pickup_datetime), pu_location_id, COUNT(*), SUM(total_amount)
+    FROM fact_trips
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end
+    GROUP BY 1, 2;
+
+    DELETE FROM agg_dropoff_zone_daily
+    WHERE pickup_date >= m_start AND pickup_date < m_end;
+    INSERT INTO agg_dropoff_zone_daily
+    SELECT date(tpep_pickup_datetime), do_location_id, COUNT(*)
+    FROM fact_trips
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end
+    GROUP BY 1, 2;
+
+    DELETE FROM agg_distance_daily
+    WHERE pickup_date >= m_start AND pickup_date < m_end;
+    INSERT INTO agg_distance_daily
+    SELECT
+        date(tpep_pickup_datetime),
+        CASE
+            WHEN trip_distance < 1  THEN 1
+            WHEN trip_distance < 3  THEN 2
+            WHEN trip_distance < 5  THEN 3
+            WHEN trip_distance < 10 THEN 4
+            WHEN trip_distance < 20 THEN 5
+            ELSE 6
+        END,
+        COUNT(*),
+        SUM(total_amount)
+    FROM fact_trips
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end
+      AND trip_distance > 0 AND trip_distance < 100
+      AND total_amount > 0  AND total_amount < 500
+    GROUP BY 1, 2;
+
+    SELECT COALESCE(SUM(trips), 0) INTO v_trips
+    FROM agg_trips_hourly
+    WHERE pickup_hour >= m_start AND pickup_hour < m_end;
+
+    PERFORM refresh_trip_sample(p_month);
+
+    IF v_trips = 0 THEN
+        DELETE FROM rollup_refresh_log WHERE month = m_start::date;
+    ELSE
+        INSERT INTO rollup_refresh_log (month, n_trips, refreshed_at)
+        VALUES (m_start::date, v_trips, now())
+        ON CONFLICT (month) DO UPDATE
+        SET n_trips = EXCLUDED.n_trips, refreshed_at = EXCLUDED.refreshed_at;
+    END IF;
+
+    RETURN v_trips;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ré-échantillonne un mois : chaque course est gardée avec la
+-- probabilité p = p_rows / (courses du mois), plafonnée à 1.
+-- Appelée par refresh_rollups() (qui a déjà compté les courses).
+CREATE FUNCTION refresh_trip_sample(p_month DATE, p_rows BIGINT DEFAULT 100000)
+RETURNS BIGINT AS $$
+DECLARE
+    m_start TIMESTAMP := date_trunc('month', p_month);
+    m_end   TIMESTAMP := date_trunc('month', p_month) + INTERVAL '1 month';
+    v_trips BIGINT;
+    v_prob  DOUBLE PRECISION;
+    v_kept  BIGINT;
+BEGIN
+    DELETE FROM fact_trips_sample
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end;
+
+    SELECT COALESCE(SUM(trips), 0) INTO v_trips
+    FROM agg_trips_hourly
+    WHERE pickup_hour >= m_start AND pickup_hour < m_end;
+    IF v_trips = 0 THEN
+        RETURN 0;
+    END IF;
+    v_prob := LEAST(1.0, p_rows::double precision / v_trips);
+
+    INSERT INTO fact_trips_sample
+    SELECT
+        trip_id, vendor_id, payment_type_id, pu_location_id, do_location_id,
+        tpep_pickup_datetime, tpep_dropoff_datetime, passenger_count,
+        trip_distance, tip_amount, total_amount,
+        1.0 / v_prob
+    FROM fact_trips
+    WHERE tpep_pickup_datetime >= m_start AND tpep_pickup_datetime < m_end
+      AND random() < v_prob;
+    GET DIAGNOSTICS v_kept = ROW_COUNT;
+
+    RETURN v_kept;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstruit les agrégats de tous les mois présents dans fact_trips
+-- (base déjà chargée avant l'ajout des rollups).
+CREATE FUNCTION refresh_all_rollups() RETURNS BIGINT AS $$
+DECLARE
+    m DATE;
+    total BIGINT := 0;
+BEGIN
+    FOR m IN
+        SELECT DISTINCT date_trunc('month', tpep_pickup_datetime)::date
+        FROM fact_trips
+        WHERE tpep_pickup_datetime IS NOT NULL
+        ORDER BY 1
+    LOOP
+        total := total + refresh_rollups(m);
+    END LOOP;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
@@ -1,7 +1,10 @@
+import time
+import pandas as pd
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-from db import read_sql
+from db import cache_stats, read_sql, run_queries
+from filters import month_range_filter
 
 # Configuration
 st.set_page_config(
@@ -14,7 +17,10 @@ st.set_page_config(
 # Couleur thème taxi NYC
 TAXI_YELLOW = "#F7C948"
 TAXI_DARK = "#1B1B1B"
-PALETTE = ["#F7C948", "#F2A900", "#E8871E", "#D9534F", "#5BC0DE", "#5CB85C", "#428BCA", "#8E44AD"]
+PALETTE = [
+    "#F7C948", "#F2A900", "#E8871E", "#D9534F",
+    "#5BC0DE", "#5CB85C", "#428BCA", "#8E44AD",
+]
 
 # Css custom pour les metrics et titres
 st.markdown("""
@@ -30,7 +36,7 @@ st.title("🚕 NYC Yellow Taxi — Dashboard Analytique")
 
 # Sidebar : connexion + filtres
 try:
-    _ = read_sql("SELECT 1 AS ok;")
+    _ = read_sql("SELECT 1 AS ok;", cache=False, arrow=False)
     st.sidebar.success("PostgreSQL connecté")
 except Exception as e:
     st.sidebar.error("PostgreSQL indisponible")
@@ -39,13 +45,15 @@ except Exception as e:
 
 st.sidebar.header("🔍 Filtres")
 
-# Charger les mois disponibles dynamiquement
+# Charger les mois disponibles (mois dont les agrégats sont calculés)
 months_df = read_sql("""
-    SELECT DISTINCT to_char(tpep_pickup_datetime, 'YYYY-MM') AS m
-    FROM fact_trips
+    SELECT to_char(month, 'YYYY-MM') AS m
+    FROM rollup_refresh_log
     ORDER BY m;
 """)
-available_months = months_df["m"].tolist() if not months_df.empty else ["2025-01"]
+available_months = (
+    months_df["m"].tolist() if not months_df.empty else ["2025-01"]
+)
 
 selected_months = st.sidebar.multiselect(
     "Mois",
@@ -58,54 +66,235 @@ if not selected_months:
     st.warning("Sélectionnez au moins un mois.")
     st.stop()
 
-# Build SQL filter
-month_list = tuple(selected_months)
-month_filter = "to_char(tpep_pickup_datetime, 'YYYY-MM') IN %(months)s"
-params = {"months": month_list}
+# Build SQL filter : intervalles [début, fin[ (index + élagage des partitions)
+month_filter, params = month_range_filter(
+    "tpep_pickup_datetime", selected_months,
+)
 
-st.sidebar.markdown("---")
-st.sidebar.caption(f"{len(selected_months)} mois sélectionné(s)")
+# Les graphiques lisent les tables d'agrégats (ex03 rollups.sql)
+hour_filter = month_filter.replace("tpep_pickup_datetime", "pickup_hour")
+day_filter = month_filter.replace("tpep_pickup_datetime", "pickup_date")
+trips_filter = month_filter.replace(
+    "tpep_pickup_datetime", "f.tpep_pickup_datetime",
+)
 
-#  1. KPI principaux
+# Mode approximatif : mêmes requêtes sur l'échantillon pondéré de
+# fact_trips (vues approx_* de ex03 rollups.sql), activé par défaut sur
+# les longues périodes. Le mode exact reste disponible.
+approx = st.sidebar.toggle(
+    "Mode approximatif (échantillon)",
+    value=len(selected_months) > 12,
+    help=(
+        "Estimations sur ~100k courses par mois, "
+        "avec intervalles de confiance à 95 %"
+    ),
+)
 
-kpi = read_sql(f"""
-    SELECT
-        COUNT(*)             AS nb_trips,
-        SUM(total_amount)    AS sum_total,
-        AVG(total_amount)    AS avg_total,
-        AVG(trip_distance)   AS avg_distance,
-        AVG(tip_amount)      AS avg_tip,
-        SUM(tip_amount)      AS sum_tip,
-        AVG(passenger_count) AS avg_passengers
-    FROM fact_trips
-    WHERE {month_filter};
-""", params=params)
-
-k = kpi.iloc[0]
-c1, c2, c3, c4, c5 = st.columns(5)
-c1.metric("Courses", f"{int(k['nb_trips']):,}".replace(",", " "))
-c2.metric("CA Total", f"${float(k['sum_total'] or 0):,.0f}".replace(",", " "))
-c3.metric("Panier Moyen", f"${float(k['avg_total'] or 0):.2f}")
-c4.metric("Distance Moy.", f"{float(k['avg_distance'] or 0):.2f} mi")
-c5.metric("Tip Moyen", f"${float(k['avg_tip'] or 0):.2f}")
+if approx:
+    T_HOURLY, T_PU, T_DO, T_DIST, T_TRIPS = (
+        "approx_trips_hourly", "approx_pickup_zone_daily",
+        "approx_dropoff_zone_daily",
+        "approx_distance_daily", "fact_trips_sample",
+    )
+else:
+    T_HOURLY, T_PU, T_DO, T_DIST, T_TRIPS = (
+        "agg_trips_hourly", "agg_pickup_zone_daily",
+        "agg_dropoff_zone_daily",
+        "agg_distance_daily", "fact_trips",
+    )
 
-st.markdown("---")
 
-# 2. LIGNE 1 : CA par jour + Distribution horaire
-col_left, col_right = st.columns([3, 2])
+def ci(var_col, alias):
+    # Demi-largeur de l'IC à 95 % d'un total estimé (mode approximatif)
+    if not approx:
+        return ""
+    return f", 1.96 * sqrt(SUM({var_col})) AS {alias}"
 
-with col_left:
-    st.subheader("Chiffre d'affaires par jour")
-    daily = read_sql(f"""
+
+# Colonnes d'IC de chaque requête (vides hors mode approximatif)
+kpi_ci = ci("var_trips", "nb_trips_err") + ci("var_total", "sum_total_err")
+hourly_ci = ci("var_trips", "trips_err")
+vendor_ci = ci("a.var_total", "revenue_err")
+monthly_ci = ci("var_trips", "trips_err") + ci("var_total", "revenue_err")
+
+
+st.sidebar.markdown("---")
+st.sidebar.caption(f"{len(selected_months)} mois sélectionné(s)")
+
+# Requêtes de la page : indépendantes les unes des autres, elles sont
+# exécutées en parallèle (pool de connexions de db.py)
+queries = {
+    "kpi": f"""
+        SELECT
+            SUM(trips)::bigint                               AS nb_trips,
+            SUM(sum_total)                                   AS sum_total,
+            SUM(sum_total) / NULLIF(SUM(n_total), 0)         AS avg_total,
+            SUM(sum_distance) / NULLIF(SUM(n_distance), 0)   AS avg_distance,
+            SUM(sum_tip) / NULLIF(SUM(n_tip), 0)             AS avg_tip,
+            SUM(sum_tip)                                     AS sum_tip,
+            SUM(sum_passengers)::numeric
+                / NULLIF(SUM(n_passengers), 0)               AS avg_passengers
+            {kpi_ci}
+        FROM {T_HOURLY}
+        WHERE {hour_filter};
+    """,
+    "daily": f"""
+        SELECT
+            date(pickup_hour)  AS day,
+            SUM(sum_total)     AS revenue,
+            SUM(trips)::bigint AS trips
+        FROM {T_HOURLY}
+        WHERE {hour_filter}
+        GROUP BY 1 ORDER BY 1;
+    """,
+    "hourly": f"""
+        SELECT
+            EXTRACT(HOUR FROM pickup_hour)::int AS hour,
+            SUM(trips)::bigint                  AS trips
+            {hourly_ci}
+        FROM {T_HOURLY}
+        WHERE {hour_filter}
+        GROUP BY 1 ORDER BY 1;
+    """,
+    "top_pu": f"""
+        SELECT
+            l.zone               AS pickup_zone,
+            l.borough            AS borough,
+            SUM(a.trips)::bigint AS trips,
+            SUM(a.sum_total)     AS revenue{ci("a.var_trips", "trips_err")}
+        FROM {T_PU} a
+        JOIN dim_location l ON l.location_id = a.pu_location_id
+        WHERE {day_filter.replace('pickup_date', 'a.pickup_date')}
+        GROUP BY 1, 2
+        ORDER BY trips DESC
+        LIMIT 10;
+    """,
+    "pay": f"""
+        SELECT
+            p.payment_name       AS payment,
+            SUM(a.trips)::bigint AS trips,
+            SUM(a.sum_total)     AS revenue
+        FROM {T_HOURLY} a
+        JOIN dim_payment_type p ON p.payment_type_id = a.payment_type_id
+        WHERE {hour_filter.replace('pickup_hour', 'a.pickup_hour')}
+        GROUP BY 1
+        ORDER BY trips DESC;
+    """,
+    "vendor": f"""
+        SELECT
+            COALESCE(v.vendor_name, 'Unknown') AS vendor,
+            SUM(a.sum_total) AS revenue,
+            SUM(a.trips)::bigint AS trips,
+            SUM(a.sum_total) / NULLIF(SUM(a.n_total), 0) AS avg_fare
+            {vendor_ci}
+        FROM {T_HOURLY} a
+        LEFT JOIN dim_vendor v ON v.vendor_id = a.vendor_id
+        WHERE {hour_filter.replace('pickup_hour', 'a.pickup_hour')}
+        GROUP BY 1 ORDER BY revenue DESC;
+    """,
+    "dist_fare": f"""
+        SELECT
+            CASE dist_bucket
+                WHEN 1 THEN '0-1 mi'
+                WHEN 2 THEN '1-3 mi'
+                WHEN 3 THEN '3-5 mi'
+                WHEN 4 THEN '5-10 mi'
+                WHEN 5 THEN '10-20 mi'
+                ELSE '20+ mi'
+            END AS dist_bucket,
+            dist_bucket AS sort_key,
+            SUM(sum_total) / SUM(trips) AS avg_fare,
+            SUM(trips)::bigint          AS trips
+        FROM {T_DIST}
+        WHERE {day_filter}
+        GROUP BY 1, 2
+        ORDER BY sort_key;
+    """,
+    "heatmap": f"""
+        SELECT
+            EXTRACT(DOW FROM pickup_hour)::int  AS dow,
+            EXTRACT(HOUR FROM pickup_hour)::int AS hour,
+            SUM(trips)::bigint                  AS trips
+        FROM {T_HOURLY}
+        WHERE {hour_filter}
+        GROUP BY 1, 2;
+    """,
+    "top_do": f"""
+        SELECT
+            l.zone               AS dropoff_zone,
+            l.borough            AS borough,
+            SUM(a.trips)::bigint AS trips{ci("a.var_trips", "trips_err")}
+        FROM {T_DO} a
+        JOIN dim_location l ON l.location_id = a.do_location_id
+        WHERE {day_filter.replace('pickup_date', 'a.pickup_date')}
+        GROUP BY 1, 2
+        ORDER BY trips DESC
+        LIMIT 10;
+    """,
+    "monthly": f"""
         SELECT
-            date(tpep_pickup_datetime) AS day,
-            SUM(total_amount)          AS revenue,
-            COUNT(*)                   AS trips
-        FROM fact_trips
-        WHERE {month_filter}
+            to_char(pickup_hour, 'YYYY-MM')                AS month,
+            SUM(trips)::bigint                             AS trips,
+            SUM(sum_total)                                 AS revenue,
+            SUM(sum_total) / NULLIF(SUM(n_total), 0)       AS avg_fare,
+            SUM(sum_distance) / NULLIF(SUM(n_distance), 0) AS avg_dist,
+            SUM(sum_tip) / NULLIF(SUM(n_tip), 0)           AS avg_tip
+            {monthly_ci}
+        FROM {T_HOURLY}
+        WHERE {hour_filter}
         GROUP BY 1 ORDER BY 1;
-    """, params=params)
+    """,
+    "sample": f"""
+        SELECT
+            f.trip_id,
+            f.tpep_pickup_datetime  AS pickup,
+            f.tpep_dropoff_datetime AS dropoff,
+            f.passenger_count       AS pax,
+            f.trip_distance         AS distance,
+            f.total_amount          AS total,
+            f.tip_amount            AS tip,
+            pu.zone                 AS pickup_zone,
+            dz.zone                 AS dropoff_zone,
+            p.payment_name          AS payment,
+            v.vendor_name           AS vendor
+        FROM {T_TRIPS} f
+        LEFT JOIN dim_location pu ON pu.location_id = f.pu_location_id
+        LEFT JOIN dim_location dz ON dz.location_id = f.do_location_id
+        LEFT JOIN dim_payment_type p ON p.payment_type_id = f.payment_type_id
+        LEFT JOIN dim_vendor v ON v.vendor_id = f.vendor_id
+        WHERE {trips_filter}
+        ORDER BY f.tpep_pickup_datetime
+        LIMIT 50;
+    """,
+}
+if len(selected_months) <= 1:
+    del queries["monthly"]
+
+
+# Rendu de chaque section, appelé dès que son résultat est disponible
+
+def render_kpi(kpi):
+    # Valeurs NULL (aucune course) -> 0
+    k = kpi.iloc[0].fillna(0)
+    approx_mark = "≈ " if approx else ""
+    c1, c2, c3, c4, c5 = st.columns(5)
+    n_trips = f"{int(k['nb_trips']):,}".replace(",", " ")
+    revenue = f"${float(k['sum_total']):,.0f}".replace(",", " ")
+    c1.metric("Courses", approx_mark + n_trips)
+    c2.metric("CA Total", approx_mark + revenue)
+    c3.metric("Panier Moyen", f"${float(k['avg_total']):.2f}")
+    c4.metric("Distance Moy.", f"{float(k['avg_distance']):.2f} mi")
+    c5.metric("Tip Moyen", f"${float(k['avg_tip']):.2f}")
+    if approx:
+        trips_err = f"{float(k['nb_trips_err']):,.0f}".replace(",", " ")
+        total_err = f"{float(k['sum_total_err']):,.0f}".replace(",", " ")
+        st.caption(
+            "Estimations sur échantillon — IC 95 % : "
+            f"courses ± {trips_err}, CA ± ${total_err}"
+        )
 
+
+def render_daily(daily):
     fig = px.area(
         daily, x="day", y="revenue",
         labels={"day": "Date", "revenue": "CA ($)"},
@@ -124,21 +313,17 @@ with col_left:
     )
     st.plotly_chart(fig, use_container_width=True)
 
-with col_right:
-    st.subheader("Distribution horaire des courses")
-    hourly = read_sql(f"""
-        SELECT
-            EXTRACT(HOUR FROM tpep_pickup_datetime)::int AS hour,
-            COUNT(*)                                      AS trips
-        FROM fact_trips
-        WHERE {month_filter}
-        GROUP BY 1 ORDER BY 1;
-    """, params=params)
 
+def render_hourly(hourly):
     fig = go.Figure(go.Bar(
         x=hourly["hour"],
         y=hourly["trips"],
-        marker_color=[TAXI_YELLOW if 7 <= h <= 20 else "#555" for h in hourly["hour"]],
+        marker_color=[
+            TAXI_YELLOW if 7 <= h <= 20 else "#555" for h in hourly["hour"]
+        ],
+        error_y=(
+            dict(type="data", array=hourly["trips_err"]) if approx else None
+        ),
         hovertemplate="<b>%{x}h</b><br>%{y:,} courses<extra></extra>",
     ))
     fig.update_layout(
@@ -150,25 +335,7 @@ with col_right:
     st.plotly_chart(fig, use_container_width=True)
 
 
-#  3. Ligne 2 : Top zones + Répartition paiements
-col_left, col_right = st.columns([3, 2])
-
-with col_left:
-    st.subheader("Top 10 zones de pickup")
-    top_pu = read_sql(f"""
-        SELECT
-            l.zone      AS pickup_zone,
-            l.borough   AS borough,
-            COUNT(*)    AS trips,
-            SUM(f.total_amount) AS revenue
-        FROM fact_trips f
-        JOIN dim_location l ON l.location_id = f.pu_location_id
-        WHERE {month_filter.replace('tpep_pickup_datetime', 'f.tpep_pickup_datetime')}
-        GROUP BY 1, 2
-        ORDER BY trips DESC
-        LIMIT 10;
-    """, params=params)
-
+def render_top_pu(top_pu):
     fig = px.bar(
         top_pu, x="trips", y="pickup_zone",
         orientation="h",
@@ -176,6 +343,7 @@ with col_left:
         color_discrete_sequence=PALETTE,
         labels={"trips": "Courses", "pickup_zone": "", "borough": "Borough"},
         hover_data={"revenue": ":,.0f"},
+        error_x="trips_err" if approx else None,
     )
     fig.update_layout(
         yaxis=dict(categoryorder="total ascending"),
@@ -185,20 +353,8 @@ with col_left:
     )
     st.plotly_chart(fig, use_container_width=True)
 
-with col_right:
-    st.subheader("Répartition des paiements")
-    pay = read_sql(f"""
-        SELECT
-            p.payment_name AS payment,
-            COUNT(*)       AS trips,
-            SUM(f.total_amount) AS revenue
-        FROM fact_trips f
-        JOIN dim_payment_type p ON p.payment_type_id = f.payment_type_id
-        WHERE {month_filter.replace('tpep_pickup_datetime', 'f.tpep_pickup_datetime')}
-        GROUP BY 1
-        ORDER BY trips DESC;
-    """, params=params)
 
+def render_pay(pay):
     fig = px.pie(
         pay, values="trips", names="payment",
         color_discrete_sequence=PALETTE,
@@ -207,7 +363,10 @@ with col_right:
     fig.update_traces(
         textposition="inside",
         textinfo="percent+label",
-        hovertemplate="<b>%{label}</b><br>%{value:,} courses<br>%{percent}<extra></extra>",
+        hovertemplate=(
+            "<b>%{label}</b><br>%{value:,} courses<br>%{percent}"
+            "<extra></extra>"
+        ),
     )
     fig.update_layout(
         height=420,
@@ -217,28 +376,15 @@ with col_right:
     st.plotly_chart(fig, use_container_width=True)
 
 
-#  4. Ligne 3 : CA par vendor + Distance vs Montant
-col_left, col_right = st.columns(2)
-
-with col_left:
-    st.subheader("CA & Courses par Vendor")
-    vendor = read_sql(f"""
-        SELECT
-            COALESCE(v.vendor_name, 'Unknown') AS vendor,
-            SUM(f.total_amount) AS revenue,
-            COUNT(*) AS trips,
-            AVG(f.total_amount) AS avg_fare
-        FROM fact_trips f
-        LEFT JOIN dim_vendor v ON v.vendor_id = f.vendor_id
-        WHERE {month_filter.replace('tpep_pickup_datetime', 'f.tpep_pickup_datetime')}
-        GROUP BY 1 ORDER BY revenue DESC;
-    """, params=params)
-
+def render_vendor(vendor):
     fig = go.Figure()
     fig.add_trace(go.Bar(
         name="CA ($)",
         x=vendor["vendor"], y=vendor["revenue"],
         marker_color=TAXI_YELLOW,
+        error_y=(
+            dict(type="data", array=vendor["revenue_err"]) if approx else None
+        ),
         yaxis="y",
         hovertemplate="<b>%{x}</b><br>CA: $%{y:,.0f}<extra></extra>",
     ))
@@ -261,36 +407,8 @@ with col_left:
     )
     st.plotly_chart(fig, use_container_width=True)
 
-with col_right:
-    st.subheader("Tarif moyen par tranche de distance")
-    dist_fare = read_sql(f"""
-        SELECT
-            CASE
-                WHEN trip_distance < 1  THEN '0-1 mi'
-                WHEN trip_distance < 3  THEN '1-3 mi'
-                WHEN trip_distance < 5  THEN '3-5 mi'
-                WHEN trip_distance < 10 THEN '5-10 mi'
-                WHEN trip_distance < 20 THEN '10-20 mi'
-                ELSE '20+ mi'
-            END AS dist_bucket,
-            CASE
-                WHEN trip_distance < 1  THEN 1
-                WHEN trip_distance < 3  THEN 2
-                WHEN trip_distance < 5  THEN 3
-                WHEN trip_distance < 10 THEN 4
-                WHEN trip_distance < 20 THEN 5
-                ELSE 6
-            END AS sort_key,
-            AVG(total_amount) AS avg_fare,
-            COUNT(*)          AS trips
-        FROM fact_trips
-        WHERE {month_filter}
-          AND trip_distance > 0 AND trip_distance < 100
-          AND total_amount > 0  AND total_amount < 500
-        GROUP BY 1, 2
-        ORDER BY sort_key;
-    """, params=params)
 
+def render_dist_fare(dist_fare):
     fig = px.bar(
         dist_fare, x="dist_bucket", y="avg_fare",
         color="avg_fare",
@@ -299,7 +417,10 @@ with col_right:
         text_auto=".2f",
     )
     fig.update_traces(
-        hovertemplate="<b>%{x}</b><br>Moy: $%{y:.2f}<br>%{customdata[0]:,} courses<extra></extra>",
+        hovertemplate=(
+            "<b>%{x}</b><br>Moy: $%{y:.2f}<br>"
+            "%{customdata[0]:,} courses<extra></extra>"
+        ),
         customdata=dist_fare[["trips"]].values,
     )
     fig.update_layout(
@@ -310,23 +431,11 @@ with col_right:
     st.plotly_chart(fig, use_container_width=True)
 
 
-#  5. Ligne 4 : Heatmap jour x heure + Top dropoff
-col_left, col_right = st.columns([3, 2])
-
-with col_left:
-    st.subheader("Heatmap des courses (jour de la semaine × heure)")
-    heatmap = read_sql(f"""
-        SELECT
-            EXTRACT(DOW FROM tpep_pickup_datetime)::int  AS dow,
-            EXTRACT(HOUR FROM tpep_pickup_datetime)::int AS hour,
-            COUNT(*)                                      AS trips
-        FROM fact_trips
-        WHERE {month_filter}
-        GROUP BY 1, 2;
-    """, params=params)
-
+def render_heatmap(heatmap):
     day_names = ["Dim", "Lun", "Mar", "Mer", "Jeu", "Ven", "Sam"]
-    pivot = heatmap.pivot_table(index="dow", columns="hour", values="trips", fill_value=0)
+    pivot = heatmap.pivot_table(
+        index="dow", columns="hour", values="trips", fill_value=0,
+    )
     pivot = pivot.reindex(range(7), fill_value=0)
     pivot.index = [day_names[i] for i in pivot.index]
     # Reorder Lun->Dim
@@ -345,27 +454,15 @@ with col_left:
     )
     st.plotly_chart(fig, use_container_width=True)
 
-with col_right:
-    st.subheader("Top 10 zones de dropoff")
-    top_do = read_sql(f"""
-        SELECT
-            l.zone    AS dropoff_zone,
-            l.borough AS borough,
-            COUNT(*)  AS trips
-        FROM fact_trips f
-        JOIN dim_location l ON l.location_id = f.do_location_id
-        WHERE {month_filter.replace('tpep_pickup_datetime', 'f.tpep_pickup_datetime')}
-        GROUP BY 1, 2
-        ORDER BY trips DESC
-        LIMIT 10;
-    """, params=params)
 
+def render_top_do(top_do):
     fig = px.bar(
         top_do, x="trips", y="dropoff_zone",
         orientation="h",
         color="borough",
         color_discrete_sequence=PALETTE,
         labels={"trips": "Courses", "dropoff_zone": ""},
+        error_x="trips_err" if approx else None,
     )
     fig.update_layout(
         yaxis=dict(categoryorder="total ascending"),
@@ -376,22 +473,7 @@ with col_right:
     st.plotly_chart(fig, use_container_width=True)
 
 
-#  6. Ligne 5 : Comparaison mensuelle
-if len(selected_months) > 1:
-    st.subheader("Comparaison mensuelle")
-    monthly = read_sql(f"""
-        SELECT
-            to_char(tpep_pickup_datetime, 'YYYY-MM') AS month,
-            COUNT(*)             AS trips,
-            SUM(total_amount)    AS revenue,
-            AVG(total_amount)    AS avg_fare,
-            AVG(trip_distance)   AS avg_dist,
-            AVG(tip_amount)      AS avg_tip
-        FROM fact_trips
-        WHERE {month_filter}
-        GROUP BY 1 ORDER BY 1;
-    """, params=params)
-
+def render_monthly(monthly):
     mc1, mc2, mc3 = st.columns(3)
     with mc1:
         fig = px.bar(
@@ -399,8 +481,11 @@ if len(selected_months) > 1:
             color_discrete_sequence=[TAXI_YELLOW],
             labels={"month": "Mois", "trips": "Courses"},
             text_auto=",",
+            error_y="trips_err" if approx else None,
+        )
+        fig.update_layout(
+            height=300, margin=dict(l=20, r=20, t=30, b=20), title="Courses",
         )
-        fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20), title="Courses")
         st.plotly_chart(fig, use_container_width=True)
 
     with mc2:
@@ -409,14 +494,24 @@ if len(selected_months) > 1:
             color_discrete_sequence=["#F2A900"],
             labels={"month": "Mois", "revenue": "CA ($)"},
             text_auto=",.0f",
+            error_y="revenue_err" if approx else None,
+        )
+        fig.update_layout(
+            height=300, margin=dict(l=20, r=20, t=30, b=20),
+            title="Chiffre d'affaires",
         )
-        fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20), title="Chiffre d'affaires")
         st.plotly_chart(fig, use_container_width=True)
 
     with mc3:
         fig = go.Figure()
-        fig.add_trace(go.Bar(name="Tarif moy.", x=monthly["month"], y=monthly["avg_fare"], marker_color="#5BC0DE"))
-        fig.add_trace(go.Bar(name="Tip moy.", x=monthly["month"], y=monthly["avg_tip"], marker_color="#5CB85C"))
+        fig.add_trace(go.Bar(
+            name="Tarif moy.", x=monthly["month"], y=monthly["avg_fare"],
+            marker_color="#5BC0DE",
+        ))
+        fig.add_trace(go.Bar(
+            name="Tip moy.", x=monthly["month"], y=monthly["avg_tip"],
+            marker_color="#5CB85C",
+        ))
         fig.update_layout(
             barmode="group", height=300,
             margin=dict(l=20, r=20, t=30, b=20),
@@ -426,32 +521,130 @@ if len(selected_months) > 1:
         st.plotly_chart(fig, use_container_width=True)
 
 
+def render_sample(sample):
+    st.dataframe(sample, use_container_width=True, height=400)
+
+
+RENDERERS = {
+    "kpi": render_kpi,
+    "daily": render_daily,
+    "hourly": render_hourly,
+    "top_pu": render_top_pu,
+    "pay": render_pay,
+    "vendor": render_vendor,
+    "dist_fare": render_dist_fare,
+    "heatmap": render_heatmap,
+    "top_do": render_top_do,
+    "monthly": render_monthly,
+    "sample": render_sample,
+}
+
+
+# Mise en page : un emplacement vide par section, rempli plus bas
+slots = {}
+
+#  1. KPI principaux
+
+slots["kpi"] = st.empty()
+
+st.markdown("---")
+
+# 2. LIGNE 1 : CA par jour + Distribution horaire
+col_left, col_right = st.columns([3, 2])
+
+with col_left:
+    st.subheader("Chiffre d'affaires par jour")
+    slots["daily"] = st.empty()
+
+with col_right:
+    st.subheader("Distribution horaire des courses")
+    slots["hourly"] = st.empty()
+
+
+#  3. Ligne 2 : Top zones + Répartition paiements
+col_left, col_right = st.columns([3, 2])
+
+with col_left:
+    st.subheader("Top 10 zones de pickup")
+    slots["top_pu"] = st.empty()
+
+with col_right:
+    st.subheader("Répartition des paiements")
+    slots["pay"] = st.empty()
+
+
+#  4. Ligne 3 : CA par vendor + Distance vs Montant
+col_left, col_right = st.columns(2)
+
+with col_left:
+    st.subheader("CA & Courses par Vendor")
+    slots["vendor"] = st.empty()
+
+with col_right:
+    st.subheader("Tarif moyen par tranche de distance")
+    slots["dist_fare"] = st.empty()
+
+
+#  5. Ligne 4 : Heatmap jour x heure + Top dropoff
+col_left, col_right = st.columns([3, 2])
+
+with col_left:
+    st.subheader("Heatmap des courses (jour de la semaine × heure)")
+    slots["heatmap"] = st.empty()
+
+with col_right:
+    st.subheader("Top 10 zones de dropoff")
+    slots["top_do"] = st.empty()
+
+
+#  6. Ligne 5 : Comparaison mensuelle
+if len(selected_months) > 1:
+    st.subheader("Comparaison mensuelle")
+    slots["monthly"] = st.empty()
+
+
 #  7. Table échantillon
 with st.expander("Voir un échantillon de trajets (50 lignes)"):
-    sample = read_sql(f"""
-        SELECT
-            f.trip_id,
-            f.tpep_pickup_datetime  AS pickup,
-            f.tpep_dropoff_datetime AS dropoff,
-            f.passenger_count       AS pax,
-            f.trip_distance         AS distance,
-            f.total_amount          AS total,
-            f.tip_amount            AS tip,
-            pu.zone                 AS pickup_zone,
-            dz.zone                 AS dropoff_zone,
-            p.payment_name          AS payment,
-            v.vendor_name           AS vendor
-        FROM fact_trips f
-        LEFT JOIN dim_location pu ON pu.location_id = f.pu_location_id
-        LEFT JOIN dim_location dz ON dz.location_id = f.do_location_id
-        LEFT JOIN dim_payment_type p ON p.payment_type_id = f.payment_type_id
-        LEFT JOIN dim_vendor v ON v.vendor_id = f.vendor_id
-        WHERE {month_filter.replace('tpep_pickup_datetime', 'f.tpep_pickup_datetime')}
-        ORDER BY f.tpep_pickup_datetime
-        LIMIT 50;
-    """, params=params)
-    st.dataframe(sample, use_container_width=True, height=400)
+    slots["sample"] = st.empty()
+
+# Exécution parallèle : chaque section s'affiche dès que sa requête termine
+for slot in slots.values():
+    slot.caption("⏳ Chargement...")
+
+t_page = time.perf_counter()
+timings = {}
+for name, result, seconds in run_queries(queries, params):
+    timings[name] = seconds
+    with slots[name].container():
+        if isinstance(result, Exception):
+            st.error(f"Requête « {name} » en échec : {result}")
+        else:
+            RENDERERS[name](result)
+page_seconds = time.perf_counter() - t_page
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("⏱️ Temps des requêtes")
+st.sidebar.dataframe(
+    pd.DataFrame(
+        {
+            "requête": list(timings),
+            "ms": [round(s * 1000, 1) for s in timings.values()],
+        }
+    ).sort_values("ms", ascending=False),
+    hide_index=True,
+    use_container_width=True,
+)
+st.sidebar.caption(
+    f"Page (requêtes + rendu) : {page_seconds:.2f} s — "
+    f"somme des requêtes : {sum(timings.values()):.2f} s"
+)
 
 # 8. Footer
+stats = cache_stats()
+st.sidebar.caption(
+    f"Cache requêtes : {stats['hits']} hits / {stats['misses']} misses "
+    f"({stats['hit_rate']:.0%})"
+)
+
 st.markdown("---")
 st.caption("🚕 NYC Yellow Taxi Analytics — Projet Big Data CY Tech 2025")
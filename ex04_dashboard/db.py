@@ -1,11 +1,26 @@
+import io
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
 import pandas as pd
 import psycopg2
+import pyarrow.csv as pv
+from psycopg2.pool import ThreadedConnectionPool
 
+# Taille du pool et du cache (surchargeables par variables d'environnement)
+POOL_MAX = int(os.getenv("PGPOOL_MAX", "8"))
+CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "600"))
+# Intervalle minimum entre deux lectures de rollup_refresh_log
+VERSION_CHECK_SECONDS = 10.0
 
-def get_conn():
-    """Create and return a PostgreSQL connection using env vars."""
-    return psycopg2.connect(
+
+def _conn_kwargs():
+    return dict(
         host=os.getenv("PGHOST", "localhost"),
         port=int(os.getenv("PGPORT", "5432")),
         dbname=os.getenv("PGDATABASE", "bigdata_db"),
@@ -14,7 +29,229 @@ def get_conn():
     )
 
 
-def read_sql(query: str, params=None) -> pd.DataFrame:
-    """Run a SQL query and return a pandas DataFrame."""
-    with get_conn() as conn:
+def get_conn():
+    """Create and return a PostgreSQL connection using env vars."""
+    return psycopg2.connect(**_conn_kwargs())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# Les threads en trop attendent une connexion au lieu d'un PoolError
+_pool_slots = threading.BoundedSemaphore(POOL_MAX)
+
+
+def _get_pool():
+    """Return the process-wide pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = ThreadedConnectionPool(1, POOL_MAX, **_conn_kwargs())
+        return _pool
+
+
+@contextmanager
+def pooled_conn():
+    """Borrow a connection from the pool and give it back afterwards.
+
+    The connection is rolled back after use (queries are read-only),
+    and discarded if it was closed by the server.
+    """
+    with _pool_slots:
+        pool = _get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            pool.putconn(conn, close=broken)
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with a time-to-live."""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for *key*, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Store *value*, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_cache = QueryCache()
+_version = {"value": None, "checked_at": float("-inf")}
+_version_lock = threading.Lock()
+
+
+def _freeze(params):
+    """Hashable form of query params (dict / list / tuple)."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(v) for v in params)
+    return params
+
+
+def _check_data_version():
+    """Clear the cache when a month has been (re)loaded.
+
+    ``rollup_refresh_log`` gets a new row or timestamp each time ex02
+    loads a month; it is read at most every VERSION_CHECK_SECONDS.
+    """
+    with _version_lock:
+        now = time.monotonic()
+        if now - _version["checked_at"] < VERSION_CHECK_SECONDS:
+            return
+        _version["checked_at"] = now
+        try:
+            with pooled_conn() as conn, conn.cursor() as cur:
+                cur.execute(
+                    "SELECT max(refreshed_at), count(*) "
+                    "FROM rollup_refresh_log;"
+                )
+                version = cur.fetchone()
+        except psycopg2.Error:
+            version = None
+        if version != _version["value"]:
+            _version["value"] = version
+            _cache.clear()
+
+
+# NULL = champ vide non quoté ; une chaîne vide reste une chaîne vide
+_CSV_CONVERT = pv.ConvertOptions(
+    null_values=[""],
+    strings_can_be_null=True,
+    quoted_strings_can_be_null=False,
+)
+
+
+def read_sql_arrow(conn, query: str, params=None) -> pd.DataFrame:
+    """Fetch a query result through ``COPY ... TO STDOUT`` and Arrow.
+
+    The result is streamed as CSV by the server and parsed by Arrow's
+    C++ reader straight into typed columns (int64, float64,
+    timestamps), instead of building one Python object per cell
+    (``Decimal`` for every DECIMAL value) as ``pd.read_sql_query``
+    does.
+    """
+    with conn.cursor() as cur:
+        sql = cur.mogrify(query, params).decode().strip().rstrip(";")
+        buf = io.BytesIO()
+        cur.copy_expert(
+            f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", buf
+        )
+    buf.seek(0)
+    table = pv.read_csv(buf, convert_options=_CSV_CONVERT)
+    return table.to_pandas(date_as_object=False)
+
+
+def _fetch(query, params, arrow):
+    with pooled_conn() as conn:
+        if arrow:
+            return read_sql_arrow(conn, query, params)
         return pd.read_sql_query(query, conn, params=params)
+
+
+def read_sql(query: str, params=None, cache=True,
+             arrow=True) -> pd.DataFrame:
+    """Run a SQL query and return a pandas DataFrame.
+
+    Uses a pooled connection. With ``arrow=True`` (default) the
+    result is transferred with COPY and parsed by Arrow (see
+    :func:`read_sql_arrow`); ``arrow=False`` goes through
+    ``pd.read_sql_query``. With ``cache=True`` results are kept in a
+    TTL/LRU cache keyed on (query, params), cleared whenever a new
+    month is loaded.
+    """
+    if not cache:
+        return _fetch(query, params, arrow)
+
+    _check_data_version()
+    key = (query, _freeze(params), arrow)
+    df = _cache.get(key)
+    if df is None:
+        df = _fetch(query, params, arrow)
+        _cache.put(key, df)
+    # Copie : l'appelant peut modifier le DataFrame sans toucher au cache
+    return df.copy()
+
+
+def cache_stats():
+    """Return the hit/miss counters of the query cache."""
+    return _cache.stats()
+
+
+def clear_cache():
+    """Empty the query cache (e.g. after a manual reload)."""
+    _cache.clear()
+
+
+def _timed_read_sql(query, params):
+    """Run *query*; return (DataFrame or exception, seconds)."""
+    t0 = time.perf_counter()
+    try:
+        result = read_sql(query, params=params)
+    except Exception as exc:  # rendered by the caller, per section
+        result = exc
+    return result, time.perf_counter() - t0
+
+
+def run_queries(queries: dict, params=None, max_workers=POOL_MAX):
+    """Run independent queries concurrently on the pool.
+
+    Yields ``(name, result, seconds)`` in completion order, where
+    *result* is the DataFrame or the exception raised by the query,
+    so that each section can be rendered as soon as it is ready.
+    """
+    workers = max(1, min(max_workers, len(queries)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_timed_read_sql, query, params): name
+            for name, query in queries.items()
+        }
+        for future in as_completed(futures):
+            result, seconds = future.result()
+            yield futures[future], result, seconds
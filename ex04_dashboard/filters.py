@@ -0,0 +1,61 @@
+"""SQL filters of the dashboard.
+
+Month filters are written as half-open ranges
+``col >= start AND col < end``: unlike
+``to_char(col, 'YYYY-MM') IN (...)``, they can use the pickup
+datetime index and let PostgreSQL prune the monthly partitions of
+``fact_trips`` that are not selected.
+"""
+
+from datetime import datetime
+
+
+def _month_start(month: str) -> datetime:
+    """'YYYY-MM' -> datetime of the first day of the month."""
+    return datetime.strptime(month, "%Y-%m")
+
+
+def _next_month(start: datetime) -> datetime:
+    """First day of the month following *start*."""
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def month_ranges(months):
+    """Merge 'YYYY-MM' months into sorted half-open [start, end) ranges.
+
+    Consecutive months are merged, so selecting a whole year yields a
+    single range.
+    """
+    ranges = []
+    for start in sorted({_month_start(m) for m in months}):
+        end = _next_month(start)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def month_range_filter(column: str, months):
+    """Build a sargable SQL filter selecting *months* on *column*.
+
+    Returns the SQL condition and its parameters, e.g. for
+    ``["2024-01", "2024-02"]``::
+
+        (col >= %(range0_start)s AND col < %(range0_end)s)
+
+    The parameter names do not depend on *column*, so the condition
+    can be reused on another column with ``str.replace``.
+    """
+    clauses, params = [], {}
+    for i, (start, end) in enumerate(month_ranges(months)):
+        clauses.append(
+            f"({column} >= %(range{i}_start)s AND {column} < %(range{i}_end)s)"
+        )
+        params[f"range{i}_start"] = start
+        params[f"range{i}_end"] = end
+    if not clauses:
+        return "FALSE", params
+    return "(" + " OR ".join(clauses) + ")", params
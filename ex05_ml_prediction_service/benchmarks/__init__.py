@@ -0,0 +1 @@
+"""Offline performance benchmarks of the taxi ML pipeline."""
@@ -0,0 +1,90 @@
+"""Micro-benchmark: NumPy ``add_time_features`` vs. the pandas version.
+
+Usage
+-----
+.. code-block:: bash
+
+    cd ex05_ml_prediction_service
+    PYTHONPATH=src python -m benchmarks.bench_time_features \\
+        --rows 10000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_trips
+from taxi_ml.features import add_time_features
+
+
+def legacy_add_time_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation (full copy + ``.dt`` accessors)."""
+    out = df.copy()
+    out["tpep_pickup_datetime"] = pd.to_datetime(
+        out["tpep_pickup_datetime"]
+    )
+    out["tpep_dropoff_datetime"] = pd.to_datetime(
+        out["tpep_dropoff_datetime"]
+    )
+
+    duration = (
+        out["tpep_dropoff_datetime"] - out["tpep_pickup_datetime"]
+    ).dt.total_seconds()
+    out["trip_duration_min"] = (duration / 60.0).clip(lower=0)
+
+    out["pickup_hour"] = out["tpep_pickup_datetime"].dt.hour
+    out["pickup_dayofweek"] = out["tpep_pickup_datetime"].dt.dayofweek
+    out["pickup_day"] = out["tpep_pickup_datetime"].dt.day
+    return out
+
+
+def measure(func, df, repeat):
+    """Return best wall time (s) and peak traced memory (MB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(df)
+        best = min(best, time.perf_counter() - t0)
+        del out
+
+    tracemalloc.start()
+    out = func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del out
+    return best, peak / 1e6
+
+
+def main():
+    """Entry point: time both implementations and print a table."""
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    df = synthetic_trips(args.rows)
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{args.rows:,} rows, input frame {frame_mb:.0f} MB")
+
+    results = {
+        "legacy (pandas .dt)": measure(
+            legacy_add_time_features, df, args.repeat
+        ),
+        "numpy": measure(add_time_features, df, args.repeat),
+        "numpy (inplace)": measure(
+            lambda d: add_time_features(d, inplace=True),
+            df.copy(), args.repeat,
+        ),
+    }
+    base = results["legacy (pandas .dt)"][0]
+    for name, (seconds, peak_mb) in results.items():
+        print(
+            f"{name:<22} {seconds:7.3f} s  x{base / seconds:5.2f}  "
+            f"peak +{peak_mb:7.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
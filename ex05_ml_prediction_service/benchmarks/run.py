@@ -0,0 +1,250 @@
+"""End-to-end benchmark suite of the fare-prediction pipeline.
+
+Every stage of ``train.py`` / ``predict.py`` is timed on synthetic
+trips (:mod:`benchmarks.synthetic`), fully offline. Results are
+written as JSON with the versions they were measured with, so two
+runs (e.g. before/after a change) can be compared with
+``--compare``.
+
+Usage
+-----
+.. code-block:: bash
+
+    cd ex05_ml_prediction_service
+    PYTHONPATH=src python -m benchmarks.run --rows 3000000
+    PYTHONPATH=src python -m benchmarks.run --rows 3000000 \\
+        --compare benchmarks/results/<baseline>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import sklearn
+
+from benchmarks.synthetic import write_synthetic_parquet
+from taxi_ml.artifact import export_compact, load_model
+from taxi_ml.dtypes import downcast
+from taxi_ml.features import add_time_features, split_xy
+from taxi_ml.io import read_parquet_any
+from taxi_ml.model import build_model
+from taxi_ml.training import CAT_COLS
+from taxi_ml.validate import (
+    ABERRANT_RULES,
+    TRAIN_REQUIRED_COLS,
+    check_rules,
+    validate_infer_df,
+    validate_train_df,
+)
+
+#: Default directory of the JSON results.
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+#: Benchmarks faster than this (seconds) are not flagged by
+#: :func:`compare`; use more ``--rows`` to compare them.
+MIN_COMPARE_S = 0.05
+
+
+def measure(func, repeat):
+    """Time *func* *repeat* times.
+
+    Returns
+    -------
+    dict
+        ``best_s``, ``median_s`` and every run in ``runs_s``.
+    """
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - t0)
+    return {
+        "best_s": min(runs),
+        "median_s": statistics.median(runs),
+        "runs_s": runs,
+    }
+
+
+def filter_aberrant(df):
+    """Drop aberrant rows, as ``train.py`` does before fitting."""
+    report = check_rules(df, ABERRANT_RULES)
+    return df.loc[report.mask].reset_index(drop=True)
+
+
+def run_suite(rows, fit_rows, repeat, data_dir, log=print):
+    """Generate trips and time every pipeline stage.
+
+    Parameters
+    ----------
+    rows : int
+        Synthetic trips read, validated, featurized and predicted.
+    fit_rows : int
+        Trips the model is fitted on (fit is the slowest stage).
+    repeat : int
+        Runs per benchmark; ``fit`` always runs once.
+    data_dir : str
+        Directory of the generated parquet file.
+    log : callable
+        Progress printer.
+
+    Returns
+    -------
+    dict
+        Benchmark name → timings (see :func:`measure`) and ``rows``.
+    """
+    path = os.path.join(data_dir, f"synthetic_{rows}.parquet")
+    if not os.path.exists(path):
+        log(f"Generating {rows:,} trips -> {path}")
+        write_synthetic_parquet(path, rows)
+
+    results = {}
+
+    def bench(name, n_rows, func, *args, n_repeat=repeat, **kwargs):
+        results[name] = {
+            "rows": n_rows,
+            **measure(lambda: func(*args, **kwargs), n_repeat),
+        }
+        best = results[name]["best_s"]
+        log(f"{name:<20} {best:8.3f} s  {n_rows / best:>14,.0f} rows/s")
+
+    bench("read_parquet_any", rows, read_parquet_any, path,
+          columns=TRAIN_REQUIRED_COLS)
+    df = read_parquet_any(path, columns=TRAIN_REQUIRED_COLS)
+    bench("downcast", rows, lambda d: downcast(d.copy()), df)
+    df, _ = downcast(df)
+    bench("add_time_features", rows, add_time_features, df)
+    df = add_time_features(df)
+    bench("validate_train_df", rows, validate_train_df, df,
+          filter_rules=ABERRANT_RULES)
+    bench("validate_infer_df", rows, validate_infer_df, df)
+    bench("filter_aberrant", rows, filter_aberrant, df)
+
+    x, y, feature_cols = split_xy(filter_aberrant(df))
+    del df
+    num_cols = [c for c in feature_cols if c not in CAT_COLS]
+    fit_rows = min(fit_rows, len(x))
+    model = build_model(CAT_COLS, num_cols)
+    bench("model.fit", fit_rows, model.fit,
+          x.iloc[:fit_rows], y.iloc[:fit_rows], n_repeat=1)
+    bench("model.predict", len(x), model.predict, x)
+
+    npz = os.path.join(data_dir, "model.npz")
+    export_compact(model, npz)
+    compact = load_model(npz)
+    bench("compact.predict", len(x), compact.predict, x)
+    return results
+
+
+def environment():
+    """Versions and machine the results were measured with."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": pyarrow.__version__,
+        "scikit-learn": sklearn.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance, min_seconds=MIN_COMPARE_S):
+    """Compare best times to a *baseline* run.
+
+    Returns
+    -------
+    list of str
+        Benchmarks slower than the baseline by more than
+        *tolerance* (relative), after normalizing by row count.
+        Benchmarks faster than *min_seconds* in both runs are
+        shown but never flagged (timer noise dominates).
+    """
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = ((res["best_s"] / res["rows"])
+                 / (base["best_s"] / base["rows"]))
+        noisy = max(res["best_s"], base["best_s"]) < min_seconds
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "(too short)" if noisy else "REGRESSION"
+        print(f"{name:<20} x{ratio:5.2f} {flag}")
+        if flag == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Entry point: run the suite, save JSON, optionally compare."""
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--fit-rows", type=int, default=200_000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument(
+        "--data-dir", default=None,
+        help="Keep generated parquet here (default: temporary dir).",
+    )
+    p.add_argument(
+        "--output", default=None,
+        help="Result file (default: benchmarks/results/"
+             "<date>-<commit>.json).",
+    )
+    p.add_argument(
+        "--compare", default=None,
+        help="Baseline result file; exit 1 on regression.",
+    )
+    p.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="Relative slowdown tolerated by --compare.",
+    )
+    args = p.parse_args()
+
+    env = environment()
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results = run_suite(args.rows, args.fit_rows, args.repeat,
+                            args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_suite(args.rows, args.fit_rows, args.repeat, tmp)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{env['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"environment": env, "rows": args.rows,
+                   "results": results}, f, indent=2)
+    print(f"results -> {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
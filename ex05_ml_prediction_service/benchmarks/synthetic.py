@@ -0,0 +1,277 @@
+"""Synthetic NYC Yellow Taxi trips for offline benchmarks.
+
+Trips follow the shape of the TLC files: pickups concentrated in
+Manhattan and the airports (zones of ``data/raw/taxi_zone_lookup.csv``),
+a daily demand curve, log-normal distances, speeds that drop at rush
+hour, payment and rate codes of ``ex03_sql_table_creation/insertion.sql``
+and fares built from the 2024 tariff. A small share of rows is null or
+aberrant, so that validation and outlier filtering have work to do.
+
+Usage
+-----
+.. code-block:: bash
+
+    cd ex05_ml_prediction_service
+    PYTHONPATH=src python -m benchmarks.synthetic \\
+        --rows 3000000 --month 2024-01 --output /tmp/synthetic.parquet
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+#: Zone lookup shipped with the repository.
+ZONES_PATH = (
+    Path(__file__).resolve().parents[2] / "data" / "raw"
+    / "taxi_zone_lookup.csv"
+)
+
+#: Relative pickup demand by ``service_zone``.
+SERVICE_ZONE_WEIGHTS = {
+    "Yellow Zone": 40.0,
+    "Airports": 60.0,
+    "Boro Zone": 1.0,
+    "EWR": 0.2,
+    "N/A": 0.5,
+}
+
+#: Zone IDs of JFK, LaGuardia and Newark.
+JFK, LGA, EWR = 132, 138, 1
+
+#: Relative demand per pickup hour (0-23).
+HOURLY_DEMAND = np.array([
+    2.6, 1.8, 1.2, 0.8, 0.6, 0.7, 1.5, 2.8, 3.8, 4.0, 4.1, 4.3,
+    4.5, 4.6, 4.9, 5.1, 5.3, 5.9, 6.4, 6.0, 5.2, 4.9, 4.4, 3.5,
+])
+
+#: ``{code: probability}`` of the dimension codes of ``insertion.sql``.
+VENDOR_PROBS = {1: 0.26, 2: 0.73, 6: 0.01}
+PAYMENT_PROBS = {0: 0.03, 1: 0.76, 2: 0.16, 3: 0.01, 4: 0.03, 5: 0.005,
+                 6: 0.005}
+RATE_PROBS = {1: 0.95, 3: 0.004, 4: 0.003, 5: 0.03, 6: 0.001, 99: 0.012}
+PASSENGER_PROBS = {0: 0.01, 1: 0.75, 2: 0.14, 3: 0.035, 4: 0.02,
+                   5: 0.025, 6: 0.02}
+
+#: Columns of the TLC yellow-taxi files, in file order.
+TLC_COLUMNS = [
+    "VendorID", "tpep_pickup_datetime", "tpep_dropoff_datetime",
+    "passenger_count", "trip_distance", "RatecodeID",
+    "store_and_fwd_flag", "PULocationID", "DOLocationID",
+    "payment_type", "fare_amount", "extra", "mta_tax", "tip_amount",
+    "tolls_amount", "improvement_surcharge", "total_amount",
+    "congestion_surcharge", "Airport_fee",
+]
+
+
+def zone_weights(zones_path=ZONES_PATH, seed=0):
+    """Pickup probability of every zone of the lookup table.
+
+    Zones get the weight of their ``service_zone`` times a
+    log-normal factor, which gives the long tail of real pickups.
+
+    Returns
+    -------
+    zone_ids : np.ndarray
+        ``LocationID`` values.
+    probs : np.ndarray
+        Probabilities (sum to 1).
+    boroughs : np.ndarray
+        Borough of every zone.
+    """
+    zones = pd.read_csv(zones_path)
+    rng = np.random.default_rng(seed)
+    weights = (
+        zones["service_zone"].map(SERVICE_ZONE_WEIGHTS).fillna(0.5)
+        * rng.lognormal(0.0, 1.0, len(zones))
+    ).to_numpy()
+    return (
+        zones["LocationID"].to_numpy(),
+        weights / weights.sum(),
+        zones["Borough"].to_numpy(),
+    )
+
+
+def _choice(rng, probs, n):
+    """Draw *n* codes from a ``{code: probability}`` dict."""
+    codes = np.array(list(probs))
+    p = np.array(list(probs.values()), dtype=np.float64)
+    return rng.choice(codes, n, p=p / p.sum())
+
+
+def synthetic_tlc(n_rows, month="2024-01", seed=42, null_rate=0.01,
+                  aberrant_rate=0.005, zones_path=ZONES_PATH):
+    """Generate *n_rows* trips with the columns of the TLC files.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of trips.
+    month : str
+        ``YYYY-MM`` pickup month.
+    seed : int
+        Random seed.
+    null_rate : float
+        Share of null ``passenger_count`` / ``RatecodeID`` (as in
+        trips reported by street-hail apps).
+    aberrant_rate : float
+        Share of rows with a negative fare, an excessive distance or
+        a negative duration.
+    zones_path : str or Path
+        Zone lookup CSV.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns of :data:`TLC_COLUMNS`.
+    """
+    rng = np.random.default_rng(seed)
+    zone_ids, probs, boroughs = zone_weights(zones_path, seed)
+    in_manhattan = np.zeros(zone_ids.max() + 1, dtype=bool)
+    in_manhattan[zone_ids[boroughs == "Manhattan"]] = True
+
+    start = pd.Timestamp(f"{month}-01")
+    n_days = (start + pd.offsets.MonthBegin(1) - start).days
+    hours = rng.choice(24, n_rows, p=HOURLY_DEMAND / HOURLY_DEMAND.sum())
+    offset_s = (rng.integers(0, n_days, n_rows) * 86_400 + hours * 3_600
+                + rng.integers(0, 3_600, n_rows))
+    pickup = (np.datetime64(start, "us")
+              + (offset_s * 10**6).astype("timedelta64[us]"))
+
+    pu = rng.choice(zone_ids, n_rows, p=probs)
+    do = rng.choice(zone_ids, n_rows, p=probs)
+    airport = np.isin(pu, (JFK, LGA, EWR)) | np.isin(do, (JFK, LGA, EWR))
+
+    distance = rng.lognormal(np.log(1.7), 0.75, n_rows)
+    distance[airport] += rng.gamma(9.0, 1.4, airport.sum())
+    distance = np.round(distance, 2)
+    # Slower at rush hour, faster at night.
+    speed = rng.lognormal(np.log(11.0), 0.3, n_rows) * np.where(
+        (hours >= 7) & (hours <= 19), 0.85, 1.3,
+    )
+    duration_s = (120 + 3_600 * distance / speed).astype(np.int64)
+
+    rate = _choice(rng, RATE_PROBS, n_rows)
+    rate[(pu == JFK) | (do == JFK)] = 2
+    rate[(pu == EWR) | (do == EWR)] = 3
+    payment = _choice(rng, PAYMENT_PROBS, n_rows)
+
+    fare = np.round(3.0 + 3.5 * distance + 0.7 * duration_s / 60, 2)
+    fare[rate == 2] = 70.0
+    extra = np.where((hours >= 20) | (hours < 6), 1.0, 0.0)
+    extra += np.where((hours >= 16) & (hours < 20), 2.5, 0.0)
+    tip = np.where(
+        payment == 1,
+        np.round(fare * rng.gamma(4.0, 0.05, n_rows), 2), 0.0,
+    )
+    tolls = np.where(airport & (rng.random(n_rows) < 0.4), 6.94, 0.0)
+    congestion = np.where(in_manhattan[do], 2.5, 0.0)
+    airport_fee = np.where(np.isin(pu, (JFK, LGA)), 1.75, 0.0)
+    total = np.round(
+        fare + extra + 0.5 + tip + tolls + 1.0 + congestion + airport_fee,
+        2,
+    )
+
+    passengers = pd.array(
+        _choice(rng, PASSENGER_PROBS, n_rows), dtype="Int64",
+    )
+    rate = pd.array(rate, dtype="Int64")
+    missing = rng.random(n_rows) < null_rate
+    passengers[missing] = pd.NA
+    rate[missing] = pd.NA
+
+    bad = np.flatnonzero(rng.random(n_rows) < aberrant_rate)
+    kind = rng.integers(0, 3, len(bad))
+    total[bad[kind == 0]] *= -1
+    distance[bad[kind == 1]] += 150.0
+    duration_s[bad[kind == 2]] *= -1
+
+    return pd.DataFrame({
+        "VendorID": _choice(rng, VENDOR_PROBS, n_rows),
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": (
+            pickup + (duration_s * 10**6).astype("timedelta64[us]")
+        ),
+        "passenger_count": passengers,
+        "trip_distance": distance,
+        "RatecodeID": rate,
+        "store_and_fwd_flag": np.where(
+            rng.random(n_rows) < 0.005, "Y", "N",
+        ),
+        "PULocationID": pu.astype(np.int32),
+        "DOLocationID": do.astype(np.int32),
+        "payment_type": payment,
+        "fare_amount": fare,
+        "extra": extra,
+        "mta_tax": 0.5,
+        "tip_amount": tip,
+        "tolls_amount": tolls,
+        "improvement_surcharge": 1.0,
+        "total_amount": total,
+        "congestion_surcharge": congestion,
+        "Airport_fee": airport_fee,
+    })[TLC_COLUMNS]
+
+
+def synthetic_trips(n_rows, seed=42, month="2024-01"):
+    """Synthetic trips as returned by the readers of :mod:`taxi_ml.io`.
+
+    Returns
+    -------
+    pd.DataFrame
+        snake_case columns with compact dtypes (see
+        :func:`~taxi_ml.dtypes.downcast`).
+    """
+    from taxi_ml.dtypes import downcast
+    from taxi_ml.io import _COL_RENAME
+
+    df = synthetic_tlc(n_rows, month=month, seed=seed)
+    df, _ = downcast(df.rename(columns=_COL_RENAME))
+    return df
+
+
+def write_synthetic_parquet(path, n_rows, month="2024-01", seed=42,
+                            row_group_rows=1_000_000, **kwargs):
+    """Write :func:`synthetic_tlc` trips to a parquet file.
+
+    Parameters
+    ----------
+    path : str or Path
+        Output file.
+    n_rows : int
+        Number of trips.
+    month, seed, **kwargs
+        Passed to :func:`synthetic_tlc`.
+    row_group_rows : int
+        Rows per parquet row group.
+
+    Returns
+    -------
+    str
+        *path*.
+    """
+    df = synthetic_tlc(n_rows, month=month, seed=seed, **kwargs)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, str(path), row_group_size=row_group_rows)
+    return str(path)
+
+
+def main():
+    """Entry point: write one month of synthetic trips."""
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--month", default="2024-01")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", required=True)
+    args = p.parse_args()
+    write_synthetic_parquet(
+        args.output, args.rows, month=args.month, seed=args.seed,
+    )
+    print(f"{args.rows:,} trips -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Bulk-load monthly trip files into the PostgreSQL warehouse.
+
+Months already listed in ``fact_trips_load_log`` are skipped, so a
+failed backfill can simply be rerun.
+
+Usage
+-----
+.. code-block:: bash
+
+    python scripts/load.py --months 2024-01 2024-02 2024-03
+
+    # Reload a month from another location
+    python scripts/load.py --months 2024-01 --force \\
+        --input data/yellow_tripdata_{month}.parquet
+"""
+
+import argparse
+import os
+import time
+
+import psycopg2
+
+from taxi_ml.io import minio_storage_options
+from taxi_ml.loader import COPY_BATCH_ROWS, load_month
+
+
+def parse_args():
+    """Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments.
+    """
+    p = argparse.ArgumentParser(
+        description="Load monthly trips into fact_trips"
+    )
+    p.add_argument(
+        "--months", required=True, nargs="+",
+        help="Months to load (YYYY-MM), in order.",
+    )
+    p.add_argument(
+        "--input",
+        default="s3://nyc-yellow-tripdata/cleaned/"
+                "yellow_tripdata_{month}",
+        help="Parquet path of a month (local or s3://); {month} is "
+             "replaced by YYYY-MM.",
+    )
+    p.add_argument(
+        "--force", action="store_true",
+        help="Reload months already in fact_trips_load_log.",
+    )
+    p.add_argument(
+        "--no-rollups", action="store_true",
+        help="Do not call refresh_rollups() after each month.",
+    )
+    p.add_argument(
+        "--batch-rows", type=int, default=COPY_BATCH_ROWS,
+        help="Rows sent per COPY call.",
+    )
+    p.add_argument("--pg-host", default=os.getenv("PGHOST", "localhost"))
+    p.add_argument("--pg-port", default=os.getenv("PGPORT", "5432"))
+    p.add_argument(
+        "--pg-database", default=os.getenv("PGDATABASE", "bigdata_db"),
+    )
+    p.add_argument("--pg-user", default=os.getenv("PGUSER", "postgres"))
+    p.add_argument(
+        "--pg-password", default=os.getenv("PGPASSWORD", "postgres"),
+    )
+    p.add_argument(
+        "--minio-endpoint",
+        default=os.getenv(
+            "MINIO_ENDPOINT", "http://localhost:9000"
+        ),
+    )
+    p.add_argument(
+        "--minio-access",
+        default=os.getenv("MINIO_ACCESS_KEY", "minio"),
+    )
+    p.add_argument(
+        "--minio-secret",
+        default=os.getenv("MINIO_SECRET_KEY", "minio123"),
+    )
+    return p.parse_args()
+
+
+def main():
+    """Entry point: load every requested month, one transaction each."""
+    args = parse_args()
+
+    storage_options = None
+    if args.input.startswith("s3://"):
+        storage_options = minio_storage_options(
+            args.minio_endpoint,
+            args.minio_access,
+            args.minio_secret,
+        )
+
+    conn = psycopg2.connect(
+        host=args.pg_host,
+        port=int(args.pg_port),
+        dbname=args.pg_database,
+        user=args.pg_user,
+        password=args.pg_password,
+    )
+    try:
+        for month in args.months:
+            path = args.input.format(month=month)
+            t0 = time.perf_counter()
+            result = load_month(
+                conn, path, month,
+                storage_options=storage_options,
+                force=args.force,
+                refresh_rollups=not args.no_rollups,
+                batch_rows=args.batch_rows,
+            )
+            elapsed = time.perf_counter() - t0
+            if result["status"] == "skipped":
+                print(f"[LOAD] {month}: already loaded "
+                      f"({result['rows']:,} rows), skipped")
+                continue
+            print(f"[LOAD] {month}: {result['rows']:,} rows "
+                  f"({result['rejected']:,} rejected) in {elapsed:.1f}s "
+                  f"from {path}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
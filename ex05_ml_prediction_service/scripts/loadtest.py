@@ -0,0 +1,92 @@
+"""Load-test the prediction service and report p50/p99 latency.
+
+Usage
+-----
+.. code-block:: bash
+
+    python scripts/loadtest.py --url http://127.0.0.1:8000 \\
+        --requests 2000 --concurrency 32
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SAMPLE_TRIP = {
+    "tpep_pickup_datetime": "2024-12-01 08:15:00",
+    "tpep_dropoff_datetime": "2024-12-01 08:32:00",
+    "passenger_count": 1,
+    "trip_distance": 3.1,
+    "rate_code_id": 1,
+    "payment_type_id": 1,
+    "pu_location_id": 161,
+    "do_location_id": 236,
+}
+
+
+def parse_args():
+    """Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments.
+    """
+    p = argparse.ArgumentParser(description="Load-test /predict")
+    p.add_argument("--url", default="http://127.0.0.1:8000")
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=32)
+    p.add_argument(
+        "--trips-per-request", type=int, default=1,
+        help="Trips sent in each request body.",
+    )
+    return p.parse_args()
+
+
+def post(url, body):
+    """POST *body* and return the client-side latency in seconds."""
+    req = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"},
+    )
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        resp.read()
+    return time.perf_counter() - t0
+
+
+def main():
+    """Entry point: fire requests concurrently and print latencies."""
+    args = parse_args()
+    body = json.dumps(
+        {"trips": [SAMPLE_TRIP] * args.trips_per_request}
+    ).encode("utf-8")
+    url = f"{args.url}/predict"
+    post(url, body)  # warm-up
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(
+            lambda _: post(url, body), range(args.requests),
+        ))
+    elapsed = time.perf_counter() - t0
+
+    ms = np.array(latencies) * 1000.0
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    print(
+        f"[LOAD] {args.requests} requests, concurrency "
+        f"{args.concurrency}: {args.requests / elapsed:,.0f} req/s"
+    )
+    print(
+        f"[LOAD] client latency p50={p50:.2f} ms  p90={p90:.2f} ms  "
+        f"p99={p99:.2f} ms  max={ms.max():.2f} ms"
+    )
+    with urllib.request.urlopen(f"{args.url}/stats") as resp:
+        print(f"[LOAD] server stats: {resp.read().decode()}")
+
+
+if __name__ == "__main__":
+    main()
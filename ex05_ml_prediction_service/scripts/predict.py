@@ -7,6 +7,28 @@ Usage
     python scripts/predict.py \\
         --input s3://nyc-processed/cleaned/2022-02/ \\
         --output artifacts/predictions.csv
+
+    # Constant-memory streaming over row groups
+    python scripts/predict.py \\
+        --input s3://nyc-processed/cleaned/2022-02/ \\
+        --batch-rows 500000
+
+    # Month-partitioned Parquet with row keys, on MinIO
+    python scripts/predict.py \\
+        --input s3://nyc-processed/cleaned/2022-02/ \\
+        --output-format parquet \\
+        --output s3://nyc-processed/predictions/
+
+    # Backfill a year on 8 cores (bash expands the braces into
+    # twelve directories; globs are not supported)
+    python scripts/predict.py \\
+        --input s3://nyc-processed/cleaned/2022-{01..12}/ \\
+        --output-format parquet --workers 8
+
+    # Nightly re-scoring: reuse the predictions of the previous run
+    python scripts/predict.py \\
+        --input s3://nyc-processed/cleaned/2022-02/ \\
+        --prediction-cache artifacts/prediction_cache
 """
 
 import argparse
@@ -14,12 +36,36 @@ import gc
 import os
 
 import pandas as pd
-from joblib import load
 
+from taxi_ml.artifact import load_model, resolve_model_path
+from taxi_ml.batch import (
+    DEFAULT_SHARD_ROWS,
+    PREDICT_COLS,
+    plan_shards,
+    predict_batch,
+    run_shards,
+)
 from taxi_ml.config import Paths
 from taxi_ml.features import add_time_features, split_xy
-from taxi_ml.io import minio_storage_options, read_parquet_any
-from taxi_ml.validate import validate_infer_df
+from taxi_ml.io import (
+    DEFAULT_IO_THREADS,
+    iter_parquet_batches,
+    list_parquet_files,
+    minio_storage_options,
+    read_parquet_many,
+    read_parquet_sample,
+)
+from taxi_ml.output import (
+    CsvPredictionWriter,
+    ParquetPredictionWriter,
+    clear_output,
+)
+from taxi_ml.prediction_cache import DEFAULT_MAX_ENTRIES, CachedPredictor
+from taxi_ml.profiling import StageProfiler
+from taxi_ml.validate import INFER_REQUIRED_COLS, validate_infer_df
+
+#: ``--batch-rows`` used by ``--output-format parquet`` when unset.
+DEFAULT_PARQUET_BATCH_ROWS = 1_000_000
 
 
 def parse_args():
@@ -37,7 +83,27 @@ def parse_args():
         "--input", required=True, nargs="+",
         help="Parquet paths (local or s3://)",
     )
-    p.add_argument("--output", default="artifacts/predictions.csv")
+    p.add_argument(
+        "--output", default=None,
+        help="CSV file, or Parquet directory (local or s3://). "
+             "Default: artifacts/predictions.csv or "
+             "artifacts/predictions/.",
+    )
+    p.add_argument(
+        "--output-format", choices=("csv", "parquet"), default="csv",
+        help="csv: predictions only. parquet: partitioned by pickup "
+             "month, with source file/row and trip keys (streams "
+             "the input).",
+    )
+    p.add_argument(
+        "--compression", default="zstd",
+        help="Parquet compression codec.",
+    )
+    p.add_argument(
+        "--model", default=Paths().compact_model_path,
+        help="Compact .npz artifact (fast start, no scikit-learn) "
+             "or pickled .joblib pipeline.",
+    )
     p.add_argument(
         "--minio-endpoint",
         default=os.getenv(
@@ -54,57 +120,290 @@ def parse_args():
     )
     p.add_argument(
         "--max-rows", type=int, default=None,
-        help="Cap rows (random sample).",
+        help="Cap rows (random sample; first rows when streaming).",
+    )
+    p.add_argument(
+        "--io-threads", type=int, default=DEFAULT_IO_THREADS,
+        help="Number of parquet files read concurrently.",
+    )
+    p.add_argument(
+        "--batch-rows", type=int, default=None,
+        help="Stream the input in batches of this many rows "
+             "instead of loading everything in memory.",
+    )
+    p.add_argument(
+        "--workers", type=int, default=1,
+        help="Processes predicting shards of the input in parallel "
+             "(needs --output-format parquet).",
+    )
+    p.add_argument(
+        "--shard-rows", type=int, default=DEFAULT_SHARD_ROWS,
+        help="Target rows per shard (whole row groups) with "
+             "--workers.",
+    )
+    p.add_argument(
+        "--prediction-cache", default=None,
+        help="Directory of the prediction cache: predictions are "
+             "memoized by feature vector and reused by later runs "
+             "of the same model.",
+    )
+    p.add_argument(
+        "--prediction-cache-entries", type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Distinct feature vectors kept by --prediction-cache "
+             "(least recently used evicted beyond).",
+    )
+    p.add_argument(
+        "--run-report", default=Paths().predict_report_path,
+        help="JSON report of per-stage wall/CPU time, memory and "
+             "rows/s.",
+    )
+    p.add_argument(
+        "--profile", action="store_true",
+        help="Run cProfile; stats are dumped next to --run-report.",
+    )
+    p.add_argument(
+        "--tracemalloc", action="store_true",
+        help="Trace Python allocations per stage (slower).",
     )
-    return p.parse_args()
+    args = p.parse_args()
+    args.model = resolve_model_path(args.model)
+    if args.workers > 1 and args.output_format != "parquet":
+        p.error("--workers needs --output-format parquet")
+    if args.workers > 1 and args.max_rows:
+        p.error("--max-rows cannot be combined with --workers")
+    if args.workers > 1 and args.prediction_cache:
+        p.error("--prediction-cache cannot be combined with --workers")
+    if args.output is None:
+        args.output = (
+            "artifacts/predictions.csv" if args.output_format == "csv"
+            else "artifacts/predictions"
+        )
+    if args.output_format == "parquet" and not args.batch_rows:
+        # Source row indices need the input read file by file.
+        args.batch_rows = DEFAULT_PARQUET_BATCH_ROWS
+    return args
+
+
+def iter_source_batches(args, storage_options, columns):
+    """Stream every input file in batches, with row positions.
+
+    Yields
+    ------
+    source_file : str
+        Part file the batch comes from (``s3://`` URI for MinIO).
+    first_row : int
+        Index of the first row of the batch in *source_file*.
+    chunk : pd.DataFrame
+        At most ``--batch-rows`` rows.
+    """
+    for src in args.input:
+        print(f"[PREDICT] Streaming {src} ...")
+        so = storage_options if src.startswith("s3://") else None
+        scheme = "s3://" if so is not None else ""
+        for part in list_parquet_files(src, so):
+            source_file = scheme + part
+            first_row = 0
+            for chunk in iter_parquet_batches(
+                source_file, args.batch_rows, storage_options=so,
+                columns=columns,
+            ):
+                yield source_file, first_row, chunk
+                first_row += len(chunk)
+
+
+def open_writer(args, storage_options):
+    """Return the prediction writer of ``--output-format``."""
+    if args.output_format == "csv":
+        return CsvPredictionWriter(args.output)
+    so = storage_options if args.output.startswith("s3://") else None
+    clear_output(args.output, so)
+    return ParquetPredictionWriter(
+        args.output, so, compression=args.compression,
+    )
+
+
+def predict_streaming(args, storage_options, model, profiler):
+    """Predict batch by batch and append each batch to the output.
+
+    Each batch goes through validation, feature engineering and
+    prediction independently, so memory stays bounded by
+    ``--batch-rows`` whatever the number and size of inputs.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed arguments (``input``, ``output``, ``output_format``,
+        ``batch_rows``, ``max_rows``).
+    storage_options : dict or None
+        s3fs credentials for ``s3://`` inputs and output.
+    model : object
+        Trained model with a ``predict`` method.
+    profiler : StageProfiler
+        Receives the per-batch stage timings.
+
+    Returns
+    -------
+    int
+        Number of rows predicted.
+    """
+    batches = iter_source_batches(args, storage_options, PREDICT_COLS)
+    with open_writer(args, storage_options) as writer:
+        while True:
+            with profiler.stage("read") as st:
+                item = next(batches, None)
+                st["rows"] = 0 if item is None else len(item[2])
+            if item is None:
+                break
+            source_file, first_row, chunk = item
+            if args.max_rows:
+                chunk = chunk.iloc[:args.max_rows - writer.n_rows]
+            predict_batch(
+                model, chunk, source_file, first_row, writer, profiler,
+            )
+            print(f"          → {writer.n_rows:,} rows")
+            if args.max_rows and writer.n_rows >= args.max_rows:
+                break
+    return writer.n_rows
+
+
+def predict_parallel(args, storage_options, profiler):
+    """Predict shards of the input in ``--workers`` processes.
+
+    Every worker writes its own part files; the stage records of
+    the workers are merged into *profiler*, so stage times are
+    summed over workers (busy time, not elapsed time).
+
+    Returns
+    -------
+    int
+        Number of rows predicted.
+    """
+    with profiler.stage("plan") as st:
+        shards = plan_shards(args.input, storage_options, args.shard_rows)
+        st["rows"] = sum(s.n_rows for s in shards)
+    print(f"[PREDICT] {len(shards)} shards, {st['rows']:,} rows, "
+          f"{args.workers} workers")
+    so = storage_options if args.output.startswith("s3://") else None
+    clear_output(args.output, so)
+    n_rows = 0
+    with profiler.stage("pool", rows=st["rows"]):
+        for done, result in enumerate(run_shards(
+            shards, args.model, args.output, args.workers,
+            storage_options=storage_options,
+            compression=args.compression, batch_rows=args.batch_rows,
+        ), start=1):
+            profiler.records.extend(result["records"])
+            n_rows += result["n_rows"]
+            print(f"          → shard {done}/{len(shards)}: "
+                  f"{n_rows:,} rows")
+    return n_rows
+
+
+def load_predictor(args, profiler):
+    """Load ``--model``, wrapped in ``--prediction-cache`` if set."""
+    with profiler.stage("load_model"):
+        model = load_model(args.model)
+        if args.prediction_cache:
+            model = CachedPredictor.for_artifact(
+                model, args.model, args.prediction_cache,
+                max_entries=args.prediction_cache_entries,
+            )
+            print(f"[PREDICT] prediction cache: {model.loaded:,} "
+                  f"entries loaded from {model.path}")
+    return model
+
+
+def write_report(profiler, args, n_rows, model=None):
+    """Write the run report of *profiler* to ``--run-report``.
+
+    The prediction cache of *model*, if any, is saved and its
+    statistics are added to the report.
+    """
+    extra = {}
+    if isinstance(model, CachedPredictor):
+        with profiler.stage("save_cache"):
+            model.save()
+        extra["prediction_cache"] = model.stats()
+        print(f"[PREDICT] prediction cache: "
+              f"{extra['prediction_cache']['hit_rate']:.1%} hits, "
+              f"{len(model):,} entries -> {model.path}")
+    profiler.write(args.run_report, inputs=args.input, n_rows=n_rows,
+                   workers=args.workers, **extra)
+    print(profiler.summary())
+    print(f"[PREDICT] run report saved -> {args.run_report}")
 
 
 def main():
     """Entry point: load model, predict, save CSV."""
     args = parse_args()
-    paths = Paths()
+    # One line per stage and batch would flood streaming runs.
+    profiler = StageProfiler(
+        "predict", trace_memory=args.tracemalloc, cprofile=args.profile,
+        log=None if args.batch_rows else print,
+    )
 
     storage_options = None
-    if any(p.startswith("s3://") for p in args.input):
+    if any(p.startswith("s3://") for p in args.input + [args.output]):
         storage_options = minio_storage_options(
             args.minio_endpoint,
             args.minio_access,
             args.minio_secret,
         )
 
-    frames = []
-    for src in args.input:
-        print(f"[PREDICT] Reading {src} ...")
-        so = storage_options if src.startswith("s3://") else None
-        chunk = read_parquet_any(src, storage_options=so)
-        frames.append(chunk)
-        print(f"          → {len(chunk):,} rows")
+    if args.workers > 1:
+        n_rows = predict_parallel(args, storage_options, profiler)
+        print(f"[PREDICT] Total: {n_rows:,} rows")
+        print(f"[PREDICT] wrote -> {args.output}")
+        write_report(profiler, args, n_rows)
+        return
 
-    df = pd.concat(frames, ignore_index=True)
-    del frames
-    gc.collect()
-    print(f"[PREDICT] Total: {len(df):,} rows")
+    if args.batch_rows:
+        model = load_predictor(args, profiler)
+        n_rows = predict_streaming(args, storage_options, model, profiler)
+        print(f"[PREDICT] Total: {n_rows:,} rows")
+        print(f"[PREDICT] wrote -> {args.output}")
+        write_report(profiler, args, n_rows, model)
+        return
 
-    if args.max_rows and len(df) > args.max_rows:
-        print(f"[PREDICT] Capping to {args.max_rows:,} rows")
-        df = df.sample(
-            n=args.max_rows, random_state=42,
-        ).reset_index(drop=True)
+    print(f"[PREDICT] Reading {len(args.input)} input(s) ...")
+    if args.max_rows:
+        print(f"[PREDICT] Sampling {args.max_rows:,} rows")
+        with profiler.stage("sample") as st:
+            df = read_parquet_sample(
+                args.input, size=args.max_rows,
+                storage_options=storage_options,
+                columns=INFER_REQUIRED_COLS,
+            )
+            st["rows"] = len(df)
+    else:
+        with profiler.stage("read") as st:
+            df = read_parquet_many(
+                args.input, storage_options=storage_options,
+                columns=INFER_REQUIRED_COLS, workers=args.io_threads,
+            )
+            st["rows"] = len(df)
+    print(f"[PREDICT] Total: {len(df):,} rows")
 
-    validate_infer_df(df)
+    with profiler.stage("validate", rows=len(df)):
+        validate_infer_df(df)
 
-    df_feat = add_time_features(df)
-    x, _, _ = split_xy(df_feat)
-    del df, df_feat
-    gc.collect()
+    with profiler.stage("features", rows=len(df)):
+        df_feat = add_time_features(df)
+        x, _, _ = split_xy(df_feat)
+        del df, df_feat
+        gc.collect()
 
-    model = load(paths.model_path)
-    preds = model.predict(x)
+    model = load_predictor(args, profiler)
+    with profiler.stage("predict", rows=len(x)):
+        preds = model.predict(x)
 
-    out = pd.DataFrame({"prediction_total_amount": preds})
-    out.to_csv(args.output, index=False)
+    with profiler.stage("write", rows=len(preds)):
+        out = pd.DataFrame({"prediction_total_amount": preds})
+        out.to_csv(args.output, index=False)
 
     print(f"[PREDICT] wrote -> {args.output}")
+    write_report(profiler, args, len(preds), model)
 
 
 if __name__ == "__main__":
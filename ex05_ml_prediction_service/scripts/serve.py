@@ -0,0 +1,91 @@
+"""Serve fare predictions over HTTP.
+
+Loads the model once and exposes ``POST /predict``,
+``GET /health`` and ``GET /stats``.
+
+Usage
+-----
+.. code-block:: bash
+
+    python scripts/serve.py --port 8000
+
+    curl -s localhost:8000/predict -d '{
+        "tpep_pickup_datetime": "2024-12-01 08:15:00",
+        "tpep_dropoff_datetime": "2024-12-01 08:32:00",
+        "passenger_count": 1, "trip_distance": 3.1,
+        "rate_code_id": 1, "payment_type_id": 1,
+        "pu_location_id": 161, "do_location_id": 236}'
+"""
+
+import argparse
+
+from taxi_ml.artifact import load_model, resolve_model_path
+from taxi_ml.config import Paths
+from taxi_ml.prediction_cache import DEFAULT_MAX_ENTRIES, CachedPredictor
+from taxi_ml.service import PredictionService, make_server
+
+
+def parse_args():
+    """Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments.
+    """
+    p = argparse.ArgumentParser(description="Serve fare predictions")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument(
+        "--model", default=Paths().compact_model_path,
+        help="Compact .npz artifact or pickled .joblib pipeline.",
+    )
+    p.add_argument(
+        "--max-batch-rows", type=int, default=512,
+        help="Maximum rows grouped into one model call.",
+    )
+    p.add_argument(
+        "--max-wait-ms", type=float, default=5.0,
+        help="Maximum time a request waits for others to batch.",
+    )
+    p.add_argument(
+        "--prediction-cache", default=None,
+        help="Directory of the prediction cache (see predict.py); "
+             "loaded at start, saved on shutdown.",
+    )
+    p.add_argument(
+        "--prediction-cache-entries", type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Distinct feature vectors kept by --prediction-cache.",
+    )
+    args = p.parse_args()
+    args.model = resolve_model_path(args.model)
+    return args
+
+
+def main():
+    """Entry point: load the model once and serve forever."""
+    args = parse_args()
+    model = load_model(args.model)
+    if args.prediction_cache:
+        model = CachedPredictor.for_artifact(
+            model, args.model, args.prediction_cache,
+            max_entries=args.prediction_cache_entries,
+        )
+    service = PredictionService(
+        model, args.max_batch_rows, args.max_wait_ms,
+    )
+    server = make_server(service, args.host, args.port)
+    print(f"[SERVE] {args.model} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.prediction_cache:
+            print(f"[SERVE] prediction cache -> {model.save()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,34 +7,68 @@ Usage
     python scripts/train.py \\
         --input s3://nyc-processed/cleaned/2024-01/ \\
         --max-rows 5000000
+
+With ``--holdout-month 2024-03``, trips picked up in that month are
+left out of training and the model is evaluated on them chunk by
+chunk (see :mod:`taxi_ml.evaluation`).
 """
 
 import argparse
 import gc
 import json
 import os
+from dataclasses import asdict
 
+import numpy as np
 import pandas as pd
 from joblib import dump
 from sklearn.model_selection import train_test_split
 
+from taxi_ml.artifact import export_compact
 from taxi_ml.config import Paths
-from taxi_ml.features import add_time_features, split_xy
-from taxi_ml.io import minio_storage_options, read_parquet_any
-from taxi_ml.model import build_model, rmse
-from taxi_ml.validate import validate_train_df
-
-NEEDED_COLS = [
-    "tpep_pickup_datetime",
-    "tpep_dropoff_datetime",
-    "passenger_count",
-    "trip_distance",
-    "rate_code_id",
-    "payment_type_id",
-    "pu_location_id",
-    "do_location_id",
-    "total_amount",
-]
+from taxi_ml.dtypes import downcast
+from taxi_ml.evaluation import EmptyEvaluationError, evaluate_chunks
+from taxi_ml.feature_store import (
+    FeatureStore,
+    feature_key,
+    source_fingerprint,
+)
+from taxi_ml.features import (
+    FEATURE_COLS,
+    FEATURES_VERSION,
+    add_time_features,
+    split_xy,
+)
+from taxi_ml.incremental import fit_incremental
+from taxi_ml.io import (
+    DEFAULT_IO_THREADS,
+    iter_parquet_batches,
+    minio_storage_options,
+    read_parquet_any,
+    read_parquet_many,
+    read_parquet_sample,
+    trip_filters,
+)
+from taxi_ml.model import HGB_PARAMS, build_model
+from taxi_ml.profiling import StageProfiler
+from taxi_ml.sampling import Reservoir
+from taxi_ml.training import (
+    CAT_COLS,
+    NEEDED_COLS,
+    TOTAL_AMOUNT_BOUNDS,
+    prepare_training_frame,
+)
+from taxi_ml.validate import (
+    ABERRANT_RULES,
+    TRAIN_REQUIRED_COLS,
+    TRAIN_RULES,
+    check_rules,
+    check_schema,
+    validate_train_df,
+)
+
+#: Rows read at a time from cached features with ``--max-rows``.
+SAMPLE_BATCH_ROWS = 1_000_000
 
 
 def parse_args():
@@ -69,9 +103,118 @@ def parse_args():
     p.add_argument("--test-size", type=float, default=0.2)
     p.add_argument(
         "--max-rows", type=int, default=None,
-        help="Cap rows after concat (random sample).",
+        help="Cap rows (random sample drawn while reading).",
+    )
+    p.add_argument(
+        "--stratify", action="store_true",
+        help="With --max-rows, stratify the sample by pickup month "
+             "and pu_location_id.",
+    )
+    p.add_argument(
+        "--min-per-stratum", type=int, default=50,
+        help="Minimum rows per (month, zone) stratum with --stratify.",
+    )
+    p.add_argument(
+        "--io-threads", type=int, default=DEFAULT_IO_THREADS,
+        help="Number of parquet files read concurrently.",
+    )
+    p.add_argument(
+        "--pickup-start", default=None,
+        help="Only read trips picked up on/after this date.",
+    )
+    p.add_argument(
+        "--pickup-end", default=None,
+        help="Only read trips picked up before this date.",
+    )
+    p.add_argument(
+        "--incremental", action="store_true",
+        help="Train out-of-core, one boosting stage per chunk, "
+             "instead of loading all inputs in memory.",
+    )
+    p.add_argument(
+        "--chunk-rows", type=int, default=5_000_000,
+        help="Rows per chunk in --incremental mode.",
+    )
+    p.add_argument(
+        "--iters-per-chunk", type=int, default=50,
+        help="Boosting iterations per chunk in --incremental mode.",
+    )
+    p.add_argument(
+        "--eval-rows", type=int, default=1_000_000,
+        help="Max held-out rows kept for RMSE in --incremental mode.",
+    )
+    p.add_argument(
+        "--params", default=None,
+        help="JSON file of regressor hyper-parameters, e.g. "
+             "artifacts/best_params.json from tune.py.",
     )
-    return p.parse_args()
+    p.add_argument(
+        "--feature-cache", default=None,
+        help="Directory caching engineered features per input; "
+             "unchanged inputs skip reading and featurizing.",
+    )
+    p.add_argument(
+        "--feature-cache-gb", type=float, default=5.0,
+        help="Disk budget of --feature-cache (least recently used "
+             "inputs are evicted).",
+    )
+    p.add_argument(
+        "--holdout-month", default=None,
+        help="Hold out trips picked up in this month (YYYY-MM) and "
+             "evaluate on them instead of a random split.",
+    )
+    p.add_argument(
+        "--holdout-input", default=None, nargs="+",
+        help="Parquet paths holding the held-out month "
+             "(default: --input).",
+    )
+    p.add_argument(
+        "--eval-chunk-rows", type=int, default=500_000,
+        help="Rows predicted at a time during evaluation.",
+    )
+    p.add_argument(
+        "--run-report", default=Paths().train_report_path,
+        help="JSON report of per-stage wall/CPU time, memory and "
+             "rows/s.",
+    )
+    p.add_argument(
+        "--profile", action="store_true",
+        help="Run cProfile; stats are dumped next to --run-report.",
+    )
+    p.add_argument(
+        "--tracemalloc", action="store_true",
+        help="Trace Python allocations per stage (slower).",
+    )
+    args = p.parse_args()
+    if args.holdout_input and not args.holdout_month:
+        p.error("--holdout-input requires --holdout-month")
+    if args.test_size <= 0 and not args.holdout_month:
+        p.error("--test-size must be > 0 without --holdout-month")
+    if args.feature_cache and (args.incremental or args.stratify):
+        p.error("--feature-cache does not support --incremental "
+                "or --stratify")
+    return args
+
+
+def load_params(args):
+    """Return the ``--params`` hyper-parameters, or ``None``."""
+    if not args.params:
+        return None
+    with open(args.params, encoding="utf-8") as f:
+        params = json.load(f)["params"]
+    print(f"[TRAIN] Hyper-parameters from {args.params}: {params}")
+    return params
+
+
+def print_report(report, header):
+    """Print the per-rule violation counts of a validation pass."""
+    pct = 100 * report.n_invalid / max(report.n_rows, 1)
+    print(
+        f"[TRAIN] {header}: removed {report.n_invalid:,} "
+        f"rows ({pct:.1f}%)"
+    )
+    for name, n in report.violated().items():
+        print(f"          {name:<28} {n:>12,}")
 
 
 def filter_aberrant(df: pd.DataFrame) -> pd.DataFrame:
@@ -88,110 +231,474 @@ def filter_aberrant(df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame
         Filtered DataFrame (index reset).
     """
-    n_before = len(df)
-    mask = (
-        (df["total_amount"] > 0)
-        & (df["total_amount"] <= 200)
-        & (df["trip_distance"] > 0)
-        & (df["trip_distance"] <= 100)
-        & (df["trip_duration_min"] > 0)
-        & (df["trip_duration_min"] <= 180)
-        & (df["passenger_count"] >= 0)
-        & (df["passenger_count"] <= 9)
-    )
-    df = df.loc[mask].reset_index(drop=True)
-    removed = n_before - len(df)
-    pct = 100 * removed / max(n_before, 1)
-    print(
-        f"[TRAIN] Outlier filter: removed {removed:,} "
-        f"rows ({pct:.1f}%)"
+    report = check_rules(df, ABERRANT_RULES)
+    print_report(report, "Outlier filter")
+    return df.loc[report.mask].reset_index(drop=True)
+
+
+def featurize_input(src, storage_options, filters) -> pd.DataFrame:
+    """Read one input and return its filtered features and target.
+
+    Returns
+    -------
+    pd.DataFrame
+        :data:`FEATURE_COLS` plus ``total_amount``.
+    """
+    df = read_parquet_any(
+        src, storage_options, columns=NEEDED_COLS, filters=filters,
     )
-    return df
+    df, report = prepare_training_frame(df)
+    print_report(report, f"{src}: validation + outlier filter")
+    x, y, _ = split_xy(df)
+    return x.assign(total_amount=y)
 
 
-def main():
-    """Entry point: read data, train, evaluate, save artifacts."""
-    args = parse_args()
-    paths = Paths()
-    os.makedirs(paths.artifacts_dir, exist_ok=True)
+def load_cached_features(args, storage_options, filters, profiler):
+    """Return the features of every input through the feature store.
 
-    storage_options = None
-    if any(p.startswith("s3://") for p in args.input):
-        storage_options = minio_storage_options(
-            args.minio_endpoint,
-            args.minio_access,
-            args.minio_secret,
-        )
+    An input is featurized only if no entry matches its files
+    (path, size, ETag/mtime), :data:`FEATURES_VERSION`, the
+    pushdown filters and the validation/outlier thresholds.
+
+    With ``--max-rows``, cached entries are streamed into a
+    reservoir sample batch by batch: memory is bounded by the
+    sample plus one batch (or one input being featurized).
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Features and target of all inputs (sampled to
+        ``--max-rows`` if set).
+    cache_stats : dict
+        Hits and misses of the feature store
+        (:meth:`~taxi_ml.feature_store.FeatureStore.stats`).
+    """
+    store = FeatureStore(
+        args.feature_cache, int(args.feature_cache_gb * 1024 ** 3),
+    )
+    params = {
+        "features_version": FEATURES_VERSION,
+        "columns": NEEDED_COLS,
+        "filters": filters,
+        "rules": [asdict(r) for r in TRAIN_RULES + ABERRANT_RULES],
+    }
+    if args.max_rows:
+        print(f"[TRAIN] Sampling {args.max_rows:,} rows")
+        sample = Reservoir(args.max_rows, seed=42)
+        for src in args.input:
+            so = storage_options if src.startswith("s3://") else None
+            with profiler.stage("sample") as st:
+                key = feature_key(source_fingerprint(src, so), **params)
+                n_seen = sample.n_seen
+                batches = store.get_batches(key, SAMPLE_BATCH_ROWS)
+                if batches is None:
+                    frame = featurize_input(src, so, filters)
+                    store.put(key, frame)
+                    sample.add(frame)
+                    del frame
+                else:
+                    for batch in batches:
+                        sample.add(batch)
+                st["rows"] = sample.n_seen - n_seen
+            print(f"[TRAIN] Features {src}: "
+                  f"{'built' if batches is None else 'cached'} "
+                  f"({st['rows']:,} rows)")
+        df = sample.frame
+        if df is None:
+            df = pd.DataFrame(columns=FEATURE_COLS + ["total_amount"])
+        return df, report_cache(store)
 
-    # Read all input files
     frames = []
     for src in args.input:
-        print(f"[TRAIN] Reading {src} ...")
         so = storage_options if src.startswith("s3://") else None
-        chunk = read_parquet_any(src, storage_options=so)
-        keep = [c for c in NEEDED_COLS if c in chunk.columns]
-        chunk = chunk[keep]
-        frames.append(chunk)
-        print(f"         → {len(chunk):,} rows")
-
-    df = pd.concat(frames, ignore_index=True)
+        with profiler.stage("read") as st:
+            key = feature_key(source_fingerprint(src, so), **params)
+            frame, hit = store.get_or_build(
+                key, lambda: featurize_input(src, so, filters),
+            )
+            st["rows"] = len(frame)
+        print(f"[TRAIN] Features {src}: "
+              f"{'cached' if hit else 'built'} ({len(frame):,} rows)")
+        frames.append(frame)
+    with profiler.stage("concat") as st:
+        df = pd.concat(frames, ignore_index=True)
+        st["rows"] = len(df)
     del frames
-    gc.collect()
-    mem_mb = df.memory_usage(deep=True).sum() / 1e6
-    print(
-        f"[TRAIN] Total: {len(df):,} rows  "
-        f"({mem_mb:.0f} MB)"
+    return df, report_cache(store)
+
+
+def report_cache(store):
+    """Print and return the hit statistics of the feature *store*."""
+    stats = store.stats()
+    print(f"[TRAIN] Feature cache: {stats['hits']} hit(s), "
+          f"{stats['misses']} miss(es)")
+    return stats
+
+
+def holdout_range(month):
+    """``[start, end)`` pickup bounds of a ``YYYY-MM`` month."""
+    start = pd.Timestamp(f"{month}-01")
+    return start, start + pd.offsets.MonthBegin(1)
+
+
+def exclude_pickup_range(filters, start, end):
+    """Add "pickup outside ``[start, end)``" to pushdown *filters*.
+
+    Returns
+    -------
+    list of list of tuple
+        Filters in disjunctive normal form (one conjunction per
+        side of the excluded range).
+    """
+    base = list(filters or [])
+    return [
+        base + [("tpep_pickup_datetime", "<", start)],
+        base + [("tpep_pickup_datetime", ">=", end)],
+    ]
+
+
+def iter_feature_chunks(src, storage_options, filters, chunk_rows):
+    """Stream validated ``(x, y)`` feature chunks of one input.
+
+    Each chunk is read and prepared by
+    :func:`~taxi_ml.training.prepare_training_frame` on its own, so
+    memory is bounded by *chunk_rows*.
+    """
+    chunks = iter_parquet_batches(
+        src, chunk_rows, storage_options=storage_options,
+        columns=NEEDED_COLS, filters=filters,
     )
+    for df in chunks:
+        df, _ = prepare_training_frame(df)
+        x, y, _ = split_xy(df)
+        del df
+        yield x, y
+
+
+def iter_category_chunks(args, storage_options, filters):
+    """Stream only the categorical columns of every input.
 
-    # Optional cap
-    if args.max_rows and len(df) > args.max_rows:
-        print(f"[TRAIN] Capping to {args.max_rows:,} rows")
-        df = df.sample(
-            n=args.max_rows, random_state=42,
-        ).reset_index(drop=True)
+    The reader projects onto :data:`~taxi_ml.training.CAT_COLS`
+    (filters are still pushed down), so the category pass neither
+    decodes the other columns nor featurizes or validates the chunks.
+    """
+    for src in args.input:
+        so = storage_options if src.startswith("s3://") else None
+        chunks = iter_parquet_batches(
+            src, args.chunk_rows, storage_options=so,
+            columns=CAT_COLS, filters=filters,
+        )
+        for df in chunks:
+            yield downcast(df)[0]
 
-    validate_train_df(df)
-    df = add_time_features(df)
 
-    # Filter aberrant rows for better RMSE
-    df = filter_aberrant(df)
+def iter_training_chunks(args, storage_options, filters, holdout=None):
+    """Stream ``(x, y)`` feature chunks over every input.
 
-    x, y, feature_cols = split_xy(df)
-    del df
-    gc.collect()
+    With *holdout*, a deterministic ``--test-size`` share of every
+    chunk is diverted to that :class:`Reservoir` instead of being
+    yielded.
+    """
+    for i_src, src in enumerate(args.input):
+        so = storage_options if src.startswith("s3://") else None
+        chunks = iter_feature_chunks(src, so, filters, args.chunk_rows)
+        for i_chunk, (x, y) in enumerate(chunks):
+            rng = np.random.default_rng([42, i_src, i_chunk])
+            test = rng.random(len(x)) < args.test_size
+            if holdout is not None:
+                holdout.add(x.loc[test].assign(total_amount=y[test]))
+            yield x.loc[~test], y.loc[~test]
 
-    cat_cols = [
-        "rate_code_id", "payment_type_id",
-        "pu_location_id", "do_location_id",
+
+def evaluate_holdout(model, args, storage_options, filters):
+    """Evaluate *model* on the ``--holdout-month`` trips, in chunks.
+
+    Returns
+    -------
+    dict
+        Output of :func:`~taxi_ml.evaluation.evaluate_chunks`.
+    """
+    start, end = holdout_range(args.holdout_month)
+    month_filters = list(filters or []) + [
+        ("tpep_pickup_datetime", ">=", start),
+        ("tpep_pickup_datetime", "<", end),
     ]
-    num_cols = [c for c in feature_cols if c not in cat_cols]
+    print(f"[TRAIN] Evaluating on {args.holdout_month} ...")
+
+    def chunks():
+        for src in args.holdout_input or args.input:
+            so = storage_options if src.startswith("s3://") else None
+            yield from iter_feature_chunks(
+                src, so, month_filters, args.eval_chunk_rows,
+            )
+
+    return evaluate_chunks(model, chunks())
+
+
+def evaluate_split(model, x_test, y_test, chunk_rows):
+    """Evaluate *model* on an in-memory split, *chunk_rows* at a time."""
+    return evaluate_chunks(model, (
+        (x_test.iloc[i:i + chunk_rows], y_test.iloc[i:i + chunk_rows])
+        for i in range(0, len(x_test), chunk_rows)
+    ))
+
+
+def try_evaluate(evaluate, *args):
+    """Call ``evaluate(*args)``, or warn and return ``None`` if empty.
+
+    An empty evaluation set (a holdout month without trips, or a
+    tiny ``--max-rows``) must not abort a run whose fit already
+    finished: the model is still saved, without evaluation metrics.
+    """
+    try:
+        return evaluate(*args)
+    except EmptyEvaluationError as exc:
+        print(f"[WARN] {exc}, evaluation metrics skipped")
+        return None
+
+
+def train_incremental(args, storage_options, filters, profiler):
+    """Fit the model out-of-core and evaluate on a held-out sample.
+
+    No sample is held out when ``--test-size`` is 0 (as with
+    ``--holdout-month``).
+
+    Returns
+    -------
+    model : sklearn.pipeline.Pipeline
+        Fitted pipeline.
+    metrics : dict
+        RMSE on the held-out sample and row counts.
+    """
+    holdout = Reservoir(args.eval_rows)
+    n_train = []
+
+    def make_chunks():
+        return iter_training_chunks(
+            args, storage_options, filters, holdout=holdout,
+        )
+
+    def make_category_frames():
+        return iter_category_chunks(args, storage_options, filters)
+
+    def on_chunk(i, n_rows):
+        n_train.append(n_rows)
+        print(f"[TRAIN] Stage {i + 1}: {n_rows:,} rows")
+
+    params = load_params(args) or {}
+    if params.pop("max_iter", None) is not None:
+        # The tree count is set per chunk by --iters-per-chunk.
+        print("[TRAIN] max_iter ignored with --incremental")
+    num_cols = [c for c in FEATURE_COLS if c not in CAT_COLS]
+    # Reading, featurizing and fitting are interleaved chunk by chunk.
+    with profiler.stage("fit") as st:
+        model = fit_incremental(
+            make_chunks, CAT_COLS, num_cols,
+            iters_per_chunk=args.iters_per_chunk, on_chunk=on_chunk,
+            make_category_frames=make_category_frames, params=params,
+        )
+        st["rows"] = sum(n_train)
 
-    x_train, x_test, y_train, y_test = train_test_split(
-        x, y, test_size=args.test_size, random_state=42,
+    metrics = {
+        "n_rows": int(sum(n_train) + holdout.n_seen),
+        "features": list(FEATURE_COLS),
+        "params": model.named_steps["model"].get_params(),
+        "training": "incremental",
+        "n_stages": len(n_train),
+    }
+    if holdout.frame is not None:
+        x_test, y_test, _ = split_xy(holdout.frame)
+        with profiler.stage("evaluate", rows=len(x_test)):
+            evaluation = try_evaluate(
+                evaluate_split, model, x_test, y_test, args.eval_chunk_rows,
+            )
+        if evaluation is not None:
+            metrics["rmse"] = evaluation["overall"]["rmse"]
+            metrics["evaluation"] = evaluation
+    return model, metrics
+
+
+def train_in_memory(args, storage_options, filters, profiler):
+    """Load every input in memory, fit, and evaluate on a split.
+
+    No split is made when ``--test-size`` is 0 (as with
+    ``--holdout-month``).
+
+    Returns
+    -------
+    model : sklearn.pipeline.Pipeline
+        Fitted pipeline.
+    metrics : dict
+        RMSE on the test split and row counts.
+    """
+    print(f"[TRAIN] Reading {len(args.input)} input(s) ...")
+    cache_stats = None
+    if args.feature_cache:
+        df, cache_stats = load_cached_features(
+            args, storage_options, filters, profiler,
+        )
+    elif args.max_rows:
+        # Sample while streaming: memory is bounded by the sample.
+        print(f"[TRAIN] Sampling {args.max_rows:,} rows")
+        with profiler.stage("sample") as st:
+            df = read_parquet_sample(
+                args.input, size=args.max_rows,
+                storage_options=storage_options,
+                columns=NEEDED_COLS, filters=filters,
+                stratify=(
+                    ("pickup_month", "pu_location_id")
+                    if args.stratify else None
+                ),
+                min_per_stratum=args.min_per_stratum,
+            )
+            st["rows"] = len(df)
+    else:
+        with profiler.stage("read") as st:
+            df = read_parquet_many(
+                args.input, storage_options=storage_options,
+                columns=NEEDED_COLS, filters=filters,
+                workers=args.io_threads,
+            )
+            st["rows"] = len(df)
+    mem_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(
+        f"[TRAIN] Total: {len(df):,} rows  "
+        f"({mem_mb:.0f} MB)"
     )
-    del x, y
-    gc.collect()
 
-    model = build_model(cat_cols, num_cols)
-    print("[TRAIN] Fitting model …")
-    model.fit(x_train, y_train)
+    if not args.feature_cache:
+        with profiler.stage("downcast", rows=len(df)):
+            df, saved = downcast(df)
+        print(
+            f"[TRAIN] Downcast: {mem_mb:.0f} MB → "
+            f"{mem_mb - saved / 1e6:.0f} MB "
+            f"(saved {saved / 1e6:.0f} MB)"
+        )
 
-    pred = model.predict(x_test)
-    score = rmse(y_test, pred)
+        # Validation and outlier filtering share one fused pass: hard
+        # constraints raise, aberrant rows are dropped for better RMSE.
+        check_schema(df, TRAIN_REQUIRED_COLS, "training")
+        with profiler.stage("features", rows=len(df)):
+            df = add_time_features(df, inplace=True)
+        with profiler.stage("validate", rows=len(df)):
+            report = validate_train_df(df, filter_rules=ABERRANT_RULES)
+        print_report(report, "Validation + outlier filter")
+        with profiler.stage("filter", rows=len(df)):
+            df = df.loc[report.mask].reset_index(drop=True)
 
+    with profiler.stage("split", rows=len(df)):
+        x, y, feature_cols = split_xy(df)
+        del df
+        gc.collect()
+
+        if args.test_size > 0:
+            x_train, x_test, y_train, y_test = train_test_split(
+                x, y, test_size=args.test_size, random_state=42,
+            )
+        else:
+            x_train, x_test, y_train, y_test = x, None, y, None
+        del x, y
+        gc.collect()
+
+    num_cols = [c for c in feature_cols if c not in CAT_COLS]
+    params = {**HGB_PARAMS, **(load_params(args) or {})}
+    model = build_model(CAT_COLS, num_cols, params=params)
+    print("[TRAIN] Fitting model …")
+    with profiler.stage("fit", rows=len(x_train)):
+        model.fit(x_train, y_train)
+
+    n_test = 0 if x_test is None else len(x_test)
     metrics = {
-        "rmse": score,
-        "n_rows": int(len(x_train) + len(x_test)),
+        "n_rows": int(len(x_train) + n_test),
         "features": feature_cols,
+        "params": params,
     }
+    if cache_stats is not None:
+        metrics["feature_cache"] = cache_stats
+    if x_test is not None:
+        with profiler.stage("evaluate", rows=n_test):
+            evaluation = try_evaluate(
+                evaluate_split, model, x_test, y_test, args.eval_chunk_rows,
+            )
+        if evaluation is not None:
+            metrics["rmse"] = evaluation["overall"]["rmse"]
+            metrics["evaluation"] = evaluation
+    return model, metrics
+
 
-    dump(model, paths.model_path)
-    with open(paths.metrics_path, "w", encoding="utf-8") as f:
-        json.dump(metrics, f, indent=2)
+def main():
+    """Entry point: read data, train, evaluate, save artifacts."""
+    args = parse_args()
+    paths = Paths()
+    profiler = StageProfiler(
+        "train", trace_memory=args.tracemalloc, cprofile=args.profile,
+    )
+    os.makedirs(paths.artifacts_dir, exist_ok=True)
+
+    storage_options = None
+    if any(p.startswith("s3://") for p in args.input):
+        storage_options = minio_storage_options(
+            args.minio_endpoint,
+            args.minio_access,
+            args.minio_secret,
+        )
+
+    # Only the needed columns and the row groups that can hold
+    # valid trips are decoded.
+    filters = trip_filters(
+        args.pickup_start, args.pickup_end, TOTAL_AMOUNT_BOUNDS,
+    )
+    train_filters = filters
+    if args.holdout_month:
+        # Every non-held-out trip is used for training.
+        args.test_size = 0.0
+        train_filters = exclude_pickup_range(
+            filters, *holdout_range(args.holdout_month),
+        )
+    if args.incremental:
+        model, metrics = train_incremental(
+            args, storage_options, train_filters, profiler,
+        )
+    else:
+        model, metrics = train_in_memory(
+            args, storage_options, train_filters, profiler,
+        )
+    if args.holdout_month:
+        with profiler.stage("evaluate") as st:
+            evaluation = try_evaluate(
+                evaluate_holdout, model, args, storage_options, filters,
+            )
+            if evaluation is not None:
+                st["rows"] = evaluation["overall"]["n"]
+        metrics["holdout_month"] = args.holdout_month
+        if evaluation is not None:
+            metrics["rmse"] = evaluation["overall"]["rmse"]
+            metrics["evaluation"] = evaluation
+
+    with profiler.stage("write"):
+        dump(model, paths.model_path)
+        n_nodes = export_compact(model, paths.compact_model_path)
+        with open(paths.metrics_path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+    extra = {}
+    if "feature_cache" in metrics:
+        extra["feature_cache"] = metrics["feature_cache"]
+    profiler.write(
+        args.run_report, inputs=args.input, n_rows=metrics["n_rows"],
+        **extra,
+    )
 
-    print(f"[TRAIN] RMSE={score:.4f}")
+    if "evaluation" in metrics:
+        overall = metrics["evaluation"]["overall"]
+        print(f"[TRAIN] RMSE={overall['rmse']:.4f}  "
+              f"MAE={overall['mae']:.4f}  "
+              f"P90 |err|={overall['p90_abs']:.2f}")
     print(f"[TRAIN] model saved -> {paths.model_path}")
+    print(f"[TRAIN] compact model ({n_nodes:,} nodes) saved -> "
+          f"{paths.compact_model_path}")
     print(f"[TRAIN] metrics saved -> {paths.metrics_path}")
+    print(profiler.summary())
+    print(f"[TRAIN] run report saved -> {args.run_report}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""Search the regressor hyper-parameters on time-based folds.
+
+The best configuration is written to ``artifacts/best_params.json``
+and can be used with ``train.py --params``.
+
+Usage
+-----
+.. code-block:: bash
+
+    python scripts/tune.py \\
+        --input s3://nyc-processed/cleaned/2024-01/ \\
+                s3://nyc-processed/cleaned/2024-02/ \\
+                s3://nyc-processed/cleaned/2024-03/ \\
+        --max-rows 3000000 --threads-per-worker 2
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from taxi_ml.config import Paths
+from taxi_ml.features import split_xy
+from taxi_ml.io import (
+    DEFAULT_IO_THREADS,
+    minio_storage_options,
+    read_parquet_many,
+    read_parquet_sample,
+    trip_filters,
+)
+from taxi_ml.training import (
+    CAT_COLS,
+    NEEDED_COLS,
+    TOTAL_AMOUNT_BOUNDS,
+    prepare_training_frame,
+)
+from taxi_ml.tuning import (
+    month_codes,
+    month_label,
+    sample_candidates,
+    successive_halving,
+    time_folds,
+    write_shared_features,
+)
+
+
+def parse_args():
+    """Parse command-line arguments.
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments.
+    """
+    p = argparse.ArgumentParser(
+        description="Tune fare-prediction hyper-parameters"
+    )
+    p.add_argument(
+        "--input", required=True, nargs="+",
+        help="Parquet paths (local or s3://) covering 2+ months.",
+    )
+    p.add_argument(
+        "--minio-endpoint",
+        default=os.getenv(
+            "MINIO_ENDPOINT", "http://localhost:9000"
+        ),
+    )
+    p.add_argument(
+        "--minio-access",
+        default=os.getenv("MINIO_ACCESS_KEY", "minio"),
+    )
+    p.add_argument(
+        "--minio-secret",
+        default=os.getenv("MINIO_SECRET_KEY", "minio123"),
+    )
+    p.add_argument(
+        "--max-rows", type=int, default=None,
+        help="Cap rows (sample stratified by pickup month).",
+    )
+    p.add_argument(
+        "--io-threads", type=int, default=DEFAULT_IO_THREADS,
+        help="Number of parquet files read concurrently.",
+    )
+    p.add_argument(
+        "--candidates", type=int, default=27,
+        help="Number of parameter sets drawn from the search space.",
+    )
+    p.add_argument(
+        "--eta", type=int, default=3,
+        help="Successive halving rate (1/eta candidates survive).",
+    )
+    p.add_argument(
+        "--folds", type=int, default=3,
+        help="Validation months (expanding-window folds).",
+    )
+    p.add_argument(
+        "--min-rows", type=int, default=20_000,
+        help="Training rows per fold in the first rung.",
+    )
+    p.add_argument(
+        "--workers", type=int, default=None,
+        help="Worker processes (default: cores / threads per worker).",
+    )
+    p.add_argument(
+        "--threads-per-worker", type=int, default=1,
+        help="OpenMP threads of each worker.",
+    )
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", default=Paths().best_params_path)
+    return p.parse_args()
+
+
+def load_features(args, storage_options):
+    """Read, validate and featurize the inputs.
+
+    Returns
+    -------
+    x : pd.DataFrame
+        Feature matrix.
+    y : pd.Series
+        Target.
+    months : np.ndarray
+        Pickup month code of every row.
+    """
+    filters = trip_filters(total_amount_range=TOTAL_AMOUNT_BOUNDS)
+    if args.max_rows:
+        df = read_parquet_sample(
+            args.input, size=args.max_rows,
+            storage_options=storage_options,
+            columns=NEEDED_COLS, filters=filters,
+            stratify=("pickup_month",), seed=args.seed,
+        )
+    else:
+        df = read_parquet_many(
+            args.input, storage_options=storage_options,
+            columns=NEEDED_COLS, filters=filters,
+            workers=args.io_threads,
+        )
+    df, _ = prepare_training_frame(df)
+    months = month_codes(df["tpep_pickup_datetime"])
+    x, y, _ = split_xy(df)
+    return x, y, months
+
+
+def main():
+    """Entry point: featurize once, search, save the best config."""
+    args = parse_args()
+
+    storage_options = None
+    if any(p.startswith("s3://") for p in args.input):
+        storage_options = minio_storage_options(
+            args.minio_endpoint,
+            args.minio_access,
+            args.minio_secret,
+        )
+
+    print(f"[TUNE] Reading {len(args.input)} input(s) ...")
+    x, y, months = load_features(args, storage_options)
+    folds = time_folds(months, args.folds)
+    max_rows = max(
+        int(sum((months == m).sum() for m in train)) for train, _ in folds
+    )
+    print(f"[TUNE] {len(x):,} rows, {len(folds)} fold(s): " + ", ".join(
+        f"{month_label(train[0])}..{month_label(train[-1])} → "
+        f"{month_label(valid)}" for train, valid in folds
+    ))
+
+    candidates = sample_candidates(n=args.candidates, seed=args.seed)
+    work_dir = tempfile.mkdtemp(prefix="taxi_tune_")
+    try:
+        write_shared_features(work_dir, x, y, months)
+        del x, y
+        t0 = time.perf_counter()
+        result = successive_halving(
+            work_dir, candidates, folds, CAT_COLS,
+            max_rows=max_rows, min_rows=args.min_rows, eta=args.eta,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    result["seconds"] = time.perf_counter() - t0
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"[TUNE] Best RMSE={result['rmse']:.4f} with {result['params']}")
+    print(f"[TUNE] saved -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
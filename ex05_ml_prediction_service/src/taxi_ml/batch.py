@@ -0,0 +1,246 @@
+"""Batch prediction, sequential or sharded over a process pool.
+
+The inputs are cut into shards of consecutive row groups of one
+parquet file (:func:`plan_shards`), so that a month of a few large
+Spark part files still spreads over every core. Each worker process
+loads the model once (a memory-mapped ``.npz`` artifact is shared
+by all workers through the page cache), streams its shard in
+bounded batches through validation, features and prediction, and
+writes its own ``part-<shard>.parquet`` file in every month
+partition: workers never share a file and nothing is sent back but
+row counts and stage timings.
+
+Worker memory is bounded by ``batch_rows``; the parent keeps at
+most a few shards per worker in flight, so the task queue stays
+small however many files are backfilled.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+from taxi_ml.artifact import load_model
+from taxi_ml.features import add_time_features, split_xy
+from taxi_ml.io import (
+    iter_parquet_batches,
+    list_parquet_files,
+    parquet_row_groups,
+)
+from taxi_ml.output import KEY_COLS, ParquetPredictionWriter, prediction_table
+from taxi_ml.profiling import StageProfiler
+from taxi_ml.validate import INFER_REQUIRED_COLS, validate_infer_df
+
+#: Columns read from the inputs.
+PREDICT_COLS = list(dict.fromkeys(INFER_REQUIRED_COLS + KEY_COLS))
+
+#: Target number of rows per shard.
+DEFAULT_SHARD_ROWS = 4_000_000
+
+#: State of a pool worker, set by :func:`_init_worker`.
+_WORKER = {}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Consecutive row groups of one parquet file."""
+
+    index: int
+    source_file: str
+    row_groups: tuple
+    first_row: int
+    n_rows: int
+
+
+def plan_shards(paths, storage_options=None,
+                shard_rows=DEFAULT_SHARD_ROWS) -> list:
+    """Cut the input files into shards of about *shard_rows* rows.
+
+    Row groups are never split, so a shard holds at least one row
+    group even when it is larger than *shard_rows*.
+
+    Parameters
+    ----------
+    paths : list of str
+        Parquet files or directories (local or ``s3://``).
+    storage_options : dict or None
+        s3fs credentials, used for ``s3://`` inputs only.
+    shard_rows : int
+        Target rows per shard.
+
+    Returns
+    -------
+    list of Shard
+        Shards in input order.
+    """
+    shards = []
+    for src in paths:
+        so = storage_options if src.startswith("s3://") else None
+        scheme = "s3://" if so is not None else ""
+        for part in list_parquet_files(src, so):
+            source_file = scheme + part
+            groups, first, n, offset = [], 0, 0, 0
+            for i, rows in enumerate(parquet_row_groups(source_file, so)):
+                if groups and n + rows > shard_rows:
+                    shards.append(Shard(len(shards), source_file,
+                                        tuple(groups), first, n))
+                    groups, first, n = [], offset, 0
+                groups.append(i)
+                n += rows
+                offset += rows
+            if groups:
+                shards.append(Shard(len(shards), source_file,
+                                    tuple(groups), first, n))
+    return shards
+
+
+def predict_batch(model, chunk, source_file, first_row, writer,
+                  profiler) -> int:
+    """Validate, featurize, predict and write one input batch.
+
+    Parameters
+    ----------
+    model : object
+        Trained model with a ``predict`` method.
+    chunk : pd.DataFrame
+        Input rows with :data:`PREDICT_COLS`.
+    source_file : str
+        Input file of the batch.
+    first_row : int
+        Row index of the first row of *chunk* in *source_file*.
+    writer : ParquetPredictionWriter or CsvPredictionWriter
+        Output the predictions are appended to.
+    profiler : StageProfiler
+        Receives the stage timings.
+
+    Returns
+    -------
+    int
+        Number of rows predicted.
+    """
+    with profiler.stage("validate", rows=len(chunk)):
+        validate_infer_df(chunk)
+    with profiler.stage("features", rows=len(chunk)):
+        x, _, _ = split_xy(add_time_features(chunk))
+    with profiler.stage("predict", rows=len(x)):
+        preds = model.predict(x)
+    with profiler.stage("write", rows=len(preds)):
+        writer.write(prediction_table(
+            chunk, preds, source_file, first_row,
+        ))
+    return len(preds)
+
+
+def _init_worker(model_path, n_threads):
+    """Pool initializer: cap OpenMP threads and load the model once."""
+    from threadpoolctl import threadpool_limits
+
+    os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    # Kept alive for the lifetime of the worker.
+    _WORKER["limits"] = threadpool_limits(limits=n_threads)
+    _WORKER["profiler"] = StageProfiler("predict-worker", log=None)
+    with _WORKER["profiler"].stage("load_model"):
+        _WORKER["model"] = load_model(model_path, mmap=True)
+
+
+def predict_shard(shard, output, storage_options=None,
+                  compression="zstd", batch_rows=1_000_000) -> dict:
+    """Predict one shard in a worker (see :func:`_init_worker`).
+
+    Returns
+    -------
+    dict
+        ``index``, ``n_rows``, written ``files`` and the stage
+        ``records`` of the worker since its previous shard.
+    """
+    profiler = _WORKER["profiler"]
+    model = _WORKER["model"]
+    so = storage_options if shard.source_file.startswith("s3://") else None
+    out_so = storage_options if output.startswith("s3://") else None
+    first_row = shard.first_row
+    batches = iter_parquet_batches(
+        shard.source_file, batch_rows, storage_options=so,
+        columns=PREDICT_COLS, row_groups=shard.row_groups,
+    )
+    with ParquetPredictionWriter(
+        output, out_so, compression=compression,
+        part_name=f"part-{shard.index:05d}",
+    ) as writer:
+        while True:
+            with profiler.stage("read") as st:
+                chunk = next(batches, None)
+                st["rows"] = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            first_row += predict_batch(
+                model, chunk, shard.source_file, first_row, writer,
+                profiler,
+            )
+        files = writer.files
+    records, profiler.records = profiler.records, []
+    return {
+        "index": shard.index,
+        "n_rows": writer.n_rows,
+        "files": files,
+        "records": records,
+    }
+
+
+def run_shards(shards, model_path, output, workers, storage_options=None,
+               compression="zstd", batch_rows=1_000_000,
+               threads_per_worker=1, max_pending=None):
+    """Predict *shards* in a pool of *workers* processes.
+
+    The output partitions must have been cleared beforehand (see
+    :func:`~taxi_ml.output.clear_output`).
+
+    Parameters
+    ----------
+    shards : list of Shard
+        Work items, see :func:`plan_shards`.
+    model_path : str
+        Model artifact, loaded once per worker.
+    output : str
+        Parquet output directory (local or ``s3://``).
+    workers : int
+        Number of processes.
+    storage_options : dict or None
+        s3fs credentials for ``s3://`` inputs and output.
+    compression : str
+        Parquet codec.
+    batch_rows : int
+        Rows decoded and predicted at a time by a worker.
+    threads_per_worker : int
+        OpenMP / BLAS threads per worker.
+    max_pending : int or None
+        Shards submitted but not finished (default: two per
+        worker, so that no worker idles between shards).
+
+    Yields
+    ------
+    dict
+        Result of :func:`predict_shard`, in completion order.
+    """
+    max_pending = max_pending or 2 * workers
+    todo = iter(shards)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path, threads_per_worker),
+    )
+    with pool:
+        pending = set()
+        while True:
+            for shard in todo:
+                pending.add(pool.submit(
+                    predict_shard, shard, output, storage_options,
+                    compression, batch_rows,
+                ))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
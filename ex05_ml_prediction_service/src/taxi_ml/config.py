@@ -38,10 +38,26 @@ class Paths:
         Directory for all artifacts.
     model_path : str
         Path to the serialized model.
+    compact_model_path : str
+        Path to the compact NumPy artifact of the model (see
+        :mod:`taxi_ml.artifact`).
     metrics_path : str
         Path to the JSON metrics file.
+    best_params_path : str
+        Path to the best hyper-parameters found by
+        ``scripts/tune.py``.
+    train_report_path : str
+        Path to the stage profile of the last ``scripts/train.py`` run
+        (see :mod:`taxi_ml.profiling`).
+    predict_report_path : str
+        Path to the stage profile of the last ``scripts/predict.py``
+        run.
     """
 
     artifacts_dir: str = "artifacts"
     model_path: str = "artifacts/model.joblib"
+    compact_model_path: str = "artifacts/model.npz"
     metrics_path: str = "artifacts/metrics.json"
+    best_params_path: str = "artifacts/best_params.json"
+    train_report_path: str = "artifacts/run_report_train.json"
+    predict_report_path: str = "artifacts/run_report_predict.json"
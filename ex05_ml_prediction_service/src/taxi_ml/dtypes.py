@@ -0,0 +1,96 @@
+"""Compact dtypes for taxi trip frames.
+
+Maps every known column to the smallest dtype that holds its
+domain (e.g. 265 location IDs fit in ``uint16``), so that
+multi-month training frames fit in a fraction of the memory
+pandas' default int64/float64 columns need.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+#: Target dtype of every known column. Integer targets fall back
+#: to ``float32`` when the column holds missing values.
+COMPACT_DTYPES = {
+    "vendor_id": "uint8",
+    "passenger_count": "uint8",
+    "rate_code_id": "uint8",
+    "payment_type_id": "uint8",
+    "pu_location_id": "uint16",
+    "do_location_id": "uint16",
+    "pickup_hour": "uint8",
+    "pickup_dayofweek": "uint8",
+    "pickup_day": "uint8",
+    "trip_distance": "float32",
+    "trip_duration_min": "float32",
+    "fare_amount": "float32",
+    "extra": "float32",
+    "mta_tax": "float32",
+    "tip_amount": "float32",
+    "tolls_amount": "float32",
+    "improvement_surcharge": "float32",
+    "congestion_surcharge": "float32",
+    "airport_fee": "float32",
+    "cbd_congestion_fee": "float32",
+    "total_amount": "float32",
+}
+
+
+def _safe_dtype(values: pd.Series, target):
+    """Return the dtype *values* can be cast to without loss.
+
+    Returns ``None`` when the column must be left untouched
+    (non-numeric, out of range or non-integral values).
+    """
+    target = np.dtype(target)
+    if (not pd.api.types.is_numeric_dtype(values.dtype)
+            or values.dtype.kind == "b"):
+        return None
+    if target.kind == "f":
+        return target
+    has_nan = bool(values.isna().any())
+    if has_nan:
+        return np.dtype("float32")
+    if len(values) == 0:
+        return target
+    info = np.iinfo(target)
+    lo, hi = values.min(), values.max()
+    if lo < info.min or hi > info.max:
+        return None
+    if values.dtype.kind == "f" and not (values % 1 == 0).all():
+        return None
+    return target
+
+
+def downcast(df: pd.DataFrame, dtypes=None):
+    """Cast known columns to their compact dtype, in place.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Frame to shrink; columns not in *dtypes* are left as is.
+        The frame is modified in place to avoid a full copy.
+    dtypes : dict or None
+        Column → target dtype mapping (defaults to
+        :data:`COMPACT_DTYPES`).
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The same frame, with compact columns.
+    saved_bytes : int
+        Memory released by the cast.
+    """
+    dtypes = COMPACT_DTYPES if dtypes is None else dtypes
+    saved = 0
+    for col, target in dtypes.items():
+        if col not in df.columns:
+            continue
+        dtype = _safe_dtype(df[col], target)
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        before = df[col].memory_usage(index=False)
+        df[col] = df[col].astype(dtype)
+        saved += before - df[col].memory_usage(index=False)
+    return df, int(saved)
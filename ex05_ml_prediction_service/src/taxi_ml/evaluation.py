@@ -0,0 +1,210 @@
+"""Streaming evaluation of fare predictions.
+
+A held-out month is evaluated chunk by chunk: each chunk is
+predicted, folded into running sums and absolute-error histograms,
+then dropped, so memory does not grow with the number of rows.
+Errors are broken down by pickup zone, pickup hour and distance
+bucket (the buckets of the dashboard, see ex04).
+"""
+
+import numpy as np
+
+#: Upper edges (miles, exclusive as in ``ex03/rollups.sql``) of the
+#: distance buckets; the last bucket is open-ended.
+DISTANCE_EDGES = [1, 3, 5, 10, 20]
+
+#: Labels of the distance buckets.
+DISTANCE_LABELS = [
+    "0-1 mi", "1-3 mi", "3-5 mi", "5-10 mi", "10-20 mi", "20+ mi",
+]
+
+#: Upper edge (dollars) of the first absolute-error histogram bin.
+ERROR_MIN = 0.01
+
+#: Ratio between consecutive bin edges: quantiles are accurate to
+#: 2 % above :data:`ERROR_MIN`.
+ERROR_GROWTH = 1.02
+
+#: Number of histogram bins (up to ~$1,400); larger errors share an
+#: overflow bin.
+N_ERROR_BINS = 600
+
+#: Quantiles of the absolute error reported per group.
+QUANTILES = (0.5, 0.9, 0.99)
+
+#: Number of ``pu_location_id`` groups (0 holds unknown zones).
+N_ZONES = 266
+
+
+class EmptyEvaluationError(ValueError):
+    """Raised when there is no row to evaluate."""
+
+
+class GroupedErrors:
+    """Running error statistics for integer-coded groups.
+
+    Parameters
+    ----------
+    n_groups : int
+        Number of groups; codes must lie in ``[0, n_groups)``.
+    n_bins : int
+        Number of log-spaced histogram bins before the overflow bin.
+    """
+
+    def __init__(self, n_groups, n_bins=N_ERROR_BINS):
+        self.n_bins = n_bins
+        self.edges = ERROR_MIN * ERROR_GROWTH ** np.arange(n_bins)
+        self.count = np.zeros(n_groups, dtype=np.int64)
+        self.sum_err = np.zeros(n_groups)
+        self.sum_sq = np.zeros(n_groups)
+        self.sum_abs = np.zeros(n_groups)
+        self.hist = np.zeros((n_groups, n_bins + 1), dtype=np.int64)
+
+    def update(self, groups, err) -> None:
+        """Add signed errors ``prediction - truth`` of coded rows."""
+        groups = np.asarray(groups, dtype=np.int64)
+        err = np.asarray(err, dtype=np.float64)
+        n = len(self.count)
+        abs_err = np.abs(err)
+        self.count += np.bincount(groups, minlength=n)
+        self.sum_err += np.bincount(groups, weights=err, minlength=n)
+        self.sum_sq += np.bincount(groups, weights=err * err, minlength=n)
+        self.sum_abs += np.bincount(groups, weights=abs_err, minlength=n)
+        bins = np.searchsorted(self.edges, abs_err)
+        flat = groups * (self.n_bins + 1) + bins
+        self.hist += np.bincount(
+            flat, minlength=self.hist.size,
+        ).reshape(self.hist.shape)
+
+    def quantiles(self, qs=QUANTILES) -> np.ndarray:
+        """Absolute-error quantiles of every group.
+
+        Returns
+        -------
+        np.ndarray of shape (n_groups, len(qs))
+            Upper edge of the bin holding each quantile, capped at
+            the last edge (``nan`` for empty groups).
+        """
+        cum = self.hist.cumsum(axis=1)
+        out = np.full((len(self.count), len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            target = np.ceil(q * self.count)[:, None]
+            idx = (cum < target).sum(axis=1)
+            out[:, j] = self.edges[np.minimum(idx, self.n_bins - 1)]
+        out[self.count == 0] = np.nan
+        return out
+
+    def summary(self, labels=None, min_count=1) -> dict:
+        """Metrics of every group with at least *min_count* rows.
+
+        Parameters
+        ----------
+        labels : list of str or None
+            Name of each group code (default: the code itself).
+        min_count : int
+            Groups with fewer rows are omitted.
+
+        Returns
+        -------
+        dict
+            Label → ``n``, ``rmse``, ``mae``, ``bias`` and
+            ``p50_abs`` / ``p90_abs`` / ``p99_abs``.
+        """
+        quantiles = self.quantiles()
+        out = {}
+        for g in np.flatnonzero(self.count >= max(min_count, 1)):
+            n = int(self.count[g])
+            stats = {
+                "n": n,
+                "rmse": float(np.sqrt(self.sum_sq[g] / n)),
+                "mae": float(self.sum_abs[g] / n),
+                "bias": float(self.sum_err[g] / n),
+            }
+            for q, value in zip(QUANTILES, quantiles[g]):
+                stats[f"p{round(q * 100)}_abs"] = round(float(value), 4)
+            out[labels[g] if labels else str(g)] = stats
+        return out
+
+
+def distance_bucket(trip_distance) -> np.ndarray:
+    """Code of the :data:`DISTANCE_LABELS` bucket of each distance."""
+    return np.searchsorted(
+        DISTANCE_EDGES, np.asarray(trip_distance, dtype=np.float64),
+        side="right",
+    )
+
+
+class StreamingEvaluator:
+    """Accumulate overall and per-group errors over chunks.
+
+    Chunks must carry the ``pu_location_id``, ``pickup_hour`` and
+    ``trip_distance`` features (see
+    :func:`~taxi_ml.features.split_xy`).
+    """
+
+    def __init__(self):
+        self.overall = GroupedErrors(1)
+        self.by_zone = GroupedErrors(N_ZONES)
+        self.by_hour = GroupedErrors(24)
+        self.by_distance = GroupedErrors(len(DISTANCE_LABELS))
+
+    def update(self, x, y_true, y_pred) -> None:
+        """Fold one chunk of features, targets and predictions."""
+        err = (np.asarray(y_pred, dtype=np.float64)
+               - np.asarray(y_true, dtype=np.float64))
+        zone = np.nan_to_num(
+            np.asarray(x["pu_location_id"], dtype=np.float64), nan=0,
+        ).astype(np.int64)
+        zone[(zone < 0) | (zone >= N_ZONES)] = 0
+        hour = np.clip(np.nan_to_num(
+            np.asarray(x["pickup_hour"], dtype=np.float64),
+        ), 0, 23).astype(np.int64)
+        self.overall.update(np.zeros(len(err), dtype=np.int64), err)
+        self.by_zone.update(zone, err)
+        self.by_hour.update(hour, err)
+        self.by_distance.update(distance_bucket(x["trip_distance"]), err)
+
+    def result(self, min_zone_count=1) -> dict:
+        """Return the metrics accumulated so far.
+
+        Parameters
+        ----------
+        min_zone_count : int
+            Pickup zones with fewer rows are left out.
+
+        Returns
+        -------
+        dict
+            ``overall`` metrics and ``by_pu_location_id``,
+            ``by_pickup_hour``, ``by_distance_bucket`` breakdowns.
+        """
+        zone_labels = ["unknown"] + [str(z) for z in range(1, N_ZONES)]
+        return {
+            "overall": self.overall.summary(["all"])["all"],
+            "by_pu_location_id": self.by_zone.summary(
+                zone_labels, min_zone_count,
+            ),
+            "by_pickup_hour": self.by_hour.summary(),
+            "by_distance_bucket": self.by_distance.summary(
+                DISTANCE_LABELS,
+            ),
+        }
+
+
+def evaluate_chunks(model, chunks, min_zone_count=1) -> dict:
+    """Evaluate *model* on an iterable of ``(x, y)`` chunks.
+
+    Only one chunk and its predictions are alive at a time.
+
+    Raises
+    ------
+    EmptyEvaluationError
+        If the chunks hold no rows.
+    """
+    evaluator = StreamingEvaluator()
+    for x, y in chunks:
+        if len(x):
+            evaluator.update(x, y, model.predict(x))
+    if evaluator.overall.count[0] == 0:
+        raise EmptyEvaluationError("no rows to evaluate")
+    return evaluator.result(min_zone_count)
@@ -0,0 +1,216 @@
+"""Local on-disk cache of engineered training features.
+
+Reading cleaned parquet, parsing datetimes, computing
+:func:`~taxi_ml.features.add_time_features` and filtering outliers
+dominates short training runs, yet its output only changes when the
+input files, the feature code or the filter thresholds change.
+:class:`FeatureStore` keeps that output — the
+:data:`~taxi_ml.features.FEATURE_COLS` plus the target — as one
+parquet file per input, named after a hash of all three, and
+evicts the least recently used files beyond a disk budget.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+import pandas as pd
+
+from taxi_ml.io import (
+    _resolve_filesystem,
+    iter_parquet_batches,
+    list_parquet_files,
+)
+
+#: Default disk budget of a :class:`FeatureStore`, in bytes.
+DEFAULT_BUDGET_BYTES = 5 * 1024 ** 3
+
+
+def source_fingerprint(path, storage_options=None) -> list:
+    """Identify the content of a parquet input without reading it.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://`` URI (file or prefix).
+    storage_options : dict or None
+        Credentials dict for s3fs.
+
+    Returns
+    -------
+    list of list
+        ``[file, size, version]`` for every part file, sorted;
+        *version* is the ETag on S3 and the modification time
+        locally.
+    """
+    fs, _ = _resolve_filesystem(path, storage_options)
+    fingerprint = []
+    for file in sorted(list_parquet_files(path, storage_options)):
+        if fs is None:
+            st = os.stat(file)
+            fingerprint.append([file, st.st_size, st.st_mtime_ns])
+        else:
+            info = fs.info(file)
+            version = info.get("ETag") or info.get("LastModified")
+            fingerprint.append([file, info["size"], str(version)])
+    return fingerprint
+
+
+def feature_key(fingerprint, **params) -> str:
+    """Hash an input fingerprint and the parameters of its features.
+
+    Parameters
+    ----------
+    fingerprint : list
+        Output of :func:`source_fingerprint`.
+    **params
+        Anything else the features depend on (feature version,
+        filter thresholds, pushdown filters...); values must be
+        JSON-serializable or have a stable ``str``.
+
+    Returns
+    -------
+    str
+        Hex digest used as the cache entry name.
+    """
+    payload = json.dumps(
+        {"source": fingerprint, **params}, sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class FeatureStore:
+    """Directory of feature files with LRU eviction by disk budget.
+
+    The modification time of an entry is its last use: it is set
+    when the entry is written and refreshed on every hit.
+
+    Parameters
+    ----------
+    root : str
+        Cache directory (created if needed).
+    budget_bytes : int
+        Maximum total size of the entries.
+    """
+
+    def __init__(self, root, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key) -> str:
+        """File holding the entry *key*."""
+        return os.path.join(self.root, f"{key}.parquet")
+
+    def get(self, key):
+        """Return the cached frame of *key*, or ``None`` on a miss."""
+        path = self.path(key)
+        try:
+            frame = pd.read_parquet(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return frame
+
+    def get_batches(self, key, batch_rows):
+        """Stream the cached frame of *key* in batches.
+
+        Returns
+        -------
+        iterator of pd.DataFrame or None
+            Batches of at most *batch_rows* rows, or ``None`` on a
+            miss.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return iter_parquet_batches(path, batch_rows)
+
+    def stats(self) -> dict:
+        """Entries read from the cache (hits) and built (misses)."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def put(self, key, frame: pd.DataFrame) -> str:
+        """Store *frame* under *key*, then evict down to the budget.
+
+        The file is written under a temporary name and renamed, so
+        that concurrent readers never see a partial entry.
+        """
+        path = self.path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        self.evict(keep=key)
+        return path
+
+    def entries(self) -> list:
+        """Return ``(key, size, last_use)`` of every entry, oldest first."""
+        out = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".parquet"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.root, name))
+            except FileNotFoundError:  # evicted concurrently
+                continue
+            out.append((name[:-len(".parquet")], st.st_size, st.st_mtime))
+        return sorted(out, key=lambda e: e[2])
+
+    def evict(self, keep=None) -> int:
+        """Remove least recently used entries beyond the budget.
+
+        Parameters
+        ----------
+        keep : str or None
+            Entry never removed (the one just written).
+
+        Returns
+        -------
+        int
+            Number of entries removed.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for key, size, _ in entries:
+            if total <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def get_or_build(self, key, build):
+        """Return the entry *key*, computing it with ``build()`` on a miss.
+
+        Returns
+        -------
+        frame : pd.DataFrame
+            Cached or freshly built features.
+        hit : bool
+            Whether the entry came from the cache.
+        """
+        frame = self.get(key)
+        if frame is not None:
+            return frame, True
+        frame = build()
+        self.put(key, frame)
+        return frame, False
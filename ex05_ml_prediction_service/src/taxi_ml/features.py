@@ -4,45 +4,172 @@ Extracts time-based features from raw datetime columns
 and provides train/infer feature splitting.
 """
 
+import numpy as np
 import pandas as pd
 
+from taxi_ml.dtypes import COMPACT_DTYPES
 
-def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
+#: Version of the feature code. Bump it whenever
+#: :func:`add_time_features` or :func:`split_xy` output changes, so
+#: that cached features (see :mod:`taxi_ml.feature_store`) are
+#: rebuilt.
+FEATURES_VERSION = 1
+
+#: Columns created by :func:`add_time_features`.
+TIME_FEATURES = [
+    "trip_duration_min",
+    "pickup_hour",
+    "pickup_dayofweek",
+    "pickup_day",
+]
+
+#: Model input columns, in the order produced by :func:`split_xy`.
+FEATURE_COLS = [
+    "passenger_count",
+    "trip_distance",
+    "trip_duration_min",
+    "pickup_hour",
+    "pickup_dayofweek",
+    "pickup_day",
+    "rate_code_id",
+    "payment_type_id",
+    "pu_location_id",
+    "do_location_id",
+]
+
+_NAT = np.iinfo(np.int64).min
+_SECONDS_PER_DAY = 86400
+
+
+def _as_datetime(col: pd.Series) -> pd.Series:
+    """Return *col* as naive datetime64, parsing only if needed."""
+    if isinstance(col.dtype, pd.DatetimeTZDtype):
+        return col.dt.tz_localize(None)
+    if pd.api.types.is_datetime64_dtype(col.dtype):
+        return col
+    return _as_datetime(pd.to_datetime(col))
+
+
+def _ticks(col: pd.Series, unit=None):
+    """Return the int64 epoch ticks of a datetime column.
+
+    Parameters
+    ----------
+    col : pd.Series
+        Naive datetime64 column.
+    unit : str or None
+        Convert to this resolution first (``None`` keeps the
+        column's own resolution, without copying).
+
+    Returns
+    -------
+    ticks : np.ndarray
+        int64 view of the timestamps (``NaT`` is int64 min).
+    unit : str
+        Resolution of *ticks* (``"ns"``, ``"us"``, ...).
+    """
+    values = col.to_numpy()
+    if unit is not None and np.datetime_data(values.dtype)[0] != unit:
+        values = values.astype(f"datetime64[{unit}]")
+    return values.view("int64"), np.datetime_data(values.dtype)[0]
+
+
+def _day_of_month(days: np.ndarray) -> np.ndarray:
+    """Day of month of days since 1970-01-01 (proleptic Gregorian).
+
+    Integer-only civil-from-days conversion (H. Hinnant), applied
+    to whole int32 arrays with in-place operations to keep the
+    number of temporaries low.
+    """
+    z = days + np.int32(719468)
+    era = z // 146097
+    z -= era * 146097                      # day of era
+    del era
+    yoe = z - z // 1460
+    yoe += z // 36524
+    yoe -= z // 146096
+    yoe //= 365                            # year of era
+    z -= 365 * yoe
+    z -= yoe // 4
+    z += yoe // 100                        # day of year (from March)
+    del yoe
+    mp = 5 * z + 2
+    mp //= 153
+    mp *= 153
+    mp += 2
+    mp //= 5
+    z -= mp
+    z += 1
+    return z
+
+
+def add_time_features(df: pd.DataFrame, inplace=False) -> pd.DataFrame:
     """Create time features from pickup/dropoff datetimes.
 
     Computes trip duration in minutes, hour of day, day of week,
-    and day of month from the pickup timestamp.
+    and day of month from the pickup timestamp. All features are
+    derived with integer NumPy arithmetic on the epoch
+    representation of the timestamps; columns that already are
+    datetime64 are not re-parsed.
 
     Parameters
     ----------
     df : pd.DataFrame
         DataFrame with ``tpep_pickup_datetime`` and
         ``tpep_dropoff_datetime`` columns.
+    inplace : bool
+        Add the columns to *df* itself. Otherwise a shallow copy
+        is returned: existing columns are shared, never copied.
 
     Returns
     -------
     pd.DataFrame
-        Copy of *df* with added columns:
+        *df* (or a shallow copy) with added columns:
         ``trip_duration_min``, ``pickup_hour``,
-        ``pickup_dayofweek``, ``pickup_day``.
+        ``pickup_dayofweek``, ``pickup_day``, stored with
+        their compact dtype (see :data:`~taxi_ml.dtypes.COMPACT_DTYPES`).
+        Missing timestamps give ``NaN`` features.
     """
-    out = df.copy()
-    out["tpep_pickup_datetime"] = pd.to_datetime(
-        out["tpep_pickup_datetime"]
-    )
-    out["tpep_dropoff_datetime"] = pd.to_datetime(
-        out["tpep_dropoff_datetime"]
-    )
+    out = df if inplace else df.copy(deep=False)
+    for col in ("tpep_pickup_datetime", "tpep_dropoff_datetime"):
+        parsed = _as_datetime(out[col])
+        if parsed.dtype != out[col].dtype:
+            out[col] = parsed
+
+    pickup, unit = _ticks(out["tpep_pickup_datetime"])
+    dropoff, _ = _ticks(out["tpep_dropoff_datetime"], unit)
+    missing = pickup == _NAT
+    ticks_per_sec = np.timedelta64(1, "s") // np.timedelta64(1, unit)
 
-    duration = (
-        out["tpep_dropoff_datetime"] - out["tpep_pickup_datetime"]
-    ).dt.total_seconds()
-    out["trip_duration_min"] = (duration / 60.0).clip(lower=0)
+    duration = np.subtract(dropoff, pickup).astype(np.float32)
+    duration *= np.float32(1.0 / (60.0 * ticks_per_sec))
+    np.maximum(duration, 0, out=duration)
+    duration[missing | (dropoff == _NAT)] = np.nan
+    out["trip_duration_min"] = duration
+    del duration
 
-    out["pickup_hour"] = out["tpep_pickup_datetime"].dt.hour
-    out["pickup_dayofweek"] = out["tpep_pickup_datetime"].dt.dayofweek
-    out["pickup_day"] = out["tpep_pickup_datetime"].dt.day
+    seconds = pickup // ticks_per_sec
+    days = (seconds // _SECONDS_PER_DAY).astype(np.int32)
+    np.remainder(seconds, _SECONDS_PER_DAY, out=seconds)
+    seconds //= 3600
+    dayofweek = days + np.int32(3)         # 1970-01-01 was a Thursday
+    dayofweek %= 7
+    features = {
+        "pickup_hour": seconds,
+        "pickup_dayofweek": dayofweek,
+        "pickup_day": _day_of_month(days),
+    }
+    del seconds, days, dayofweek
 
+    has_missing = bool(missing.any())
+    for name in TIME_FEATURES[1:]:
+        values = features.pop(name)
+        if has_missing:
+            values = values.astype(np.float32)
+            values[missing] = np.nan
+        else:
+            values = values.astype(COMPACT_DTYPES[name])
+        out[name] = values
     return out
 
 
@@ -64,18 +191,7 @@ def split_xy(df: pd.DataFrame):
     feature_cols : list of str
         Names of the feature columns used.
     """
-    feature_cols = [
-        "passenger_count",
-        "trip_distance",
-        "trip_duration_min",
-        "pickup_hour",
-        "pickup_dayofweek",
-        "pickup_day",
-        "rate_code_id",
-        "payment_type_id",
-        "pu_location_id",
-        "do_location_id",
-    ]
+    feature_cols = list(FEATURE_COLS)
     x = df[feature_cols].copy()
     y = (
         df["total_amount"].copy()
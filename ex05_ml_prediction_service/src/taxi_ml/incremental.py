@@ -0,0 +1,109 @@
+"""Out-of-core training over a stream of feature chunks.
+
+Two passes go over the data: a cheap one that only collects the
+exact category sets (it can read just the categorical columns),
+then a training pass that fits the imputers on a bounded sample of
+the first chunk and grows a
+:class:`~taxi_ml.model.StagedBoostingRegressor` one stage per
+chunk. Only one chunk is held in memory at a time, and the result
+is a regular :class:`~sklearn.pipeline.Pipeline`.
+"""
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from taxi_ml.model import StagedBoostingRegressor, build_model
+
+
+def learn_categories(frames, categorical_cols):
+    """First pass: exact category sets.
+
+    Parameters
+    ----------
+    frames : iterable of pd.DataFrame
+        Chunks holding at least *categorical_cols*; the other
+        columns are not needed, so callers can read only these.
+    categorical_cols : list of str
+        Categorical columns whose values are collected exactly.
+
+    Returns
+    -------
+    list of np.ndarray
+        Sorted non-missing values of each categorical column.
+    """
+    seen = {c: None for c in categorical_cols}
+    for df in frames:
+        for col in categorical_cols:
+            values = np.unique(df[col].dropna().to_numpy())
+            seen[col] = values if seen[col] is None \
+                else np.union1d(seen[col], values)
+    if any(v is None for v in seen.values()):
+        raise ValueError("No training rows in input")
+    return [seen[c] for c in categorical_cols]
+
+
+def fit_incremental(make_chunks, categorical_cols, numeric_cols,
+                    iters_per_chunk=50, stats_rows=1_000_000,
+                    seed=42, on_chunk=None,
+                    make_category_frames=None, params=None) -> Pipeline:
+    """Train the fare pipeline chunk by chunk.
+
+    Parameters
+    ----------
+    make_chunks : callable
+        Returns a fresh iterable of ``(x, y)`` chunks.
+    categorical_cols : list of str
+        Column names to treat as categorical.
+    numeric_cols : list of str
+        Column names to treat as numeric.
+    iters_per_chunk : int
+        Boosting iterations added per chunk.
+    stats_rows : int
+        Rows of the first training chunk sampled to fit the
+        imputers.
+    seed : int
+        Random seed.
+    on_chunk : callable or None
+        Called as ``on_chunk(index, n_rows)`` after each stage.
+    make_category_frames : callable or None
+        Returns an iterable of frames holding the categorical
+        columns, for the category pass. Defaults to the ``x`` of
+        *make_chunks*, which then runs twice.
+    params : dict or None
+        Hyper-parameters of the
+        :class:`~taxi_ml.model.StagedBoostingRegressor` (e.g. tuned
+        ``max_depth``, ``l2_regularization``), overriding its
+        defaults.
+
+    Returns
+    -------
+    sklearn.pipeline.Pipeline
+        Fitted ``preprocess`` + ``model`` pipeline, usable like the
+        one of :func:`~taxi_ml.model.build_model`.
+    """
+    frames = (
+        (x for x, _ in make_chunks()) if make_category_frames is None
+        else make_category_frames()
+    )
+    categories = learn_categories(frames, categorical_cols)
+    pre = build_model(
+        categorical_cols, numeric_cols, categories=categories,
+    ).named_steps["preprocess"]
+
+    reg = StagedBoostingRegressor(**{
+        "iters_per_stage": iters_per_chunk, "random_state": seed,
+        **(params or {}),
+    })
+    fitted = False
+    for i, (x, y) in enumerate(make_chunks()):
+        if not fitted:
+            if not len(x):
+                continue
+            pre.fit(x.sample(n=min(stats_rows, len(x)), random_state=seed))
+            fitted = True
+        reg.partial_fit(pre.transform(x), y)
+        if on_chunk is not None:
+            on_chunk(i, len(x))
+    if not fitted:
+        raise ValueError("No training rows in input")
+    return Pipeline(steps=[("preprocess", pre), ("model", reg)])
@@ -5,7 +5,20 @@ with automatic column renaming from NYC TLC conventions.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from taxi_ml.sampling import (
+    Reservoir,
+    StratifiedReservoir,
+    allocate,
+    stratum_codes,
+)
 
 
 #: Mapping from original NYC TLC column names to snake_case.
@@ -18,12 +31,23 @@ _COL_RENAME = {
     "Airport_fee": "airport_fee",
 }
 
+#: Default number of files read concurrently by
+#: :func:`read_parquet_many`.
+DEFAULT_IO_THREADS = 8
+
+#: Reverse mapping, used to push snake_case names down to the file.
+_COL_ORIGINAL = {v: k for k, v in _COL_RENAME.items()}
+
 
-def read_parquet_any(path, storage_options=None):
+def read_parquet_any(path, storage_options=None, columns=None,
+                     filters=None):
     """Read a parquet file from a local or S3-compatible path.
 
     Automatically renames original TLC column names to
     snake_case so downstream code uses a single convention.
+    Column projection and row filters are pushed down to pyarrow:
+    unused columns are never decoded (nor downloaded from MinIO)
+    and row groups whose statistics exclude the filter are skipped.
 
     Parameters
     ----------
@@ -32,19 +56,387 @@ def read_parquet_any(path, storage_options=None):
     storage_options : dict or None
         Credentials dict for s3fs (see
         :func:`minio_storage_options`).
+    columns : list of str or None
+        Snake_case columns to read (``None`` reads all). Columns
+        absent from the file are skipped, so that validation
+        reports them.
+    filters : list of tuple or None
+        Row filters on snake_case names, in pyarrow DNF form,
+        e.g. ``[("total_amount", ">", 0)]`` (see
+        :func:`trip_filters`).
 
     Returns
     -------
     pd.DataFrame
         DataFrame with renamed columns.
     """
-    df = pd.read_parquet(path, storage_options=storage_options)
-    rename = {
-        k: v for k, v in _COL_RENAME.items() if k in df.columns
-    }
-    if rename:
-        df = df.rename(columns=rename)
-    return df
+    dataset = open_dataset(path, storage_options)
+    table = dataset.to_table(**_scan_options(dataset, columns, filters))
+    return _table_to_frame(table)
+
+
+def list_parquet_files(path, storage_options=None):
+    """Expand a parquet file or directory/prefix into its part files.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://bucket/prefix/`` URI.
+    storage_options : dict or None
+        Credentials dict for s3fs.
+
+    Returns
+    -------
+    list of str
+        Part file paths, as seen by the underlying filesystem
+        (no ``s3://`` scheme).
+    """
+    return list(open_dataset(path, storage_options).files)
+
+
+def read_parquet_many(paths, storage_options=None, columns=None,
+                      filters=None, workers=DEFAULT_IO_THREADS,
+                      as_table=False):
+    """Read many parquet files/prefixes concurrently into one frame.
+
+    Every input is expanded into its part files, which are read by
+    a thread pool (pyarrow releases the GIL while fetching and
+    decoding). The per-file Arrow tables are concatenated without
+    copying and converted to pandas once, so no intermediate
+    per-file DataFrame is ever built.
+
+    Parameters
+    ----------
+    paths : list of str
+        Local paths or ``s3://`` URIs (files or prefixes).
+    storage_options : dict or None
+        Credentials dict for s3fs, used for ``s3://`` inputs only.
+    columns, filters
+        Projection and row filters, as in :func:`read_parquet_any`.
+    workers : int
+        Maximum number of files read at the same time.
+    as_table : bool
+        Return the :class:`pyarrow.Table` instead of a DataFrame.
+
+    Returns
+    -------
+    pd.DataFrame or pyarrow.Table
+        Rows of all inputs, in input order, with snake_case
+        columns. Schemas that differ between months (missing
+        columns, int vs double) are unified.
+
+    Raises
+    ------
+    ValueError
+        If the inputs contain no parquet file.
+    """
+    parts = []
+    for path in paths:
+        so = storage_options if path.startswith("s3://") else None
+        fs, _ = _resolve_filesystem(path, so)
+        parts.extend((f, fs) for f in list_parquet_files(path, so))
+    if not parts:
+        raise ValueError(f"No parquet files found in {list(paths)}")
+
+    def read_part(part):
+        file, fs = part
+        dataset = ds.dataset(file, format="parquet", filesystem=fs)
+        table = dataset.to_table(**_scan_options(dataset, columns, filters))
+        return table.rename_columns(
+            _snake_case_names(table.column_names)
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        tables = list(pool.map(read_part, parts))
+    table = pa.concat_tables(tables, promote_options="permissive")
+    del tables
+    if as_table:
+        return table
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def trip_filters(pickup_start=None, pickup_end=None,
+                 total_amount_range=None):
+    """Build pushdown filters for common trip selections.
+
+    Parameters
+    ----------
+    pickup_start, pickup_end : str, pd.Timestamp or None
+        Half-open pickup date range ``[start, end)``.
+    total_amount_range : tuple of float or None
+        ``(low, high)`` bounds on ``total_amount``, applied as
+        ``low < total_amount <= high`` like the training outlier
+        filter.
+
+    Returns
+    -------
+    list of tuple or None
+        Filters for :func:`read_parquet_any`, or ``None`` when
+        nothing is selected.
+    """
+    filters = []
+    if pickup_start is not None:
+        filters.append(
+            ("tpep_pickup_datetime", ">=", pd.Timestamp(pickup_start))
+        )
+    if pickup_end is not None:
+        filters.append(
+            ("tpep_pickup_datetime", "<", pd.Timestamp(pickup_end))
+        )
+    if total_amount_range is not None:
+        low, high = total_amount_range
+        filters.append(("total_amount", ">", low))
+        filters.append(("total_amount", "<=", high))
+    return filters or None
+
+
+def _physical_name(name, schema_names):
+    """Return the name *name* has in the file (TLC or snake_case)."""
+    if name not in schema_names and _COL_ORIGINAL.get(name) in schema_names:
+        return _COL_ORIGINAL[name]
+    return name
+
+
+def _translate_filters(filters, schema_names):
+    """Rewrite snake_case filter columns to physical names."""
+    if filters and isinstance(filters[0], tuple):
+        filters = [filters]
+    return [
+        [(_physical_name(col, schema_names), op, val)
+         for col, op, val in conjunction]
+        for conjunction in filters
+    ]
+
+
+def _scan_options(dataset, columns=None, filters=None):
+    """Translate snake_case projection/filters for a dataset scan."""
+    names = dataset.schema.names
+    options = {}
+    if columns is not None:
+        physical = [_physical_name(c, names) for c in columns]
+        options["columns"] = [c for c in physical if c in names]
+    if filters:
+        options["filter"] = pq.filters_to_expression(
+            _translate_filters(filters, names)
+        )
+    return options
+
+
+def _snake_case_names(names):
+    """Map TLC column names to their snake_case equivalent."""
+    return [_COL_RENAME.get(n, n) for n in names]
+
+
+def _resolve_filesystem(path, storage_options=None):
+    """Return the ``(filesystem, path)`` pair pyarrow should use.
+
+    ``s3://`` URIs are served through :mod:`s3fs` with the given
+    credentials; local paths use pyarrow's default filesystem.
+    """
+    if path.startswith("s3://"):
+        import s3fs
+
+        fs = s3fs.S3FileSystem(**(storage_options or {}))
+        return fs, path[len("s3://"):].rstrip("/")
+    return None, path
+
+
+def open_dataset(path, storage_options=None):
+    """Open a parquet file or directory as a pyarrow dataset.
+
+    Spark output directories (``part-*.parquet`` plus ``_SUCCESS``)
+    are handled transparently: files starting with ``_`` or ``.``
+    are ignored.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://bucket/key`` URI (file or prefix).
+    storage_options : dict or None
+        Credentials dict for s3fs (see
+        :func:`minio_storage_options`).
+
+    Returns
+    -------
+    pyarrow.dataset.Dataset
+        Lazily-read dataset; nothing is decoded yet.
+    """
+    fs, resolved = _resolve_filesystem(path, storage_options)
+    return ds.dataset(resolved, format="parquet", filesystem=fs)
+
+
+def parquet_row_groups(path, storage_options=None) -> list:
+    """Row count of every row group of a parquet file.
+
+    Only the footer is read.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://bucket/key`` URI of a single file.
+    storage_options : dict or None
+        Credentials dict for s3fs (see
+        :func:`minio_storage_options`).
+
+    Returns
+    -------
+    list of int
+        Rows per row group, in file order.
+    """
+    fs, resolved = _resolve_filesystem(path, storage_options)
+    metadata = pq.read_metadata(resolved, filesystem=fs)
+    return [
+        metadata.row_group(i).num_rows
+        for i in range(metadata.num_row_groups)
+    ]
+
+
+def iter_parquet_batches(path, batch_rows, storage_options=None,
+                         columns=None, filters=None, row_groups=None):
+    """Stream a parquet file or directory as bounded DataFrames.
+
+    Record batches are decoded one row group at a time and
+    regrouped so that every yielded frame holds exactly
+    *batch_rows* rows (except the last one). Peak memory is
+    therefore bounded by the batch size, not the input size.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://bucket/key`` URI (file or prefix).
+    batch_rows : int
+        Number of rows per yielded DataFrame.
+    storage_options : dict or None
+        Credentials dict for s3fs (see
+        :func:`minio_storage_options`).
+    columns, filters
+        Projection and row filters, as in :func:`read_parquet_any`.
+    row_groups : sequence of int or None
+        Only read these row groups; *path* must then be a single
+        file (see :func:`parquet_row_groups`).
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive slices of the input, with renamed columns.
+    """
+    if batch_rows <= 0:
+        raise ValueError("batch_rows must be positive")
+
+    dataset = open_dataset(path, storage_options)
+    pending, n_pending = [], 0
+    scan = _scan_options(dataset, columns, filters)
+    source = dataset
+    if row_groups is not None:
+        (fragment,) = dataset.get_fragments()
+        source = fragment.subset(row_group_ids=list(row_groups))
+    for batch in source.to_batches(batch_size=batch_rows, **scan):
+        if batch.num_rows == 0:
+            continue
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= batch_rows:
+            table = pa.Table.from_batches(pending)
+            yield _table_to_frame(table.slice(0, batch_rows))
+            rest = table.slice(batch_rows)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield _table_to_frame(pa.Table.from_batches(pending))
+
+
+def read_parquet_sample(paths, size=None, fraction=None,
+                        storage_options=None, columns=None,
+                        filters=None, stratify=None, min_per_stratum=0,
+                        batch_rows=1_000_000, seed=42):
+    """Sample rows while streaming, with memory bounded by the sample.
+
+    Three modes:
+
+    * ``size`` only: uniform reservoir sample of *size* rows;
+    * ``fraction``: Bernoulli sample, each row kept with
+      probability *fraction*;
+    * ``size`` + ``stratify``: a cheap first pass reads only the
+      stratification columns to count rows per stratum, then each
+      stratum is reservoir-sampled to its proportional share (at
+      least *min_per_stratum* rows) so rare zones stay represented.
+
+    Parameters
+    ----------
+    paths : list of str
+        Local paths or ``s3://`` URIs (files or prefixes).
+    size : int or None
+        Target sample size.
+    fraction : float or None
+        Bernoulli keep probability (used when *size* is ``None``).
+    storage_options : dict or None
+        Credentials dict for s3fs, used for ``s3://`` inputs only.
+    columns, filters
+        Projection and row filters, as in :func:`read_parquet_any`.
+    stratify : sequence of str or None
+        Stratification columns, e.g.
+        ``("pickup_month", "pu_location_id")`` (see
+        :func:`~taxi_ml.sampling.stratum_codes`).
+    min_per_stratum : int
+        Minimum rows kept per stratum.
+    batch_rows : int
+        Rows decoded at a time.
+    seed : int
+        Random seed.
+
+    Returns
+    -------
+    pd.DataFrame
+        Sampled rows with snake_case columns.
+    """
+    if (size is None) == (fraction is None):
+        raise ValueError("Pass exactly one of size or fraction")
+
+    def batches(cols):
+        for path in paths:
+            so = storage_options if path.startswith("s3://") else None
+            yield from iter_parquet_batches(
+                path, batch_rows, storage_options=so,
+                columns=cols, filters=filters,
+            )
+
+    if fraction is not None:
+        rng = np.random.default_rng(seed)
+        kept = [
+            b.loc[rng.random(len(b)) < fraction] for b in batches(columns)
+        ]
+        if not kept:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(kept, ignore_index=True)
+
+    if stratify:
+        strata_cols = [
+            "tpep_pickup_datetime" if c == "pickup_month" else c
+            for c in stratify
+        ]
+        counts = {}
+        for b in batches(strata_cols):
+            codes, n = np.unique(
+                stratum_codes(b, stratify), return_counts=True,
+            )
+            for code, k in zip(codes.tolist(), n.tolist()):
+                counts[code] = counts.get(code, 0) + k
+        sample = StratifiedReservoir(
+            allocate(counts, size, min_per_stratum), stratify, seed,
+        )
+    else:
+        sample = Reservoir(size, seed)
+
+    for b in batches(columns):
+        sample.add(b)
+    if sample.frame is None:
+        return pd.DataFrame(columns=columns)
+    return sample.frame
+
+
+def _table_to_frame(table):
+    """Convert an Arrow table to pandas with snake_case columns."""
+    table = table.rename_columns(_snake_case_names(table.column_names))
+    return table.to_pandas()
 
 
 def build_s3_path(bucket, object_key):
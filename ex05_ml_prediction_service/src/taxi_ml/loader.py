@@ -0,0 +1,339 @@
+"""Idempotent bulk load of monthly trip files into ``fact_trips``.
+
+Each month is streamed from parquet into a staging table with
+``COPY ... FROM STDIN`` (CSV encoded by pyarrow, no per-row Python
+work), indexed once the data is in, then swapped in as the
+``fact_trips_YYYY_MM`` partition (see ex03 ``creation.sql``). The
+whole month is one transaction, recorded in
+``fact_trips_load_log``: a failed load leaves nothing behind, a
+loaded month is skipped on rerun, and a forced reload replaces the
+partition instead of duplicating its rows.
+"""
+
+import datetime as dt
+import io
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+
+from taxi_ml.io import _snake_case_names, open_dataset
+
+#: Columns of ``fact_trips`` filled by the loader, in COPY order
+#: (``trip_id`` comes from the table's sequence).
+FACT_COLUMNS = [
+    "vendor_id",
+    "rate_code_id",
+    "payment_type_id",
+    "pu_location_id",
+    "do_location_id",
+    "tpep_pickup_datetime",
+    "tpep_dropoff_datetime",
+    "passenger_count",
+    "trip_distance",
+    "store_and_fwd_flag",
+    "fare_amount",
+    "extra",
+    "mta_tax",
+    "tip_amount",
+    "tolls_amount",
+    "improvement_surcharge",
+    "total_amount",
+    "congestion_surcharge",
+    "airport_fee",
+    "cbd_congestion_fee",
+]
+
+#: Arrow type each column is cast to before CSV encoding.
+COLUMN_TYPES = {
+    "vendor_id": pa.int32(),
+    "rate_code_id": pa.int32(),
+    "payment_type_id": pa.int32(),
+    "pu_location_id": pa.int32(),
+    "do_location_id": pa.int32(),
+    "tpep_pickup_datetime": pa.timestamp("us"),
+    "tpep_dropoff_datetime": pa.timestamp("us"),
+    "passenger_count": pa.int32(),
+    "store_and_fwd_flag": pa.string(),
+}
+
+#: Columns stored as ``DECIMAL(10, 2)``.
+DECIMAL_COLUMNS = [
+    c for c in FACT_COLUMNS[8:] if c != "store_and_fwd_flag"
+]
+
+#: Valid foreign keys (dimension rows of ex03 ``insertion.sql``);
+#: nulls are always accepted.
+FK_VALUES = {
+    "vendor_id": [1, 2, 5, 6, 7],
+    "payment_type_id": [0, 1, 2, 3, 4, 5, 6],
+    "rate_code_id": [1, 2, 3, 4, 5, 6, 99],
+}
+
+#: ``[low, high]`` range of ``dim_location.location_id``.
+LOCATION_RANGE = (1, 265)
+
+#: Largest absolute value a ``DECIMAL(10, 2)`` column accepts.
+DECIMAL_LIMIT = 1e8
+
+#: Columns indexed on the parent table (created on the staging
+#: table after the load so that ``ATTACH PARTITION`` adopts them).
+INDEXED_COLUMNS = [
+    "tpep_pickup_datetime",
+    "vendor_id",
+    "rate_code_id",
+    "pu_location_id",
+    "do_location_id",
+    "payment_type_id",
+]
+
+#: Rows encoded and sent per ``COPY`` call.
+COPY_BATCH_ROWS = 500_000
+
+
+def month_bounds(month):
+    """Return the ``[start, end)`` pickup range of *month*.
+
+    Parameters
+    ----------
+    month : str or datetime.date
+        ``"YYYY-MM"`` or any date inside the month.
+
+    Returns
+    -------
+    tuple of datetime.datetime
+        First instant of the month and of the next one.
+    """
+    if isinstance(month, str):
+        month = dt.datetime.strptime(month[:7], "%Y-%m")
+    start = dt.datetime(month.year, month.month, 1)
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def partition_name(month) -> str:
+    """Name of the ``fact_trips`` partition holding *month*."""
+    start, _ = month_bounds(month)
+    return f"fact_trips_{start:%Y_%m}"
+
+
+def prepare_batch(batch, start, end) -> pa.Table:
+    """Shape one record batch like ``fact_trips``.
+
+    Columns are renamed to snake_case, missing ones (e.g.
+    ``cbd_congestion_fee`` before 2025) filled with nulls, and
+    rows the warehouse would reject are dropped: pickup outside
+    ``[start, end)``, unknown foreign keys, or amounts overflowing
+    ``DECIMAL(10, 2)`` — the same rules as the Spark job of ex02.
+
+    Parameters
+    ----------
+    batch : pyarrow.RecordBatch or pyarrow.Table
+        Raw or cleaned TLC rows.
+    start, end : datetime.datetime
+        Pickup range of the month being loaded.
+
+    Returns
+    -------
+    pyarrow.Table
+        :data:`FACT_COLUMNS`, in order, with warehouse types.
+    """
+    table = batch
+    if isinstance(batch, pa.RecordBatch):
+        table = pa.Table.from_batches([batch])
+    table = table.rename_columns(_snake_case_names(table.column_names))
+    columns = []
+    for name in FACT_COLUMNS:
+        kind = COLUMN_TYPES.get(name, pa.float64())
+        if name in table.column_names:
+            columns.append(pc.cast(table[name], kind))
+        else:
+            columns.append(pa.nulls(table.num_rows, kind))
+    table = pa.table(columns, names=FACT_COLUMNS)
+
+    pickup = table["tpep_pickup_datetime"]
+    keep = pc.and_(
+        pc.greater_equal(pickup, pa.scalar(start, pa.timestamp("us"))),
+        pc.less(pickup, pa.scalar(end, pa.timestamp("us"))),
+    )
+    for name, values in FK_VALUES.items():
+        keep = pc.and_(keep, _null_or(
+            table[name], pc.is_in(table[name], pa.array(values, pa.int32()))
+        ))
+    low, high = LOCATION_RANGE
+    for name in ("pu_location_id", "do_location_id"):
+        keep = pc.and_(keep, _null_or(table[name], pc.and_(
+            pc.greater_equal(table[name], low),
+            pc.less_equal(table[name], high),
+        )))
+    for name in DECIMAL_COLUMNS:
+        keep = pc.and_(keep, _null_or(
+            table[name], pc.less(pc.abs(table[name]), DECIMAL_LIMIT)
+        ))
+    # Null comparisons (null pickup) count as rejected.
+    return table.filter(pc.fill_null(keep, False))
+
+
+def _null_or(values, condition):
+    """Condition that also accepts null *values*."""
+    return pc.or_(pc.is_null(values), pc.fill_null(condition, False))
+
+
+def iter_csv_chunks(path, month, storage_options=None,
+                    batch_rows=COPY_BATCH_ROWS):
+    """Stream the rows of *month* from *path* as CSV buffers.
+
+    Parameters
+    ----------
+    path : str
+        Local path or ``s3://`` URI (file or Spark directory).
+    month : str or datetime.date
+        Month being loaded (see :func:`month_bounds`).
+    storage_options : dict or None
+        Credentials dict for s3fs.
+    batch_rows : int
+        Rows decoded and encoded at a time.
+
+    Yields
+    ------
+    tuple
+        ``(buffer, n_read, n_kept)``: a CSV buffer without header,
+        ready for ``COPY ... WITH (FORMAT csv)``, and row counts
+        before/after :func:`prepare_batch`.
+    """
+    start, end = month_bounds(month)
+    dataset = open_dataset(path, storage_options)
+    options = pcsv.WriteOptions(include_header=False)
+    for batch in dataset.to_batches(batch_size=batch_rows):
+        if batch.num_rows == 0:
+            continue
+        table = prepare_batch(batch, start, end)
+        buf = io.BytesIO()
+        pcsv.write_csv(table, buf, write_options=options)
+        buf.seek(0)
+        yield buf, batch.num_rows, table.num_rows
+
+
+def load_month(conn, path, month, storage_options=None, force=False,
+               refresh_rollups=True, batch_rows=COPY_BATCH_ROWS) -> dict:
+    """Load one month into ``fact_trips``, at most once.
+
+    Steps, in a single transaction: skip if ``fact_trips_load_log``
+    already lists the month (unless *force*); COPY into a fresh
+    staging table; add the primary key, the indexes of
+    :data:`INDEXED_COLUMNS` and a CHECK constraint matching the
+    partition bounds (so that attaching does not rescan the rows);
+    detach and drop the previous partition of the month, if any;
+    rename and attach the staging table; log the load and refresh
+    the dashboard rollups.
+
+    Parameters
+    ----------
+    conn : psycopg2 connection
+        Connection to the warehouse; committed on success, rolled
+        back on failure.
+    path : str
+        Parquet file or directory of the month.
+    month : str or datetime.date
+        Month to load, e.g. ``"2024-01"``.
+    storage_options : dict or None
+        Credentials dict for s3fs.
+    force : bool
+        Reload a month already listed in the load log.
+    refresh_rollups : bool
+        Call ``refresh_rollups()`` (ex03 ``rollups.sql``) after the
+        swap.
+    batch_rows : int
+        Rows sent per COPY call.
+
+    Returns
+    -------
+    dict
+        ``month``, ``status`` (``"loaded"`` or ``"skipped"``),
+        ``rows`` loaded and ``rejected`` rows.
+    """
+    start, end = month_bounds(month)
+    part = partition_name(start)
+    staging = f"{part}_staging"
+    bounds = (start, end)
+    result = {"month": f"{start:%Y-%m}", "status": "skipped",
+              "rows": 0, "rejected": 0}
+    try:
+        with conn.cursor() as cur:
+            # Concurrent loaders of the same month wait for each other.
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))",
+                        (part,))
+            cur.execute(
+                "SELECT n_rows FROM fact_trips_load_log WHERE month = %s",
+                (start.date(),),
+            )
+            row = cur.fetchone()
+            if row is not None and not force:
+                conn.rollback()
+                result["rows"] = int(row[0])
+                return result
+
+            cur.execute(f"DROP TABLE IF EXISTS {staging}")
+            cur.execute(
+                f"CREATE TABLE {staging} (LIKE fact_trips INCLUDING DEFAULTS)"
+            )
+            copy_sql = (f"COPY {staging} ({', '.join(FACT_COLUMNS)}) "
+                        "FROM STDIN WITH (FORMAT csv)")
+            n_read = 0
+            for buf, read, kept in iter_csv_chunks(
+                    path, start, storage_options, batch_rows):
+                cur.copy_expert(copy_sql, buf)
+                n_read += read
+                result["rows"] += kept
+
+            # Indexes are built once, on the loaded data.
+            cur.execute(f"ALTER TABLE {staging} "
+                        "ADD PRIMARY KEY (trip_id, tpep_pickup_datetime)")
+            for col in INDEXED_COLUMNS:
+                cur.execute(f"CREATE INDEX ON {staging} ({col})")
+            cur.execute(
+                f"ALTER TABLE {staging} ADD CONSTRAINT {part}_month "
+                "CHECK (tpep_pickup_datetime >= %s "
+                "AND tpep_pickup_datetime < %s)",
+                bounds,
+            )
+            cur.execute(f"ANALYZE {staging}")
+
+            cur.execute("SELECT to_regclass(%s)", (part,))
+            if cur.fetchone()[0] is not None:
+                cur.execute(f"ALTER TABLE fact_trips DETACH PARTITION {part}")
+                cur.execute(f"DROP TABLE {part}")
+            # Rows of the month loaded before its partition existed.
+            cur.execute(
+                "DELETE FROM fact_trips_default "
+                "WHERE tpep_pickup_datetime >= %s "
+                "AND tpep_pickup_datetime < %s",
+                bounds,
+            )
+            cur.execute(f"ALTER TABLE {staging} RENAME TO {part}")
+            cur.execute(
+                f"ALTER TABLE fact_trips ATTACH PARTITION {part} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+
+            result["rejected"] = n_read - result["rows"]
+            cur.execute(
+                "INSERT INTO fact_trips_load_log "
+                "(month, source, n_rows, n_rejected, loaded_at) "
+                "VALUES (%s, %s, %s, %s, now()) "
+                "ON CONFLICT (month) DO UPDATE SET "
+                "source = EXCLUDED.source, n_rows = EXCLUDED.n_rows, "
+                "n_rejected = EXCLUDED.n_rejected, "
+                "loaded_at = EXCLUDED.loaded_at",
+                (start.date(), path, result["rows"], result["rejected"]),
+            )
+            if refresh_rollups:
+                cur.execute("SELECT refresh_rollups(%s)", (start.date(),))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    result["status"] = "loaded"
+    return result
@@ -2,19 +2,31 @@
 
 Provides a scikit-learn pipeline using
 :class:`~sklearn.ensemble.HistGradientBoostingRegressor`
-with ordinal-encoded categorical features.
+with ordinal-encoded categorical features, and a staged variant
+of the regressor that can be grown chunk by chunk.
 """
 
 import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OrdinalEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_squared_error
 from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.utils.validation import check_is_fitted
 
+#: Hyper-parameters of the gradient boosting regressor.
+HGB_PARAMS = {
+    "max_depth": 8,
+    "learning_rate": 0.05,
+    "max_iter": 400,
+    "random_state": 42,
+}
 
-def build_model(categorical_cols, numeric_cols) -> Pipeline:
+
+def build_model(categorical_cols, numeric_cols,
+                categories="auto", params=None) -> Pipeline:
     """Build a scikit-learn regression pipeline.
 
     Uses ``OrdinalEncoder`` for categorical features and
@@ -28,6 +40,13 @@ def build_model(categorical_cols, numeric_cols) -> Pipeline:
         Column names to treat as categorical.
     numeric_cols : list of str
         Column names to treat as numeric.
+    categories : "auto" or list of array-like
+        Categories of the ordinal encoder, one array per
+        categorical column (``"auto"`` learns them from the data).
+    params : dict or None
+        Regressor hyper-parameters overriding :data:`HGB_PARAMS`
+        (e.g. the best configuration found by
+        :mod:`taxi_ml.tuning`).
 
     Returns
     -------
@@ -44,6 +63,7 @@ def build_model(categorical_cols, numeric_cols) -> Pipeline:
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
             ("ordinal", OrdinalEncoder(
+                categories=categories,
                 handle_unknown="use_encoded_value",
                 unknown_value=-1,
             )),
@@ -57,16 +77,96 @@ def build_model(categorical_cols, numeric_cols) -> Pipeline:
         ],
     )
 
-    reg = HistGradientBoostingRegressor(
-        max_depth=8,
-        learning_rate=0.05,
-        max_iter=400,
-        random_state=42,
-    )
+    reg = HistGradientBoostingRegressor(**{**HGB_PARAMS, **(params or {})})
 
     return Pipeline(steps=[("preprocess", pre), ("model", reg)])
 
 
+class StagedBoostingRegressor(RegressorMixin, BaseEstimator):
+    """Gradient boosting grown one stage per data chunk.
+
+    Each call to :meth:`partial_fit` trains a new
+    :class:`~sklearn.ensemble.HistGradientBoostingRegressor` stage
+    of *iters_per_stage* trees on the residuals that the previous
+    stages leave on the new chunk; predictions are the sum of all
+    stages. This lets a model see a full year of trips while only
+    one chunk is ever held in memory.
+
+    Parameters
+    ----------
+    iters_per_stage : int
+        Boosting iterations added per chunk.
+    max_depth : int
+        Maximum depth of each tree.
+    learning_rate : float
+        Shrinkage of each tree.
+    max_leaf_nodes, min_samples_leaf, l2_regularization
+        Tree parameters of each stage (see
+        :class:`~sklearn.ensemble.HistGradientBoostingRegressor`).
+    random_state : int
+        Seed of the first stage (incremented per stage).
+    """
+
+    def __init__(self, iters_per_stage=50,
+                 max_depth=HGB_PARAMS["max_depth"],
+                 learning_rate=HGB_PARAMS["learning_rate"],
+                 max_leaf_nodes=31, min_samples_leaf=20,
+                 l2_regularization=0.0,
+                 random_state=HGB_PARAMS["random_state"]):
+        self.iters_per_stage = iters_per_stage
+        self.max_depth = max_depth
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        """Train a single stage on *X*, *y* (drops earlier stages)."""
+        self.stages_ = []
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        """Add one boosting stage fitted on this chunk's residuals.
+
+        Parameters
+        ----------
+        X : array-like of shape (n_samples, n_features)
+            Preprocessed features of the chunk.
+        y : array-like of shape (n_samples,)
+            Target of the chunk.
+
+        Returns
+        -------
+        self
+        """
+        if not hasattr(self, "stages_"):
+            self.stages_ = []
+        y = np.asarray(y, dtype=np.float64)
+        if self.stages_:
+            y = y - self.predict(X)
+        stage = HistGradientBoostingRegressor(
+            max_depth=self.max_depth,
+            learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_samples_leaf,
+            l2_regularization=self.l2_regularization,
+            max_iter=self.iters_per_stage,
+            early_stopping=False,
+            random_state=self.random_state + len(self.stages_),
+        )
+        self.stages_.append(stage.fit(X, y))
+        return self
+
+    def predict(self, X):
+        """Sum the predictions of every stage."""
+        check_is_fitted(self, "stages_")
+        pred = self.stages_[0].predict(X)
+        for stage in self.stages_[1:]:
+            pred += stage.predict(X)
+        return pred
+
+
 def rmse(y_true, y_pred) -> float:
     """Compute Root Mean Squared Error.
 
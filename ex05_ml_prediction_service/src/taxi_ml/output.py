@@ -0,0 +1,218 @@
+"""Output of batch predictions: partitioned Parquet or CSV.
+
+Predictions are written as a Parquet dataset partitioned by pickup
+month (``pickup_month=YYYY-MM/part-*.parquet``), locally or on
+MinIO. Every row carries its source file and row index and the
+natural key of the trip in ``fact_trips`` (vendor, pickup/dropoff
+timestamps, pickup/dropoff zones), so predictions can be joined back
+to the warehouse or to the input files. Batches are appended as row
+groups to one open file per partition: memory stays bounded by the
+batch size.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from taxi_ml.io import _resolve_filesystem
+
+#: Name of the prediction column.
+PREDICTION_COL = "prediction_total_amount"
+
+#: Columns identifying a trip in ``fact_trips``.
+KEY_COLS = [
+    "vendor_id",
+    "tpep_pickup_datetime",
+    "tpep_dropoff_datetime",
+    "pu_location_id",
+    "do_location_id",
+]
+
+#: Hive partition column (derived from ``tpep_pickup_datetime``).
+PARTITION_COL = "pickup_month"
+
+#: Schema of the prediction files (partition column excluded).
+PREDICTION_SCHEMA = pa.schema([
+    ("source_file", pa.string()),
+    ("source_row", pa.int64()),
+    ("vendor_id", pa.int32()),
+    ("tpep_pickup_datetime", pa.timestamp("us")),
+    ("tpep_dropoff_datetime", pa.timestamp("us")),
+    ("pu_location_id", pa.int32()),
+    ("do_location_id", pa.int32()),
+    (PREDICTION_COL, pa.float64()),
+])
+
+
+def prediction_table(keys, preds, source_file, first_row) -> pa.Table:
+    """Assemble the output rows of one batch.
+
+    Parameters
+    ----------
+    keys : pd.DataFrame
+        Input rows holding :data:`KEY_COLS` (``vendor_id`` may be
+        missing).
+    preds : array-like
+        Predictions, aligned with *keys*.
+    source_file : str
+        Input file of the batch.
+    first_row : int
+        Row index of the first row of the batch in *source_file*.
+
+    Returns
+    -------
+    pa.Table
+        Rows with :data:`PREDICTION_SCHEMA`.
+    """
+    n = len(keys)
+    columns = {
+        "source_file": pa.array([source_file] * n, pa.string()),
+        "source_row": pa.array(
+            np.arange(first_row, first_row + n, dtype=np.int64),
+        ),
+    }
+    for name in KEY_COLS:
+        field = PREDICTION_SCHEMA.field(name)
+        if name in keys.columns:
+            columns[name] = pa.array(keys[name], from_pandas=True).cast(
+                field.type, safe=False,
+            )
+        else:
+            columns[name] = pa.nulls(n, field.type)
+    columns[PREDICTION_COL] = pa.array(
+        np.asarray(preds, dtype=np.float64),
+    )
+    return pa.table(columns, schema=PREDICTION_SCHEMA)
+
+
+def clear_output(path, storage_options=None) -> None:
+    """Remove the ``pickup_month=*`` partitions of a previous run.
+
+    Only partition directories are removed, so pointing ``--output``
+    at a shared directory by mistake does not wipe it.
+    """
+    fs, root = _resolve_filesystem(path, storage_options)
+    if fs is None:
+        if not os.path.isdir(root):
+            return
+        for name in os.listdir(root):
+            if name.startswith(PARTITION_COL + "="):
+                shutil.rmtree(os.path.join(root, name))
+        return
+    if fs.exists(root):
+        for entry in fs.ls(root, detail=False):
+            if entry.rsplit("/", 1)[-1].startswith(PARTITION_COL + "="):
+                fs.rm(entry, recursive=True)
+
+
+class ParquetPredictionWriter:
+    """Append prediction batches to a month-partitioned dataset.
+
+    Parameters
+    ----------
+    path : str
+        Output directory, local or ``s3://bucket/prefix``.
+    storage_options : dict or None
+        s3fs credentials for ``s3://`` outputs (see
+        :func:`~taxi_ml.io.minio_storage_options`).
+    compression : str
+        Parquet codec.
+    part_name : str
+        File name (without extension) inside each partition; give
+        every concurrent writer its own.
+    """
+
+    def __init__(self, path, storage_options=None, compression="zstd",
+                 part_name="part-0"):
+        self.fs, self.root = _resolve_filesystem(path, storage_options)
+        self.compression = compression
+        self.part_name = part_name
+        self.n_rows = 0
+        self._writers = {}
+
+    def _writer(self, month):
+        """Open (once) the file of partition *month*."""
+        writer = self._writers.get(month)
+        if writer is None:
+            directory = f"{self.root}/{PARTITION_COL}={month}"
+            if self.fs is None:
+                os.makedirs(directory, exist_ok=True)
+            writer = pq.ParquetWriter(
+                f"{directory}/{self.part_name}.parquet",
+                PREDICTION_SCHEMA, filesystem=self.fs,
+                compression=self.compression,
+            )
+            self._writers[month] = writer
+        return writer
+
+    def write(self, table: pa.Table) -> None:
+        """Append a :func:`prediction_table` batch."""
+        if table.num_rows == 0:
+            return
+        months = (
+            table["tpep_pickup_datetime"].to_numpy()
+            .astype("datetime64[M]")
+        )
+        uniq = np.unique(months)
+        for month in uniq:
+            if np.isnat(month):
+                label, mask = "unknown", np.isnat(months)
+            else:
+                label, mask = str(month), months == month
+            part = table if len(uniq) == 1 else table.filter(mask)
+            self._writer(label).write_table(part)
+        self.n_rows += table.num_rows
+
+    @property
+    def files(self) -> list:
+        """Paths of the files written so far."""
+        return [w.where for w in self._writers.values()]
+
+    def close(self) -> None:
+        """Close every partition file."""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvPredictionWriter:
+    """Append prediction batches to a CSV of predictions only.
+
+    The original output format of ``predict.py``: a single
+    ``prediction_total_amount`` column, no row keys.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.n_rows = 0
+        self._file = open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, table: pa.Table) -> None:
+        """Append the predictions of a :func:`prediction_table` batch."""
+        frame = table.select([PREDICTION_COL]).to_pandas()
+        frame.to_csv(self._file, header=(self.n_rows == 0), index=False)
+        self.n_rows += table.num_rows
+
+    @property
+    def files(self) -> list:
+        """The CSV path."""
+        return [self.path]
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,357 @@
+"""Memoization of fare predictions by trip feature vector.
+
+Many trips share the same model inputs once
+:func:`~taxi_ml.features.split_xy` has run: same zones, hour, day,
+rate and payment codes, distance and duration. :class:`CachedPredictor`
+wraps a model and only sends the distinct, unseen feature vectors of
+each batch to ``model.predict``; every other row is served from an
+in-memory table.
+
+Feature vectors are quantized (:data:`DEFAULT_QUANTUM`) and hashed
+with two independent 64-bit hashes: the first one is the lookup key,
+the second one is checked on every hit, so a collision costs a model
+call, never a wrong prediction. The table is an open-addressing hash
+table in NumPy arrays: lookups and inserts are vectorized over the
+batch and cost O(batch), and least-recently-used entries are evicted
+a tenth of the capacity at a time, so eviction is amortized too.
+
+The table can be saved next to other artifacts and reloaded by the
+next run. Entries are only reused by the same model artifact, feature
+code and quantization (see :func:`cache_key`), so retraining or
+changing the features starts from an empty cache.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+from taxi_ml.features import FEATURE_COLS, FEATURES_VERSION
+
+#: Quantization step of every feature. The defaults are the
+#: resolution of the TLC data (distances in hundredths of a mile,
+#: timestamps in seconds), so cached predictions equal direct ones;
+#: coarser steps raise the hit rate, and rows falling in the same
+#: step then share the prediction of the first one seen.
+DEFAULT_QUANTUM = {
+    "passenger_count": 1.0,
+    "trip_distance": 0.01,
+    "trip_duration_min": 1 / 60,
+    "pickup_hour": 1.0,
+    "pickup_dayofweek": 1.0,
+    "pickup_day": 1.0,
+    "rate_code_id": 1.0,
+    "payment_type_id": 1.0,
+    "pu_location_id": 1.0,
+    "do_location_id": 1.0,
+}
+
+#: Default number of distinct feature vectors kept in memory
+#: (at most about 64 MB of table).
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+#: Share of :attr:`CachedPredictor.max_entries` evicted at once when
+#: the cache is full.
+EVICT_FRACTION = 0.1
+
+#: Maximum share of occupied slots before the table grows.
+MAX_LOAD = 0.7
+
+#: Initial number of slots of the table.
+_MIN_SLOTS = 1 << 12
+
+#: Code of missing values after quantization.
+_NAN_CODE = np.iinfo(np.int64).min
+
+#: Seeds of the lookup and check hashes.
+_SEEDS = (0x9E3779B97F4A7C15, 0xD1B54A32D192ED03)
+
+
+def cache_key(model_path, quantum=None) -> str:
+    """Hash the model artifact, feature version and quantization.
+
+    Parameters
+    ----------
+    model_path : str
+        Model artifact (``.npz`` or ``.joblib``); its content is
+        hashed, not its name.
+    quantum : dict or None
+        Quantization steps (default :data:`DEFAULT_QUANTUM`).
+
+    Returns
+    -------
+    str
+        Hex digest naming the cache file.
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    payload = json.dumps({
+        "model": digest.hexdigest(),
+        "features_version": FEATURES_VERSION,
+        "quantum": quantum or DEFAULT_QUANTUM,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _mix(h):
+    """splitmix64 finalizer (wraps around on ``uint64``)."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def feature_hashes(x, quantum=None):
+    """Hash the quantized feature vector of every row.
+
+    Parameters
+    ----------
+    x : pd.DataFrame
+        Features with the :data:`~taxi_ml.features.FEATURE_COLS`.
+    quantum : dict or None
+        Quantization steps (default :data:`DEFAULT_QUANTUM`).
+
+    Returns
+    -------
+    key, check : np.ndarray of uint64
+        Two independent hashes per row.
+    """
+    quantum = quantum or DEFAULT_QUANTUM
+    n = len(x)
+    hashes = [np.full(n, seed, dtype=np.uint64) for seed in _SEEDS]
+    for col in FEATURE_COLS:
+        values = x[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            codes = np.round(values / quantum[col]).astype(np.int64)
+        codes[np.isnan(values)] = _NAN_CODE
+        codes = codes.view(np.uint64)
+        hashes = [_mix(h ^ codes) for h in hashes]
+    return hashes[0], hashes[1]
+
+
+class CachedPredictor:
+    """Model wrapper serving repeated feature vectors from a cache.
+
+    Not thread-safe: share it through a single thread (e.g. the
+    :class:`~taxi_ml.service.MicroBatcher` worker).
+
+    Parameters
+    ----------
+    model : object
+        Trained model with a ``predict`` method.
+    max_entries : int
+        Distinct feature vectors kept; beyond, the least recently
+        used :data:`EVICT_FRACTION` of them are evicted.
+    quantum : dict or None
+        Quantization steps (default :data:`DEFAULT_QUANTUM`).
+    path : str or None
+        ``.npz`` file the table is loaded from (if it exists) and
+        saved to by :meth:`save`.
+    """
+
+    def __init__(self, model, max_entries=DEFAULT_MAX_ENTRIES,
+                 quantum=None, path=None):
+        self.model = model
+        self.max_entries = max_entries
+        self.quantum = quantum or DEFAULT_QUANTUM
+        self.path = path
+        self.rows = 0
+        self.hits = 0
+        self.evictions = 0
+        self.loaded = 0
+        self._tick = 0
+        self._size = 0
+        self._allocate(_MIN_SLOTS)
+        if path is not None and os.path.exists(path):
+            with np.load(path) as arrays:
+                keys = arrays["keys"][-max_entries:]
+                checks = arrays["checks"][-max_entries:]
+                values = arrays["values"][-max_entries:]
+            self._rebuild(keys, checks, values,
+                          np.zeros(len(keys), dtype=np.int64))
+            self.loaded = len(keys)
+
+    @classmethod
+    def for_artifact(cls, model, model_path, cache_dir,
+                     max_entries=DEFAULT_MAX_ENTRIES, quantum=None):
+        """Open the cache of the artifact *model_path* in *cache_dir*.
+
+        The file is named after :func:`cache_key`, so another model
+        or feature version never reads these entries.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        key = cache_key(model_path, quantum)
+        return cls(model, max_entries, quantum,
+                   path=os.path.join(cache_dir, f"{key}.npz"))
+
+    def __len__(self):
+        return self._size
+
+    def _allocate(self, n_slots):
+        """Replace the table by an empty one of *n_slots* (power of 2)."""
+        self._mask = np.uint64(n_slots - 1)
+        # Key 0 marks an empty slot (see :meth:`predict`).
+        self._keys = np.zeros(n_slots, dtype=np.uint64)
+        self._checks = np.zeros(n_slots, dtype=np.uint64)
+        self._values = np.zeros(n_slots, dtype=np.float64)
+        self._used = np.zeros(n_slots, dtype=np.int64)
+        self._size = 0
+
+    def _find(self, keys) -> np.ndarray:
+        """Slot of every key (``-1`` if absent), by linear probing."""
+        slots = (keys & self._mask).astype(np.int64)
+        found = np.full(len(keys), -1, dtype=np.int64)
+        todo = np.arange(len(keys))
+        while len(todo):
+            s = slots[todo]
+            k = self._keys[s]
+            hit = k == keys[todo]
+            found[todo[hit]] = s[hit]
+            more = ~hit & (k != 0)
+            todo = todo[more]
+            slots[todo] = (s[more] + 1) & int(self._mask)
+        return found
+
+    def _place(self, keys, checks, values, used):
+        """Store distinct keys absent from the table (no resizing)."""
+        slots = (keys & self._mask).astype(np.int64)
+        todo = np.arange(len(keys))
+        while len(todo):
+            s = slots[todo]
+            free = self._keys[s] == 0
+            # One winner per free slot; the others probe further.
+            _, first = np.unique(s[free], return_index=True)
+            win = todo[free][first]
+            ws = s[free][first]
+            self._keys[ws] = keys[win]
+            self._checks[ws] = checks[win]
+            self._values[ws] = values[win]
+            self._used[ws] = used[win]
+            placed = np.zeros(len(keys), dtype=bool)
+            placed[win] = True
+            todo = todo[~placed[todo]]
+            slots[todo] = (slots[todo] + 1) & int(self._mask)
+        self._size += len(keys)
+
+    def _rebuild(self, keys, checks, values, used):
+        """Reallocate the table for *keys* plus room to grow."""
+        n_slots = _MIN_SLOTS
+        target = min(2 * len(keys), self.max_entries)
+        while n_slots * MAX_LOAD < target:
+            n_slots *= 2
+        self._allocate(n_slots)
+        self._place(keys, checks, values, used)
+
+    def _entries(self):
+        """``(keys, checks, values, used)`` of the occupied slots."""
+        occupied = self._keys != 0
+        return (self._keys[occupied], self._checks[occupied],
+                self._values[occupied], self._used[occupied])
+
+    def predict(self, x) -> np.ndarray:
+        """Predict fares for the feature frame *x*.
+
+        Only distinct feature vectors missing from the cache reach
+        ``model.predict``.
+        """
+        n = len(x)
+        if n == 0:
+            return np.empty(0, dtype=np.float64)
+        self._tick += 1
+        keys, checks = feature_hashes(x, self.quantum)
+        keys = np.maximum(keys, np.uint64(1))
+        uniq, first, inverse = np.unique(
+            keys, return_index=True, return_inverse=True,
+        )
+        uniq_checks = checks[first]
+        values = np.empty(len(uniq), dtype=np.float64)
+
+        slots = self._find(uniq)
+        in_table = slots >= 0
+        found = in_table & (self._checks[slots] == uniq_checks)
+        values[found] = self._values[slots[found]]
+        self._used[slots[found]] = self._tick
+
+        missed = np.flatnonzero(~found)
+        if len(missed):
+            values[missed] = self.model.predict(x.iloc[first[missed]])
+            # Colliding keys (same key, other check) are not stored.
+            new = missed[~in_table[missed]]
+            self._insert(uniq[new], uniq_checks[new], values[new])
+
+        out = values[inverse]
+        # Rows sharing a key with another row of the batch but not
+        # its check hash are predicted on their own.
+        clash = checks != uniq_checks[inverse]
+        if clash.any():
+            out[clash] = self.model.predict(x.iloc[np.flatnonzero(clash)])
+        self.rows += n
+        self.hits += n - len(missed) - int(clash.sum())
+        return out
+
+    def _insert(self, keys, checks, values):
+        """Store new distinct keys, evicting or growing when needed."""
+        keys = keys[-self.max_entries:]
+        checks = checks[-self.max_entries:]
+        values = values[-self.max_entries:]
+        used = np.full(len(keys), self._tick, dtype=np.int64)
+        if self._size + len(keys) > self.max_entries:
+            # Keep the most recent entries, leaving a tenth of the
+            # capacity free so that the next evictions are rare.
+            keep = max(
+                self.max_entries - len(keys)
+                - int(self.max_entries * EVICT_FRACTION), 0,
+            )
+            old = self._entries()
+            self.evictions += len(old[0]) - min(keep, len(old[0]))
+            newest = np.argsort(old[3], kind="stable")[len(old[0]) - keep:]
+            self._rebuild(
+                *(np.concatenate([a[newest], b])
+                  for a, b in zip(old, (keys, checks, values, used))),
+            )
+        elif (self._size + len(keys)) > MAX_LOAD * len(self._keys):
+            old = self._entries()
+            self._rebuild(
+                *(np.concatenate([a, b])
+                  for a, b in zip(old, (keys, checks, values, used))),
+            )
+        else:
+            self._place(keys, checks, values, used)
+
+    def stats(self) -> dict:
+        """Rows served, hit rate and table size.
+
+        A hit is a row not sent to the model: found in the table or
+        a duplicate of another row of the same batch.
+        """
+        return {
+            "rows": self.rows,
+            "hits": self.hits,
+            "misses": self.rows - self.hits,
+            "hit_rate": self.hits / self.rows if self.rows else 0.0,
+            "entries": len(self),
+            "loaded_entries": self.loaded,
+            "evictions": self.evictions,
+        }
+
+    def save(self, path=None) -> str:
+        """Write the entries to *path* (default: the opened file).
+
+        Entries are stored least recently used first, so that a
+        smaller ``max_entries`` keeps the most recent ones on load.
+        The file is written under a temporary name and renamed, so
+        that a concurrent run never loads a partial table.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("no cache path to save to")
+        keys, checks, values, used = self._entries()
+        order = np.argsort(used, kind="stable")
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(tmp, keys=keys[order], checks=checks[order],
+                 values=values[order])
+        os.replace(tmp, path)
+        return path
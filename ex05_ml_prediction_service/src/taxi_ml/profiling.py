@@ -0,0 +1,270 @@
+"""Stage-level instrumentation of the training and prediction scripts.
+
+:class:`StageProfiler` wraps each pipeline stage (read, validate,
+features, fit, predict, write...) and records its wall time, CPU
+time, peak RSS increase and throughput. Stages run several times
+(one per batch in streaming mode) are aggregated by name. The
+result is written as a JSON run report next to ``metrics.json``;
+cProfile and tracemalloc can be switched on for deeper dives.
+
+Peak RSS is read from ``/proc/self/status`` and reset before each
+stage through ``/proc/self/clear_refs`` (Linux). Elsewhere, the
+process high-water mark from :mod:`resource` is used, so a stage
+only shows a peak if it raised the mark of the whole run.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+#: Number of functions (cProfile) and lines (tracemalloc) reported.
+TOP_N = 20
+
+
+def _status_mb(field):
+    """Return a ``/proc/self/status`` memory field in MB, or ``None``."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    """Resident set size of the process in MB (``None`` if unknown)."""
+    return _status_mb("VmRSS")
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB since start or the last reset."""
+    peak = _status_mb("VmHWM")
+    if peak is None and resource is not None:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        peak = maxrss / 1024 ** (2 if sys.platform == "darwin" else 1)
+    return peak
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS to the current RSS (Linux only).
+
+    Returns
+    -------
+    bool
+        Whether the reset succeeded.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class StageProfiler:
+    """Record wall time, CPU time, memory and rows/s per stage.
+
+    Stages must not be nested: each one resets the peak RSS.
+
+    Parameters
+    ----------
+    script : str
+        Name of the instrumented script, stored in the report.
+    trace_memory : bool
+        Also record the peak of Python allocations per stage
+        (tracemalloc) and the top allocation sites; slows the run.
+    cprofile : bool
+        Run cProfile for the whole run; see :meth:`write`.
+    log : callable or None
+        Printer of one line per finished stage (``None`` for quiet
+        runs with many batches; see :meth:`summary`).
+    """
+
+    def __init__(self, script, trace_memory=False, cprofile=False,
+                 log=print):
+        self.script = script
+        self.trace_memory = trace_memory
+        self.log = log
+        self.records = []
+        self.peak_exact = reset_peak_rss()
+        self._started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._rss0 = current_rss_mb()
+        if trace_memory:
+            tracemalloc.start()
+        self._cprofile = None
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Measure the enclosed block as stage *name*.
+
+        Yields
+        ------
+        dict
+            The stage record; set ``record["rows"]`` inside the block
+            when the row count is only known there.
+        """
+        record = {"name": name, "rows": rows}
+        exact = reset_peak_rss()
+        rss0 = current_rss_mb()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced0 = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = time.perf_counter() - t0
+            record["cpu_s"] = time.process_time() - cpu0
+            peak = peak_rss_mb()
+            if rss0 is not None and peak is not None:
+                record["peak_rss_delta_mb"] = max(peak - rss0, 0.0)
+            self.peak_exact = self.peak_exact and exact
+            if self.trace_memory:
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                record["traced_peak_mb"] = (traced_peak - traced0) / 1e6
+            self.records.append(record)
+            if self.log is not None:
+                self.log(self._format(record))
+
+    @staticmethod
+    def _format(record):
+        """One-line summary of a stage record."""
+        line = (f"[PROFILE] {record['name']:<10} "
+                f"wall={record['wall_s']:.2f}s cpu={record['cpu_s']:.2f}s")
+        if "peak_rss_delta_mb" in record:
+            line += f" peak_rss=+{record['peak_rss_delta_mb']:.0f}MB"
+        if record["rows"]:
+            rate = record["rows"] / max(record["wall_s"], 1e-9)
+            line += f" rows={record['rows']:,} ({rate:,.0f}/s)"
+        return line
+
+    def stages(self) -> list:
+        """Records aggregated by stage name, in first-run order.
+
+        Returns
+        -------
+        list of dict
+            ``name``, ``calls``, summed ``wall_s`` / ``cpu_s`` /
+            ``rows``, ``rows_per_s`` and the largest
+            ``peak_rss_delta_mb`` / ``traced_peak_mb`` of any call.
+        """
+        stages = {}
+        for rec in self.records:
+            agg = stages.setdefault(rec["name"], {
+                "name": rec["name"], "calls": 0,
+                "wall_s": 0.0, "cpu_s": 0.0, "rows": None,
+            })
+            agg["calls"] += 1
+            agg["wall_s"] += rec["wall_s"]
+            agg["cpu_s"] += rec["cpu_s"]
+            if rec["rows"] is not None:
+                agg["rows"] = (agg["rows"] or 0) + int(rec["rows"])
+            for key in ("peak_rss_delta_mb", "traced_peak_mb"):
+                if key in rec:
+                    agg[key] = max(agg.get(key, 0.0), rec[key])
+        for agg in stages.values():
+            if agg["rows"]:
+                agg["rows_per_s"] = agg["rows"] / max(agg["wall_s"], 1e-9)
+        return list(stages.values())
+
+    def summary(self) -> str:
+        """Table of the aggregated stages, slowest first."""
+        lines = [f"{'stage':<10} {'calls':>6} {'wall s':>9} {'cpu s':>9} "
+                 f"{'peak MB':>8} {'rows/s':>12}"]
+        for agg in sorted(self.stages(), key=lambda a: -a["wall_s"]):
+            lines.append(
+                f"{agg['name']:<10} {agg['calls']:>6} {agg['wall_s']:>9.2f} "
+                f"{agg['cpu_s']:>9.2f} "
+                f"{agg.get('peak_rss_delta_mb', float('nan')):>8.0f} "
+                f"{agg.get('rows_per_s', float('nan')):>12,.0f}"
+            )
+        return "\n".join(lines)
+
+    def report(self, **extra) -> dict:
+        """Build the run report.
+
+        Parameters
+        ----------
+        **extra
+            Additional top-level entries (e.g. input paths).
+
+        Returns
+        -------
+        dict
+            Run metadata, totals and :meth:`stages`.
+        """
+        wall = time.perf_counter() - self._t0
+        stages = self.stages()
+        report = {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started_at": self._started_at,
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "wall_s": wall,
+            "cpu_s": time.process_time() - self._cpu0,
+            "unaccounted_s": wall - sum(s["wall_s"] for s in stages),
+            "start_rss_mb": self._rss0,
+            "end_rss_mb": current_rss_mb(),
+            "peak_rss_exact": self.peak_exact,
+            "stages": stages,
+            **extra,
+        }
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            report["tracemalloc_top"] = [
+                {"site": str(stat.traceback), "size_mb": stat.size / 1e6,
+                 "count": stat.count}
+                for stat in snapshot.statistics("lineno")[:TOP_N]
+            ]
+        return report
+
+    def write(self, path, **extra) -> dict:
+        """Write :meth:`report` to *path* as JSON.
+
+        Tracing and profiling stop. cProfile stats are dumped next
+        to the report (``.prof``, readable with :mod:`pstats` or
+        snakeviz) and the top functions by cumulative time are
+        included in the report.
+
+        Returns
+        -------
+        dict
+            The report written.
+        """
+        report = self.report(**extra)
+        if self.trace_memory:
+            tracemalloc.stop()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            prof_path = os.path.splitext(path)[0] + ".prof"
+            self._cprofile.dump_stats(prof_path)
+            report["cprofile_path"] = prof_path
+            out = io.StringIO()
+            stats = pstats.Stats(self._cprofile, stream=out)
+            stats.sort_stats("cumulative").print_stats(TOP_N)
+            report["cprofile_top"] = out.getvalue().splitlines()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
@@ -0,0 +1,194 @@
+"""Bounded-memory row sampling for streamed trip data.
+
+Samples are drawn while batches stream by, so memory is bounded
+by the sample size rather than by the size of the input.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Reservoir:
+    """Uniform sample of at most *size* rows from a stream of frames.
+
+    Every row gets a uniform random key; the reservoir keeps the
+    *size* rows with the smallest keys seen so far, which is a
+    uniform sample without replacement of everything added.
+
+    Parameters
+    ----------
+    size : int
+        Maximum number of rows kept.
+    seed : int
+        Random seed.
+    """
+
+    def __init__(self, size, seed=42):
+        self.size = size
+        self.n_seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._frame = None
+        self._keys = np.empty(0)
+
+    def add(self, frame: pd.DataFrame) -> None:
+        """Offer the rows of *frame* to the sample."""
+        if len(frame) == 0:
+            return
+        self.n_seen += len(frame)
+        keys = self._rng.random(len(frame))
+        if self._frame is not None:
+            if len(self._frame) == self.size:
+                # Full: only rows beating the current worst key enter.
+                better = keys < self._keys.max()
+                frame, keys = frame.loc[better], keys[better]
+            frame = pd.concat([self._frame, frame], ignore_index=True)
+            keys = np.concatenate([self._keys, keys])
+        if len(frame) > self.size:
+            keep = np.sort(np.argpartition(keys, self.size)[:self.size])
+            frame = frame.iloc[keep].reset_index(drop=True)
+            keys = keys[keep]
+        self._frame, self._keys = frame, keys
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Rows currently in the sample (``None`` if nothing added)."""
+        return self._frame
+
+
+#: Bits given to each column of a stratum code.
+_STRATUM_BITS = 20
+
+
+def stratum_codes(frame: pd.DataFrame, stratify) -> np.ndarray:
+    """Encode the strata of *frame*'s rows as int64 codes.
+
+    Parameters
+    ----------
+    frame : pd.DataFrame
+        Rows to encode.
+    stratify : sequence of str
+        Small integer columns (zones, payment codes, ...) and/or
+        ``"pickup_month"``, derived from ``tpep_pickup_datetime``.
+        Missing values form their own stratum.
+
+    Returns
+    -------
+    np.ndarray
+        One code per row; equal codes mean equal strata.
+    """
+    codes = np.zeros(len(frame), dtype=np.int64)
+    for col in stratify:
+        if col == "pickup_month":
+            months = pd.to_datetime(frame["tpep_pickup_datetime"])
+            values = months.dt.year * 12 + months.dt.month
+        else:
+            values = frame[col]
+        values = values.fillna(-1).to_numpy(dtype=np.int64) + 1
+        codes = (codes << _STRATUM_BITS) | values
+    return codes
+
+
+def allocate(counts: dict, size, min_per_stratum=0) -> dict:
+    """Split *size* rows across strata proportionally to *counts*.
+
+    Every stratum gets at least *min_per_stratum* rows (or all of
+    its rows if it has fewer), so rare strata stay represented.
+
+    Parameters
+    ----------
+    counts : dict
+        Stratum code → number of rows in the input.
+    size : int
+        Target total sample size.
+    min_per_stratum : int
+        Floor per stratum.
+
+    Returns
+    -------
+    dict
+        Stratum code → number of rows to sample.
+    """
+    total = max(sum(counts.values()), 1)
+    return {
+        code: min(n, max(min_per_stratum, int(size * n / total)))
+        for code, n in counts.items()
+    }
+
+
+class StratifiedReservoir:
+    """Per-stratum uniform samples with fixed capacities.
+
+    Works like :class:`Reservoir`, but keeps the rows with the
+    smallest random keys *within each stratum*, up to that
+    stratum's capacity.
+
+    Parameters
+    ----------
+    capacities : dict
+        Stratum code → maximum number of rows kept
+        (see :func:`allocate`).
+    stratify : sequence of str
+        Stratification columns (see :func:`stratum_codes`).
+    seed : int
+        Random seed.
+    """
+
+    def __init__(self, capacities, stratify, seed=42):
+        self.capacities = capacities
+        self.stratify = tuple(stratify)
+        self.n_seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._frame = None
+        self._keys = np.empty(0)
+        self._codes = np.empty(0, dtype=np.int64)
+        self._empty = {c: 0.0 for c, cap in capacities.items() if not cap}
+        self._thresholds = dict(self._empty)
+
+    def add(self, frame: pd.DataFrame) -> None:
+        """Offer the rows of *frame* to the sample."""
+        if len(frame) == 0:
+            return
+        self.n_seen += len(frame)
+        keys = self._rng.random(len(frame))
+        codes = stratum_codes(frame, self.stratify)
+        if self._thresholds:
+            # Full strata only accept rows beating their worst key.
+            uniq, inverse = np.unique(codes, return_inverse=True)
+            limits = np.array(
+                [self._thresholds.get(c, 1.0) for c in uniq.tolist()]
+            )
+            better = keys < limits[inverse]
+            frame = frame.loc[better]
+            keys, codes = keys[better], codes[better]
+        if self._frame is not None:
+            frame = pd.concat([self._frame, frame], ignore_index=True)
+            keys = np.concatenate([self._keys, keys])
+            codes = np.concatenate([self._codes, codes])
+
+        order = np.lexsort((keys, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(
+            np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+        )
+        group_sizes = np.diff(np.r_[starts, len(order)])
+        rank = np.arange(len(order)) - np.repeat(starts, group_sizes)
+        caps = np.array(
+            [self.capacities.get(c, 0) for c in sorted_codes[starts].tolist()]
+        )
+        selected = rank < np.repeat(caps, group_sizes)
+        keep = np.sort(order[selected])
+
+        full = (group_sizes >= caps) & (caps > 0)
+        last = starts[full] + caps[full] - 1
+        self._thresholds = dict(self._empty)
+        self._thresholds.update(zip(
+            sorted_codes[last].tolist(), keys[order[last]].tolist(),
+        ))
+
+        self._frame = frame.iloc[keep].reset_index(drop=True)
+        self._keys, self._codes = keys[keep], codes[keep]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Rows currently in the sample (``None`` if nothing added)."""
+        return self._frame
@@ -0,0 +1,258 @@
+"""Online prediction service around the trained pipeline.
+
+The model is loaded once; concurrent requests are grouped by a
+:class:`MicroBatcher` into a single ``model.predict`` call, which
+amortizes scikit-learn overhead across requests. Each request is
+validated and featurized on its own thread before it joins a batch,
+so a malformed trip only fails its own request. The HTTP layer only
+relies on the standard library.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from taxi_ml.features import add_time_features, split_xy
+from taxi_ml.prediction_cache import CachedPredictor
+from taxi_ml.validate import validate_infer_df
+
+
+class MicroBatcher:
+    """Group concurrent prediction requests into one model call.
+
+    A single worker thread takes the first pending request, then
+    keeps collecting requests until *max_batch_rows* rows are
+    gathered or *max_wait_ms* has elapsed, and runs
+    ``predict_fn`` once on the concatenated rows. If that call
+    fails, the requests of the batch are retried one by one, so
+    that only the faulty ones get the exception.
+
+    Parameters
+    ----------
+    predict_fn : callable
+        Maps a DataFrame to a prediction array.
+    max_batch_rows : int
+        Maximum rows per model call.
+    max_wait_ms : float
+        Maximum time the first request of a batch waits for
+        others.
+    """
+
+    def __init__(self, predict_fn, max_batch_rows=512, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = deque(maxlen=10_000)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: pd.DataFrame) -> Future:
+        """Queue *frame* for prediction; the future holds the array."""
+        future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def _collect(self):
+        """Block for one request, then gather more until full/late."""
+        batch = [self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            frames = [frame for frame, _ in batch]
+            try:
+                preds = self.predict_fn(
+                    pd.concat(frames, ignore_index=True)
+                )
+            except Exception as exc:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(exc)
+                else:
+                    self._predict_each(batch)
+                continue
+            self.batch_sizes.append(len(preds))
+            offsets = np.cumsum([0] + [len(f) for f in frames])
+            for (_, future), lo, hi in zip(batch, offsets, offsets[1:]):
+                future.set_result(preds[lo:hi])
+
+    def _predict_each(self, batch):
+        """Predict the requests of a failed batch one at a time."""
+        for frame, future in batch:
+            try:
+                preds = self.predict_fn(frame)
+            except Exception as exc:  # only this caller fails
+                future.set_exception(exc)
+                continue
+            self.batch_sizes.append(len(preds))
+            future.set_result(preds)
+
+
+class LatencyTracker:
+    """Thread-safe rolling window of request latencies."""
+
+    def __init__(self, window=10_000):
+        self._values = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        """Add one latency measurement."""
+        with self._lock:
+            self._values.append(seconds)
+            self.count += 1
+
+    def summary(self) -> dict:
+        """Return count and p50/p90/p99/max latencies in ms."""
+        with self._lock:
+            values = np.array(self._values) * 1000.0
+        if values.size == 0:
+            return {"count": self.count}
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        return {
+            "count": self.count,
+            "p50_ms": round(float(p50), 3),
+            "p90_ms": round(float(p90), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
+
+
+class PredictionService:
+    """Validate trips and predict fares through a micro-batcher.
+
+    Parameters
+    ----------
+    model : object
+        Fitted model with a ``predict`` method (see
+        :func:`~taxi_ml.model.build_model`), possibly wrapped in a
+        :class:`~taxi_ml.prediction_cache.CachedPredictor`.
+    max_batch_rows, max_wait_ms
+        Micro-batching limits (see :class:`MicroBatcher`).
+    """
+
+    def __init__(self, model, max_batch_rows=512, max_wait_ms=5.0):
+        self.model = model
+        self.latency = LatencyTracker()
+        self.batcher = MicroBatcher(
+            self.model.predict, max_batch_rows, max_wait_ms,
+        )
+
+    def predict_records(self, records) -> list:
+        """Predict fares for a list of trip dicts.
+
+        Raises
+        ------
+        ValueError
+            If the trips fail :func:`validate_infer_df` or their
+            features cannot be computed.
+        """
+        t0 = time.perf_counter()
+        df = pd.DataFrame.from_records(records)
+        validate_infer_df(df)
+        x, _, _ = split_xy(add_time_features(df))
+        preds = self.batcher.submit(x).result()
+        self.latency.record(time.perf_counter() - t0)
+        return [float(p) for p in preds]
+
+    def stats(self) -> dict:
+        """Latency percentiles, batching and cache statistics."""
+        sizes = np.array(self.batcher.batch_sizes)
+        stats = {
+            "latency": self.latency.summary(),
+            "batches": {
+                "count": int(sizes.size),
+                "mean_rows": float(sizes.mean()) if sizes.size else 0.0,
+                "max_rows": int(sizes.max()) if sizes.size else 0,
+            },
+        }
+        if isinstance(self.model, CachedPredictor):
+            stats["prediction_cache"] = self.model.stats()
+        return stats
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default backlog (5) resets concurrent clients.
+    request_queue_size = 256
+
+
+def _make_handler(service):
+    """Build the request handler class bound to *service*."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                trips = payload
+                if isinstance(payload, dict):
+                    trips = payload.get("trips", [payload])
+                preds = service.predict_records(trips)
+            except (ValueError, KeyError, TypeError) as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            except Exception as exc:  # keep the connection usable
+                self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+                return
+            self._send(200, {"predictions": preds})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(service, host="127.0.0.1", port=8000):
+    """Create the HTTP server exposing *service*.
+
+    Endpoints: ``POST /predict`` (one trip object, a list of trips
+    or ``{"trips": [...]}``), ``GET /health`` and ``GET /stats``.
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        Server ready for ``serve_forever()``.
+    """
+    return _Server((host, port), _make_handler(service))
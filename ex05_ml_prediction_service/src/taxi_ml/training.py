@@ -0,0 +1,61 @@
+"""Training inputs shared by ``train.py``, ``tune.py`` and the benchmarks.
+
+The columns read, the categorical features and the per-frame
+featurization are defined once here, so that tuning and training
+always see the same features.
+"""
+
+import pandas as pd
+
+from taxi_ml.dtypes import downcast
+from taxi_ml.features import add_time_features
+from taxi_ml.validate import (
+    ABERRANT_RULES,
+    TRAIN_REQUIRED_COLS,
+    check_schema,
+    validate_train_df,
+)
+
+#: Raw columns read for training (projected by the parquet reader).
+NEEDED_COLS = list(TRAIN_REQUIRED_COLS)
+
+#: Features encoded as categories by :func:`~taxi_ml.model.build_model`.
+CAT_COLS = [
+    "rate_code_id", "payment_type_id",
+    "pu_location_id", "do_location_id",
+]
+
+#: ``(low, high]`` bounds on ``total_amount`` kept for training,
+#: pushed down to the parquet reader.
+TOTAL_AMOUNT_BOUNDS = next(
+    (r.low, r.high) for r in ABERRANT_RULES if r.column == "total_amount"
+)
+
+
+def prepare_training_frame(df: pd.DataFrame):
+    """Downcast, featurize and validate a raw training frame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw trips with :data:`NEEDED_COLS`; modified in place.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Valid rows with the time features added (index reset).
+    report : ValidationReport
+        Violation counts of :data:`~taxi_ml.validate.TRAIN_RULES`
+        and :data:`~taxi_ml.validate.ABERRANT_RULES`.
+
+    Raises
+    ------
+    ValueError
+        If columns are missing, the frame is empty or a hard
+        training constraint is violated.
+    """
+    df, _ = downcast(df)
+    check_schema(df, TRAIN_REQUIRED_COLS, "training")
+    df = add_time_features(df, inplace=True)
+    report = validate_train_df(df, filter_rules=ABERRANT_RULES)
+    return df.loc[report.mask].reset_index(drop=True), report
@@ -0,0 +1,296 @@
+"""Hyper-parameter search over time-based folds.
+
+Candidates of :data:`SEARCH_SPACE` are compared by successive
+halving: every candidate is first trained on a small share of the
+training rows, and only the best ``1 / eta`` of them move on to a
+budget ``eta`` times larger. Each candidate is scored on
+expanding-window folds over pickup months (train on all months
+before the validation month), which mirrors how the model is used:
+trained on the past, applied to the next month.
+
+Candidate × fold fits run in a process pool. Features are written
+once as ``.npy`` files and memory-mapped by every worker, so the
+data is neither pickled per task nor copied per process, and every
+worker is capped at a fixed number of OpenMP threads so that the
+pool does not oversubscribe the cores.
+"""
+
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from taxi_ml.model import HGB_PARAMS, build_model, rmse
+
+#: Values tried for each ``HistGradientBoostingRegressor`` parameter.
+SEARCH_SPACE = {
+    "max_depth": [6, 8, 10, None],
+    "learning_rate": [0.03, 0.05, 0.1, 0.2],
+    "max_iter": [200, 400, 800],
+    "max_leaf_nodes": [31, 63, 127],
+    "min_samples_leaf": [20, 50, 200],
+    "l2_regularization": [0.0, 0.1, 1.0],
+}
+
+#: State of a pool worker, set by :func:`_init_worker`.
+_WORKER = {}
+
+
+def month_codes(pickup) -> np.ndarray:
+    """Encode pickup timestamps as ``year * 12 + month - 1``."""
+    pickup = pd.DatetimeIndex(pickup)
+    return (pickup.year * 12 + pickup.month - 1).to_numpy(np.int32)
+
+
+def month_label(code) -> str:
+    """``"YYYY-MM"`` label of a :func:`month_codes` value."""
+    return f"{int(code) // 12:04d}-{int(code) % 12 + 1:02d}"
+
+
+def time_folds(months, n_folds=3) -> list:
+    """Build expanding-window folds over months.
+
+    Parameters
+    ----------
+    months : np.ndarray
+        Month code of every row (see :func:`month_codes`).
+    n_folds : int
+        Number of folds; the last *n_folds* months are validated
+        in turn (fewer if there are not enough months).
+
+    Returns
+    -------
+    list of tuple
+        ``(train_months, valid_month)`` pairs.
+
+    Raises
+    ------
+    ValueError
+        If the rows span fewer than two months.
+    """
+    uniq = np.unique(months)
+    if len(uniq) < 2:
+        raise ValueError("time-based folds need at least two months")
+    n_folds = min(n_folds, len(uniq) - 1)
+    return [
+        (tuple(int(m) for m in uniq[:i]), int(uniq[i]))
+        for i in range(len(uniq) - n_folds, len(uniq))
+    ]
+
+
+def sample_candidates(space=None, n=27, seed=42) -> list:
+    """Draw *n* distinct parameter sets from *space*.
+
+    The current defaults (:data:`~taxi_ml.model.HGB_PARAMS`) are
+    always the first candidate, so the search can only improve on
+    them.
+    """
+    space = SEARCH_SPACE if space is None else space
+    names = sorted(space)
+    base = {k: v for k, v in HGB_PARAMS.items() if k != "random_state"}
+    candidates = [base]
+    n_total = math.prod(len(space[k]) for k in names)
+    rng = np.random.default_rng(seed)
+    # Distinct grid points: decode a permutation of flat indices.
+    for flat in rng.permutation(n_total):
+        if len(candidates) >= n:
+            break
+        params = {}
+        for k in names:
+            flat, pos = divmod(int(flat), len(space[k]))
+            params[k] = space[k][pos]
+        if params != base:
+            candidates.append(params)
+    return candidates
+
+
+def write_shared_features(directory, x, y, months) -> None:
+    """Write features as ``.npy`` files for memory-mapped sharing.
+
+    Parameters
+    ----------
+    directory : str
+        Destination directory (created if needed).
+    x : pd.DataFrame
+        Feature matrix (see :func:`~taxi_ml.features.split_xy`).
+    y : array-like
+        Target.
+    months : np.ndarray
+        Month code of every row.
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "x.npy"),
+            np.ascontiguousarray(x.to_numpy(dtype=np.float64)))
+    np.save(os.path.join(directory, "y.npy"),
+            np.asarray(y, dtype=np.float64))
+    np.save(os.path.join(directory, "months.npy"),
+            np.asarray(months, dtype=np.int32))
+    np.save(os.path.join(directory, "columns.npy"),
+            np.asarray(list(x.columns), dtype=str))
+
+
+def load_shared_features(directory) -> dict:
+    """Memory-map the arrays written by :func:`write_shared_features`."""
+    data = {
+        name: np.load(os.path.join(directory, f"{name}.npy"),
+                      mmap_mode="r")
+        for name in ("x", "y", "months")
+    }
+    columns = np.load(os.path.join(directory, "columns.npy"))
+    data["columns"] = [str(c) for c in columns]
+    return data
+
+
+def _init_worker(directory, n_threads, categorical_cols):
+    """Pool initializer: cap OpenMP threads and map the features."""
+    from threadpoolctl import threadpool_limits
+
+    os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    # Kept alive for the lifetime of the worker.
+    _WORKER["limits"] = threadpool_limits(limits=n_threads)
+    _WORKER["data"] = load_shared_features(directory)
+    _WORKER["categorical_cols"] = list(categorical_cols)
+
+
+def _fold_rows(months, fold, n_rows, seed):
+    """Row indices of a fold, training rows subsampled to *n_rows*."""
+    train_months, valid_month = fold
+    train = np.flatnonzero(np.isin(months, train_months))
+    if n_rows < len(train):
+        rng = np.random.default_rng(seed)
+        train = np.sort(rng.choice(train, n_rows, replace=False))
+    return train, np.flatnonzero(months == valid_month)
+
+
+def evaluate_candidate(params, fold, n_rows, seed=42) -> dict:
+    """Fit one candidate on one fold in a pool worker.
+
+    Returns
+    -------
+    dict
+        ``rmse`` on the validation month, training ``n_rows`` and
+        fit ``seconds``.
+    """
+    data = _WORKER["data"]
+    cat_cols = _WORKER["categorical_cols"]
+    columns = data["columns"]
+    num_cols = [c for c in columns if c not in cat_cols]
+    train, valid = _fold_rows(data["months"], fold, n_rows, seed)
+
+    t0 = time.perf_counter()
+    model = build_model(cat_cols, num_cols, params=params)
+    model.fit(pd.DataFrame(data["x"][train], columns=columns),
+              data["y"][train])
+    pred = model.predict(pd.DataFrame(data["x"][valid], columns=columns))
+    return {
+        "rmse": rmse(data["y"][valid], pred),
+        "n_rows": int(len(train)),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def rung_budgets(n_candidates, max_rows, min_rows, eta=3) -> list:
+    """Training rows per rung of successive halving.
+
+    The last rung uses *max_rows*; each earlier rung ``eta`` times
+    fewer, but never less than *min_rows*.
+    """
+    n_rungs = 1 + int(math.log(max(n_candidates, 1)) / math.log(eta)
+                      + 1e-9)
+    return [
+        max(min(min_rows, max_rows), max_rows // eta ** (n_rungs - 1 - i))
+        for i in range(n_rungs)
+    ]
+
+
+def successive_halving(directory, candidates, folds, categorical_cols,
+                       max_rows, min_rows=20_000, eta=3, workers=None,
+                       threads_per_worker=1, log=print) -> dict:
+    """Select the best candidate by successive halving.
+
+    Parameters
+    ----------
+    directory : str
+        Features written by :func:`write_shared_features`.
+    candidates : list of dict
+        Parameter sets (see :func:`sample_candidates`).
+    folds : list of tuple
+        Folds from :func:`time_folds`.
+    categorical_cols : list of str
+        Categorical feature columns.
+    max_rows : int
+        Training rows per fold in the last rung.
+    min_rows : int
+        Training rows per fold in the first rung.
+    eta : int
+        Halving rate: ``1 / eta`` of the candidates survive a rung.
+    workers : int or None
+        Worker processes (default: cores // *threads_per_worker*).
+    threads_per_worker : int
+        OpenMP threads each worker may use.
+    log : callable
+        Progress printer.
+
+    Returns
+    -------
+    dict
+        Best ``params``, its mean ``rmse`` and per-fold scores in
+        the last rung, and the ``history`` of every evaluation.
+    """
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+    budgets = rung_budgets(len(candidates), max_rows, min_rows, eta)
+    history = []
+    alive = list(range(len(candidates)))
+    # spawn: children start without the parent's OpenMP state.
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(directory, threads_per_worker, categorical_cols),
+    )
+    with pool:
+        for rung, n_rows in enumerate(budgets):
+            futures = {
+                (i, j): pool.submit(evaluate_candidate, candidates[i],
+                                    fold, n_rows)
+                for i in alive for j, fold in enumerate(folds)
+            }
+            scores = {}
+            for i in alive:
+                fold_scores = [futures[i, j].result()
+                               for j in range(len(folds))]
+                scores[i] = float(np.mean([s["rmse"] for s in fold_scores]))
+                history.append({
+                    "rung": rung,
+                    "candidate": i,
+                    "params": candidates[i],
+                    "n_rows": n_rows,
+                    "rmse": scores[i],
+                    "fold_rmse": [s["rmse"] for s in fold_scores],
+                    "seconds": sum(s["seconds"] for s in fold_scores),
+                })
+            alive = sorted(alive, key=scores.get)
+            log(f"[TUNE] Rung {rung}: {len(scores)} candidate(s) × "
+                f"{len(folds)} fold(s) on ≤{n_rows:,} rows, "
+                f"best RMSE={scores[alive[0]]:.4f}")
+            if rung < len(budgets) - 1:
+                alive = alive[:max(1, math.ceil(len(alive) / eta))]
+
+    last_rung = {h["candidate"]: h for h in history if h["rung"] == rung}
+    best = last_rung[alive[0]]
+    return {
+        "params": best["params"],
+        "rmse": best["rmse"],
+        "fold_rmse": best["fold_rmse"],
+        "folds": [
+            {"train": [month_label(m) for m in train],
+             "valid": month_label(valid)}
+            for train, valid in folds
+        ],
+        "history": history,
+    }
@@ -4,6 +4,9 @@ Provides schema and constraint checks for both training
 and inference DataFrames.
 """
 
+from dataclasses import dataclass, field
+
+import numpy as np
 import pandas as pd
 
 
@@ -31,68 +34,283 @@ INFER_REQUIRED_COLS = [
 ]
 
 
-def validate_train_df(df: pd.DataFrame) -> None:
+#: Rows checked per block by :func:`check_rules`; all rules run on
+#: one block while it is in cache, and temporaries stay bounded by
+#: the block size.
+DEFAULT_BLOCK_ROWS = 1 << 20
+
+#: Accepted values of the ``on_invalid`` argument of the validators.
+ON_INVALID = ("raise", "filter")
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A null/range constraint on one column.
+
+    Attributes
+    ----------
+    name : str
+        Identifier used in reports.
+    column : str
+        Column the rule applies to.
+    low, high : float or None
+        Bounds (``None`` for unbounded).
+    low_inclusive, high_inclusive : bool
+        Whether the bounds themselves are valid.
+    allow_null : bool
+        Whether missing values pass the rule.
+    message : str
+        Human-readable description of a violation.
+    """
+
+    name: str
+    column: str
+    low: float | None = None
+    high: float | None = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+    allow_null: bool = True
+    message: str = ""
+
+    def violations(self, values: np.ndarray) -> np.ndarray:
+        """Return the boolean violation mask of *values*."""
+        bad = np.zeros(len(values), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            if self.low is not None:
+                bad |= (
+                    values < self.low if self.low_inclusive
+                    else values <= self.low
+                )
+            if self.high is not None:
+                bad |= (
+                    values > self.high if self.high_inclusive
+                    else values >= self.high
+                )
+        if not self.allow_null:
+            bad |= pd.isna(values)
+        return bad
+
+
+@dataclass
+class ValidationReport:
+    """Outcome of a :func:`check_rules` pass.
+
+    Attributes
+    ----------
+    n_rows : int
+        Number of rows checked.
+    counts : dict
+        Rule name → number of violating rows.
+    mask : np.ndarray
+        Boolean mask of the rows that satisfy every rule.
+    rules : tuple of Rule
+        Rules that were checked.
+    """
+
+    n_rows: int
+    counts: dict
+    mask: np.ndarray = field(repr=False)
+    rules: tuple = field(default=(), repr=False)
+
+    @property
+    def n_invalid(self) -> int:
+        """Number of rows violating at least one rule."""
+        return int(self.n_rows - np.count_nonzero(self.mask))
+
+    def violated(self, rules=None) -> dict:
+        """Return ``{rule name: count}`` of the violated rules.
+
+        Parameters
+        ----------
+        rules : iterable of Rule or None
+            Restrict to these rules (default: all).
+        """
+        names = None if rules is None else {r.name for r in rules}
+        return {
+            name: n for name, n in self.counts.items()
+            if n and (names is None or name in names)
+        }
+
+    def raise_if_invalid(self, rules=None) -> None:
+        """Raise one ``ValueError`` listing every violated rule.
+
+        Raises
+        ------
+        ValueError
+            If any of *rules* (default: all) has violations.
+        """
+        violated = self.violated(rules)
+        if violated:
+            by_name = {r.name: r for r in self.rules}
+            details = "; ".join(
+                f"{by_name[name].message or name} ({n:,} rows)"
+                for name, n in violated.items()
+            )
+            raise ValueError(details)
+
+
+TRAIN_RULES = (
+    Rule("total_amount_notnull", "total_amount", allow_null=False,
+         message="total_amount contains NaN"),
+    Rule("trip_distance_nonnegative", "trip_distance", low=0,
+         message="trip_distance contains negative values"),
+    Rule("passenger_count_nonnegative", "passenger_count", low=0,
+         message="passenger_count contains negative values"),
+)
+
+INFER_RULES = TRAIN_RULES[1:]
+
+#: Outlier bounds applied before training (rows are dropped, not
+#: rejected). Needs the columns of
+#: :func:`~taxi_ml.features.add_time_features`.
+ABERRANT_RULES = (
+    Rule("total_amount_range", "total_amount", low=0, high=200,
+         low_inclusive=False, allow_null=False),
+    Rule("trip_distance_range", "trip_distance", low=0, high=100,
+         low_inclusive=False, allow_null=False),
+    Rule("trip_duration_range", "trip_duration_min", low=0, high=180,
+         low_inclusive=False, allow_null=False),
+    Rule("passenger_count_range", "passenger_count", low=0, high=9,
+         allow_null=False),
+)
+
+
+def _as_array(col: pd.Series) -> np.ndarray:
+    """Return *col* as a NumPy array, NA-aware dtypes as float."""
+    if (isinstance(col.dtype, pd.api.extensions.ExtensionDtype)
+            and pd.api.types.is_numeric_dtype(col.dtype)):
+        return col.to_numpy(dtype="float64", na_value=np.nan)
+    return col.to_numpy()
+
+
+def check_rules(df: pd.DataFrame, rules,
+                block_rows=DEFAULT_BLOCK_ROWS) -> ValidationReport:
+    """Evaluate all *rules* in a single blocked pass over *df*.
+
+    Instead of one full-length scan and mask per check, the frame
+    is walked once in blocks of *block_rows*; every rule runs on a
+    block while it is hot in cache and violations are counted and
+    folded into a single keep-mask.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Frame to check; every rule column must be present.
+    rules : iterable of Rule
+        Constraints to evaluate.
+    block_rows : int
+        Rows per block.
+
+    Returns
+    -------
+    ValidationReport
+        Per-rule violation counts and the mask of valid rows.
+    """
+    rules = tuple(rules)
+    n = len(df)
+    columns = {r.column: _as_array(df[r.column]) for r in rules}
+    counts = dict.fromkeys((r.name for r in rules), 0)
+    mask = np.ones(n, dtype=bool)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        keep = mask[start:stop]
+        for rule in rules:
+            bad = rule.violations(columns[rule.column][start:stop])
+            counts[rule.name] += int(np.count_nonzero(bad))
+            keep &= ~bad
+    return ValidationReport(n, counts, mask, rules)
+
+
+def _check_on_invalid(on_invalid):
+    """Raise if *on_invalid* is not one of :data:`ON_INVALID`."""
+    if on_invalid not in ON_INVALID:
+        raise ValueError(
+            f"on_invalid must be one of {ON_INVALID}, got {on_invalid!r}"
+        )
+
+
+def check_schema(df, required, context):
+    """Raise if *df* is empty or misses *required* columns."""
+    if df.empty:
+        raise ValueError(f"{context.capitalize()} DataFrame is empty")
+
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns for {context}: {missing}")
+
+
+def validate_train_df(df: pd.DataFrame, filter_rules=(),
+                      on_invalid="raise") -> ValidationReport:
     """Validate a training DataFrame.
 
     Checks that required columns are present and that basic
     constraints are satisfied (no NaN target, no negative
-    distances, non-empty DataFrame).
+    distances, non-empty DataFrame). The constraints of
+    :data:`TRAIN_RULES` and any *filter_rules* are evaluated in
+    one fused pass (see :func:`check_rules`).
 
     Parameters
     ----------
     df : pd.DataFrame
         Raw training DataFrame.
+    filter_rules : iterable of Rule
+        Extra rules (e.g. :data:`ABERRANT_RULES`) whose violating
+        rows are only excluded from ``report.mask``, never raised.
+    on_invalid : {"raise", "filter"}
+        What to do when :data:`TRAIN_RULES` are violated: raise,
+        or only exclude the offending rows from ``report.mask``.
+
+    Returns
+    -------
+    ValidationReport
+        Per-rule violation counts and the mask of valid rows.
 
     Raises
     ------
     ValueError
-        If columns are missing, target contains NaN,
-        distances are negative, or DataFrame is empty.
+        If *on_invalid* is unknown, columns are missing, the
+        DataFrame is empty, or (with ``on_invalid="raise"``) the
+        target contains NaN or distances/passenger counts are
+        negative.
     """
-    if df.empty:
-        raise ValueError("Training DataFrame is empty")
-
-    missing = [c for c in TRAIN_REQUIRED_COLS if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns for training: {missing}")
-
-    if df["total_amount"].isna().any():
-        raise ValueError("total_amount contains NaN")
-
-    if (df["trip_distance"] < 0).any():
-        raise ValueError("trip_distance contains negative values")
-
-    if (df["passenger_count"] < 0).any():
-        raise ValueError("passenger_count contains negative values")
+    _check_on_invalid(on_invalid)
+    check_schema(df, TRAIN_REQUIRED_COLS, "training")
+    report = check_rules(df, TRAIN_RULES + tuple(filter_rules))
+    if on_invalid == "raise":
+        report.raise_if_invalid(TRAIN_RULES)
+    return report
 
 
-def validate_infer_df(df: pd.DataFrame) -> None:
+def validate_infer_df(df: pd.DataFrame,
+                      on_invalid="raise") -> ValidationReport:
     """Validate an inference DataFrame.
 
     Checks that required columns are present and that basic
     constraints are satisfied (no negative distances,
-    non-empty DataFrame).
+    non-empty DataFrame), in one fused pass.
 
     Parameters
     ----------
     df : pd.DataFrame
         Raw inference DataFrame.
+    on_invalid : {"raise", "filter"}
+        Raise on violations, or only report them and exclude the
+        offending rows from ``report.mask``.
+
+    Returns
+    -------
+    ValidationReport
+        Per-rule violation counts and the mask of valid rows.
 
     Raises
     ------
     ValueError
-        If columns are missing, distances are negative,
-        or DataFrame is empty.
+        If *on_invalid* is unknown, columns are missing,
+        distances are negative, or DataFrame is empty.
     """
-    if df.empty:
-        raise ValueError("Inference DataFrame is empty")
-
-    missing = [c for c in INFER_REQUIRED_COLS if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns for inference: {missing}")
-
-    if (df["trip_distance"] < 0).any():
-        raise ValueError("trip_distance contains negative values")
-
-    if (df["passenger_count"] < 0).any():
-        raise ValueError("passenger_count contains negative values")
+    _check_on_invalid(on_invalid)
+    check_schema(df, INFER_REQUIRED_COLS, "inference")
+    report = check_rules(df, INFER_RULES)
+    if on_invalid == "raise":
+        report.raise_if_invalid()
+    return report
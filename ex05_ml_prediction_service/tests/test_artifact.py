@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.artifact import export_compact, load_model
+from taxi_ml.incremental import fit_incremental
+from taxi_ml.model import build_model
+
+
+def _frame(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    x = pd.DataFrame({
+        "trip_distance": rng.gamma(2.0, 1.5, n),
+        "pickup_hour": rng.integers(0, 24, n).astype(float),
+        "pu_location_id": rng.integers(1, 266, n),
+    })
+    y = 3 + 2.5 * x["trip_distance"] + (x["pu_location_id"] == 132) * 20
+    x.loc[x.index[::50], "trip_distance"] = np.nan
+    return x, y
+
+
+def test_compact_predictor_matches_pipeline(tmp_path):
+    x, y = _frame(0)
+    model = build_model(["pu_location_id"], ["trip_distance", "pickup_hour"])
+    model.set_params(model__max_iter=30).fit(x, y)
+    path = tmp_path / "model.npz"
+    export_compact(model, str(path))
+
+    test, _ = _frame(1)
+    test.loc[test.index[:10], "pu_location_id"] = 999  # unseen zone
+    for mmap in (False, True):
+        compact = load_model(str(path), mmap=mmap)
+        np.testing.assert_allclose(
+            compact.predict(test), model.predict(test), atol=1e-9
+        )
+
+
+def test_compact_predictor_sums_staged_model(tmp_path):
+    chunks = [_frame(seed) for seed in range(2)]
+    model = fit_incremental(
+        lambda: iter(chunks), ["pu_location_id"],
+        ["trip_distance", "pickup_hour"], iters_per_chunk=20,
+    )
+    path = tmp_path / "model.npz"
+    export_compact(model, str(path))
+
+    test, _ = _frame(2)
+    np.testing.assert_allclose(
+        load_model(str(path)).predict(test), model.predict(test),
+        atol=1e-9,
+    )
+
+
+def test_load_model_falls_back_to_joblib(tmp_path):
+    from joblib import dump
+
+    x, y = _frame(0, n=200)
+    model = build_model(["pu_location_id"], ["trip_distance", "pickup_hour"])
+    model.set_params(model__max_iter=5).fit(x, y)
+    dump(model, tmp_path / "model.joblib")
+
+    loaded = load_model(str(tmp_path / "model.npz"))
+
+    np.testing.assert_allclose(loaded.predict(x), model.predict(x))
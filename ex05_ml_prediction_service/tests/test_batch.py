@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from taxi_ml.artifact import export_compact
+from taxi_ml.batch import plan_shards, run_shards
+from taxi_ml.features import add_time_features, split_xy
+from taxi_ml.io import read_parquet_any
+from taxi_ml.model import build_model
+
+
+def make_trips(n=600):
+    rng = np.random.default_rng(0)
+    pickup = pd.Timestamp("2024-01-31") + pd.to_timedelta(
+        rng.integers(0, 2 * 86_400, n), unit="s",
+    )
+    return pd.DataFrame({
+        "VendorID": rng.integers(1, 3, n),
+        "tpep_pickup_datetime": pickup,
+        "tpep_dropoff_datetime": pickup + pd.Timedelta(minutes=15),
+        "passenger_count": rng.integers(1, 4, n).astype(float),
+        "trip_distance": rng.gamma(2.0, 1.5, n),
+        "RatecodeID": np.ones(n),
+        "PULocationID": rng.integers(1, 266, n),
+        "DOLocationID": rng.integers(1, 266, n),
+        "payment_type": rng.integers(1, 3, n),
+    })
+
+
+def test_plan_shards_groups_whole_row_groups(tmp_path):
+    path = tmp_path / "trips.parquet"
+    make_trips(100).to_parquet(path, row_group_size=30)
+
+    shards = plan_shards([str(path)], shard_rows=50)
+
+    assert [s.row_groups for s in shards] == [(0,), (1,), (2, 3)]
+    assert [s.first_row for s in shards] == [0, 30, 60]
+    assert [s.n_rows for s in shards] == [30, 30, 40]
+    assert [s.index for s in shards] == [0, 1, 2]
+
+
+def test_run_shards_writes_one_part_per_shard(tmp_path):
+    trips = make_trips()
+    trips.to_parquet(tmp_path / "trips.parquet", row_group_size=100)
+    x, _, _ = split_xy(add_time_features(
+        read_parquet_any(str(tmp_path / "trips.parquet")),
+    ))
+    model = build_model(["pu_location_id"], ["trip_distance"])
+    model.set_params(model__max_iter=5)
+    model.fit(x[["pu_location_id", "trip_distance"]], x["trip_distance"])
+    export_compact(model, str(tmp_path / "model.npz"))
+    out = tmp_path / "predictions"
+
+    shards = plan_shards([str(tmp_path / "trips.parquet")], shard_rows=200)
+    results = list(run_shards(
+        shards, str(tmp_path / "model.npz"), str(out), workers=2,
+        batch_rows=64,
+    ))
+
+    df = ds.dataset(str(out), partitioning="hive").to_table().to_pandas()
+    assert sorted(r["index"] for r in results) == [0, 1, 2]
+    assert sum(r["n_rows"] for r in results) == len(trips)
+    assert sorted(df["source_row"]) == list(range(len(trips)))
+    assert {p.name for p in (out / "pickup_month=2024-01").iterdir()} == {
+        "part-00000.parquet", "part-00001.parquet", "part-00002.parquet",
+    }
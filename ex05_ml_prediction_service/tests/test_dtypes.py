@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.dtypes import downcast
+
+
+def test_downcast_compacts_known_columns():
+    df = pd.DataFrame({
+        "pu_location_id": np.array([1, 265], dtype="int64"),
+        "passenger_count": [1.0, np.nan],
+        "total_amount": [10.5, 20.25],
+        "store_and_fwd_flag": ["N", "Y"],
+    })
+
+    df, saved = downcast(df)
+
+    assert df["pu_location_id"].dtype == "uint16"
+    assert df["passenger_count"].dtype == "float32"
+    assert df["total_amount"].dtype == "float32"
+    assert df["store_and_fwd_flag"].tolist() == ["N", "Y"]
+    assert saved > 0
+
+
+def test_downcast_keeps_out_of_range_columns():
+    df = pd.DataFrame({"rate_code_id": [1, 999]})
+
+    df, saved = downcast(df)
+
+    assert df["rate_code_id"].dtype == "int64"
+    assert saved == 0
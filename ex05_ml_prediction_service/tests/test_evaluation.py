@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from taxi_ml.evaluation import (
+    EmptyEvaluationError,
+    GroupedErrors,
+    distance_bucket,
+    evaluate_chunks,
+)
+
+
+class ShiftModel:
+    def predict(self, x):
+        return x["trip_distance"].to_numpy() + 1.0
+
+
+def make_chunk(rng, n):
+    return pd.DataFrame({
+        "pu_location_id": rng.integers(1, 4, n).astype(float),
+        "pickup_hour": rng.integers(0, 24, n),
+        "trip_distance": rng.uniform(0, 30, n),
+    })
+
+
+def test_chunked_metrics_match_whole_frame():
+    rng = np.random.default_rng(0)
+    x = make_chunk(rng, 3000)
+    y = x["trip_distance"] + rng.normal(0, 2, len(x))
+    chunks = [(x.iloc[i:i + 700], y.iloc[i:i + 700])
+              for i in range(0, len(x), 700)]
+
+    result = evaluate_chunks(ShiftModel(), chunks)
+
+    err = ShiftModel().predict(x) - y.to_numpy()
+    overall = result["overall"]
+    assert overall["n"] == 3000
+    assert overall["rmse"] == pytest.approx(np.sqrt(np.mean(err ** 2)))
+    assert overall["mae"] == pytest.approx(np.mean(np.abs(err)))
+    assert overall["p90_abs"] == pytest.approx(
+        np.quantile(np.abs(err), 0.9), rel=0.03,
+    )
+    zone = x["pu_location_id"] == 2
+    assert result["by_pu_location_id"]["2"]["rmse"] == pytest.approx(
+        np.sqrt(np.mean(err[zone] ** 2))
+    )
+    assert sum(g["n"] for g in result["by_pickup_hour"].values()) == 3000
+    assert set(result["by_distance_bucket"]) == {
+        "0-1 mi", "1-3 mi", "3-5 mi", "5-10 mi", "10-20 mi", "20+ mi",
+    }
+
+
+def test_distance_buckets_and_empty_groups():
+    assert distance_bucket([0.5, 1.0, 4.9, 25.0]).tolist() == [0, 1, 2, 5]
+
+    errors = GroupedErrors(3)
+    errors.update([0, 0, 2], [1.0, -3.0, 2.0])
+
+    assert list(errors.summary()) == ["0", "2"]
+    assert errors.summary(min_count=2)["0"]["bias"] == -1.0
+    with pytest.raises(EmptyEvaluationError):
+        evaluate_chunks(ShiftModel(), [])
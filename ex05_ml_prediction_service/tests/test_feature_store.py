@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+from taxi_ml.feature_store import FeatureStore, feature_key, source_fingerprint
+
+
+def test_key_tracks_source_and_params(tmp_path):
+    path = tmp_path / "trips.parquet"
+    pd.DataFrame({"a": [1, 2]}).to_parquet(path)
+    before = source_fingerprint(str(path))
+
+    pd.DataFrame({"a": [1, 2, 3]}).to_parquet(path)
+    after = source_fingerprint(str(path))
+
+    assert feature_key(before, version=1) == feature_key(before, version=1)
+    assert feature_key(before, version=1) != feature_key(after, version=1)
+    assert feature_key(before, version=1) != feature_key(before, version=2)
+
+
+def test_get_or_build_caches_and_evicts_lru(tmp_path):
+    frame = pd.DataFrame({"x": range(1000), "total_amount": 1.0})
+    store = FeatureStore(str(tmp_path), budget_bytes=1 << 40)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return frame
+
+    for key in ("a", "b", "c"):
+        store.get_or_build(key, build)
+    out, hit = store.get_or_build("a", build)
+
+    assert hit and len(calls) == 3
+    pd.testing.assert_frame_equal(out, frame)
+
+    # "b" is now the least recently used entry
+    for key, t in (("a", 300), ("b", 100), ("c", 200)):
+        os.utime(store.path(key), (t, t))
+    size = os.path.getsize(store.path("a"))
+    store.budget_bytes = 2 * size
+
+    assert store.evict() == 1
+    assert sorted(k for k, _, _ in store.entries()) == ["a", "c"]
+
+
+def test_get_batches_streams_cached_entry(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put("a", pd.DataFrame({"x": range(10), "total_amount": 1.0}))
+
+    batches = list(store.get_batches("a", batch_rows=4))
+
+    assert store.get_batches("missing", batch_rows=4) is None
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert pd.concat(batches)["x"].tolist() == list(range(10))
+    assert store.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.features import add_time_features
+
+
+def _reference(df):
+    pickup = pd.to_datetime(df["tpep_pickup_datetime"])
+    dropoff = pd.to_datetime(df["tpep_dropoff_datetime"])
+    duration = (dropoff - pickup).dt.total_seconds() / 60.0
+    return pd.DataFrame({
+        "trip_duration_min": duration.clip(lower=0),
+        "pickup_hour": pickup.dt.hour,
+        "pickup_dayofweek": pickup.dt.dayofweek,
+        "pickup_day": pickup.dt.day,
+    })
+
+
+def test_add_time_features_matches_pandas_accessors():
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(-2 * 10**9, 4 * 10**9, 5000)
+    pickup = pd.Series(pd.to_datetime(seconds, unit="s"))
+    dropoff = pickup + pd.to_timedelta(
+        rng.integers(-600, 7200, 5000), unit="s"
+    )
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pickup.astype("datetime64[us]"),
+        "tpep_dropoff_datetime": dropoff,
+    })
+
+    out = add_time_features(df)
+
+    expected = _reference(df)
+    for col in expected.columns:
+        np.testing.assert_allclose(
+            out[col].to_numpy(dtype=float),
+            expected[col].to_numpy(dtype=float),
+            rtol=1e-6,
+        )
+    assert out["pickup_hour"].dtype == "uint8"
+    assert "pickup_hour" not in df.columns
+
+
+def test_add_time_features_parses_strings_and_handles_nat():
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": ["2024-02-29 23:30:00", None],
+        "tpep_dropoff_datetime": ["2024-03-01 00:10:00", None],
+    })
+
+    out = add_time_features(df)
+
+    assert out["trip_duration_min"].iloc[0] == 40
+    assert out["pickup_day"].iloc[0] == 29
+    assert out["pickup_dayofweek"].iloc[0] == 3
+    assert out[["pickup_hour", "trip_duration_min"]].iloc[1].isna().all()
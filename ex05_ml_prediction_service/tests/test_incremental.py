@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.incremental import fit_incremental
+from taxi_ml.model import rmse
+
+
+def _chunk(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    x = pd.DataFrame({
+        "trip_distance": rng.gamma(2.0, 1.5, n),
+        "pu_location_id": rng.integers(1, 266, n),
+    })
+    y = 3 + 2.5 * x["trip_distance"] + (x["pu_location_id"] == 132) * 20
+    return x, y
+
+
+def test_fit_incremental_learns_across_chunks():
+    chunks = [_chunk(seed) for seed in range(3)]
+
+    model = fit_incremental(
+        lambda: iter(chunks), ["pu_location_id"], ["trip_distance"],
+        iters_per_chunk=30,
+    )
+
+    x, y = _chunk(99)
+    assert len(model.named_steps["model"].stages_) == 3
+    assert rmse(y, model.predict(x)) < rmse(y, np.full(len(y), y.mean()))
+    encoder = model.named_steps["preprocess"].named_transformers_["cat"]
+    assert len(encoder.named_steps["ordinal"].categories_[0]) == 265
+
+
+def test_fit_incremental_reads_categories_from_separate_frames():
+    chunks = [_chunk(seed) for seed in range(2)]
+    frames = [pd.DataFrame({"pu_location_id": [1, 132, 300]})]
+
+    model = fit_incremental(
+        lambda: iter(chunks), ["pu_location_id"], ["trip_distance"],
+        iters_per_chunk=10, make_category_frames=lambda: iter(frames),
+    )
+
+    encoder = model.named_steps["preprocess"].named_transformers_["cat"]
+    np.testing.assert_array_equal(
+        encoder.named_steps["ordinal"].categories_[0], [1, 132, 300],
+    )
+
+
+def test_fit_incremental_passes_params_to_every_stage():
+    chunks = [_chunk(seed) for seed in range(2)]
+
+    model = fit_incremental(
+        lambda: iter(chunks), ["pu_location_id"], ["trip_distance"],
+        iters_per_chunk=5, params={"max_depth": 3, "max_leaf_nodes": 7},
+    )
+
+    for stage in model.named_steps["model"].stages_:
+        assert (stage.max_depth, stage.max_leaf_nodes) == (3, 7)
@@ -0,0 +1,62 @@
+import pandas as pd
+from taxi_ml.io import (
+    iter_parquet_batches,
+    read_parquet_any,
+    read_parquet_many,
+    trip_filters,
+)
+
+
+def test_iter_parquet_batches_regroups_and_renames(tmp_path):
+    df = pd.DataFrame({
+        "PULocationID": range(10),
+        "trip_distance": [1.0] * 10,
+    })
+    path = tmp_path / "trips.parquet"
+    df.to_parquet(path, row_group_size=3)
+
+    chunks = list(iter_parquet_batches(str(path), batch_rows=4))
+
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert list(chunks[0].columns) == ["pu_location_id", "trip_distance"]
+    assert pd.concat(chunks)["pu_location_id"].tolist() == list(range(10))
+
+
+def test_read_parquet_any_pushes_snake_case_down(tmp_path):
+    df = pd.DataFrame({
+        "PULocationID": [1, 2, 3],
+        "total_amount": [-1.0, 50.0, 500.0],
+        "fare_amount": [1.0, 2.0, 3.0],
+    })
+    path = tmp_path / "trips.parquet"
+    df.to_parquet(path)
+
+    out = read_parquet_any(
+        str(path),
+        columns=["pu_location_id", "total_amount", "absent"],
+        filters=trip_filters(total_amount_range=(0, 200)),
+    )
+
+    assert list(out.columns) == ["pu_location_id", "total_amount"]
+    assert out["pu_location_id"].tolist() == [2]
+
+
+def test_read_parquet_many_expands_dirs_and_unifies_schemas(tmp_path):
+    month = tmp_path / "2024-01"
+    month.mkdir()
+    pd.DataFrame({"pu_location_id": [1, 2]}).to_parquet(
+        month / "part-0.parquet"
+    )
+    pd.DataFrame({"pu_location_id": [3]}).to_parquet(
+        month / "part-1.parquet"
+    )
+    (month / "_SUCCESS").touch()
+    pd.DataFrame({"PULocationID": [4.0]}).to_parquet(
+        tmp_path / "2024-02.parquet"
+    )
+
+    out = read_parquet_many(
+        [str(month), str(tmp_path / "2024-02.parquet")], workers=2,
+    )
+
+    assert out["pu_location_id"].tolist() == [1, 2, 3, 4]
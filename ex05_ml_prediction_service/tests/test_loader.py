@@ -0,0 +1,58 @@
+import datetime as dt
+
+import pandas as pd
+import pyarrow as pa
+from taxi_ml.loader import (
+    FACT_COLUMNS,
+    iter_csv_chunks,
+    month_bounds,
+    partition_name,
+    prepare_batch,
+)
+
+
+def test_month_bounds_wraps_year():
+    assert month_bounds("2024-12") == (
+        dt.datetime(2024, 12, 1), dt.datetime(2025, 1, 1),
+    )
+    assert partition_name(dt.date(2024, 3, 15)) == "fact_trips_2024_03"
+
+
+def test_prepare_batch_applies_warehouse_rules():
+    raw = pa.Table.from_pandas(pd.DataFrame({
+        "VendorID": [1, 3, 2, None, 2],
+        "PULocationID": [10, 10, 300, 10, 10],
+        "tpep_pickup_datetime": pd.to_datetime([
+            "2024-01-05 10:00", "2024-01-05 10:00", "2024-01-05 10:00",
+            "2024-01-31 23:59", "2024-02-01 00:00",
+        ]),
+        "passenger_count": [1.0, 1.0, 1.0, None, 1.0],
+        "total_amount": [12.5, 12.5, 12.5, 1e9, 12.5],
+    }))
+
+    out = prepare_batch(raw, *month_bounds("2024-01"))
+
+    # unknown vendor, bad zone, overflowing amount, next month
+    assert out.num_rows == 1
+    assert out.column_names == FACT_COLUMNS
+    assert out["passenger_count"].type == pa.int32()
+    assert out["cbd_congestion_fee"].null_count == 1
+
+
+def test_iter_csv_chunks_counts_rejected_rows(tmp_path):
+    df = pd.DataFrame({
+        "vendor_id": [1, 1, 4],
+        "tpep_pickup_datetime": pd.to_datetime(
+            ["2024-01-01 08:00", "2023-12-31 23:00", "2024-01-02 09:00"]
+        ),
+        "store_and_fwd_flag": ["N", None, "Y"],
+    })
+    path = tmp_path / "trips.parquet"
+    df.to_parquet(path)
+
+    chunks = list(iter_csv_chunks(str(path), "2024-01"))
+
+    assert [(n_read, n_kept) for _, n_read, n_kept in chunks] == [(3, 1)]
+    line = chunks[0][0].read().decode().strip()
+    assert line.startswith("1,,,,,2024-01-01 08:00:00")
+    assert len(line.split(",")) == len(FACT_COLUMNS)
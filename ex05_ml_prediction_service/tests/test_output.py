@@ -0,0 +1,68 @@
+import pandas as pd
+import pyarrow.dataset as ds
+from taxi_ml.output import (
+    CsvPredictionWriter,
+    ParquetPredictionWriter,
+    clear_output,
+    prediction_table,
+)
+
+
+def make_keys():
+    return pd.DataFrame({
+        "tpep_pickup_datetime": pd.to_datetime([
+            "2024-01-31 23:50:00", "2024-02-01 00:10:00", None,
+        ]),
+        "tpep_dropoff_datetime": pd.to_datetime([
+            "2024-02-01 00:05:00", "2024-02-01 00:30:00",
+            "2024-02-01 01:00:00",
+        ]),
+        "pu_location_id": [132, 161, 1],
+        "do_location_id": [236, 132, 1],
+    })
+
+
+def test_parquet_writer_partitions_by_month_with_row_keys(tmp_path):
+    out = tmp_path / "predictions"
+    with ParquetPredictionWriter(str(out)) as writer:
+        writer.write(prediction_table(
+            make_keys(), [10.0, 20.0, 30.0], "a.parquet", 100,
+        ))
+        writer.write(prediction_table(
+            make_keys().iloc[:1], [40.0], "b.parquet", 0,
+        ))
+
+    table = ds.dataset(str(out), partitioning="hive").to_table()
+    df = table.to_pandas().sort_values(["source_file", "source_row"])
+
+    assert writer.n_rows == 4
+    assert sorted(p.name for p in out.iterdir()) == [
+        "pickup_month=2024-01", "pickup_month=2024-02",
+        "pickup_month=unknown",
+    ]
+    assert df["source_row"].tolist() == [100, 101, 102, 0]
+    assert df["vendor_id"].isna().all()
+    assert df["prediction_total_amount"].tolist() == [10, 20, 30, 40]
+    assert df["pickup_month"].tolist()[:2] == ["2024-01", "2024-02"]
+
+
+def test_clear_output_only_removes_partitions(tmp_path):
+    (tmp_path / "pickup_month=2024-01").mkdir()
+    (tmp_path / "keep.txt").write_text("x")
+
+    clear_output(str(tmp_path))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["keep.txt"]
+
+
+def test_csv_writer_keeps_legacy_format(tmp_path):
+    path = tmp_path / "predictions.csv"
+    with CsvPredictionWriter(str(path)) as writer:
+        for _ in range(2):
+            writer.write(prediction_table(
+                make_keys(), [1.5, 2.5, 3.5], "a.parquet", 0,
+            ))
+
+    assert path.read_text().splitlines() == [
+        "prediction_total_amount", "1.5", "2.5", "3.5", "1.5", "2.5", "3.5",
+    ]
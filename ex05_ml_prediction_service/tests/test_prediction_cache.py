@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.features import FEATURE_COLS
+from taxi_ml.prediction_cache import CachedPredictor, cache_key
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, x):
+        self.rows += len(x)
+        return 2.5 * x["trip_distance"].to_numpy() + x["pu_location_id"]
+
+
+def make_features(distances, zones):
+    x = pd.DataFrame(1, index=range(len(distances)), columns=FEATURE_COLS)
+    x["trip_distance"] = distances
+    x["pu_location_id"] = zones
+    return x
+
+
+def test_cached_predictor_only_predicts_unseen_vectors():
+    model = CountingModel()
+    cached = CachedPredictor(model)
+    x = make_features([1.0, 2.0, 1.0, np.nan], [10, 20, 10, 30])
+
+    first = cached.predict(x)
+    second = cached.predict(x.iloc[::-1])
+
+    np.testing.assert_allclose(first, model.predict(x))
+    np.testing.assert_allclose(second, first[::-1])
+    assert model.rows == 3 + 4
+    assert cached.stats()["hits"] == 1 + 4
+    assert len(cached) == 3
+
+
+def test_cached_predictor_evicts_least_recently_used():
+    model = CountingModel()
+    cached = CachedPredictor(model, max_entries=2)
+
+    cached.predict(make_features([1.0], [1]))
+    cached.predict(make_features([2.0], [1]))
+    cached.predict(make_features([1.0], [1]))
+    cached.predict(make_features([3.0], [1]))
+    model.rows = 0
+    cached.predict(make_features([1.0, 3.0], [1, 1]))
+
+    assert model.rows == 0
+    assert cached.evictions == 1
+
+
+def test_saved_cache_is_tied_to_the_model_artifact(tmp_path):
+    (tmp_path / "a.npz").write_bytes(b"model a")
+    (tmp_path / "b.npz").write_bytes(b"model b")
+    x = make_features([1.0, 2.0], [10, 20])
+    cached = CachedPredictor.for_artifact(
+        CountingModel(), str(tmp_path / "a.npz"), str(tmp_path / "cache"),
+    )
+    cached.predict(x)
+    cached.save()
+
+    model = CountingModel()
+    reloaded = CachedPredictor.for_artifact(
+        model, str(tmp_path / "a.npz"), str(tmp_path / "cache"),
+    )
+    other = CachedPredictor.for_artifact(
+        CountingModel(), str(tmp_path / "b.npz"), str(tmp_path / "cache"),
+    )
+
+    np.testing.assert_allclose(reloaded.predict(x), [12.5, 25.0])
+    assert model.rows == 0
+    assert len(other) == 0
+    assert cache_key(str(tmp_path / "a.npz")) in reloaded.path
+
+
+def test_cached_predictor_grows_without_losing_entries():
+    model = CountingModel()
+    cached = CachedPredictor(model)
+    x = make_features(np.arange(20_000) / 100, 1)
+
+    np.testing.assert_allclose(cached.predict(x), model.predict(x))
+    model.rows = 0
+    np.testing.assert_allclose(
+        cached.predict(x), cached.predict(x[::-1])[::-1],
+    )
+
+    assert model.rows == 0
+    assert len(cached) == 20_000
@@ -0,0 +1,42 @@
+import json
+
+from taxi_ml.profiling import StageProfiler
+
+
+def test_stages_are_aggregated_by_name():
+    profiler = StageProfiler("test", log=None)
+    for n in (100, 300):
+        with profiler.stage("read") as st:
+            st["rows"] = n
+    with profiler.stage("fit"):
+        sum(range(10_000))
+
+    stages = {s["name"]: s for s in profiler.stages()}
+
+    assert list(stages) == ["read", "fit"]
+    assert stages["read"]["calls"] == 2
+    assert stages["read"]["rows"] == 400
+    assert stages["read"]["rows_per_s"] > 0
+    assert stages["fit"]["rows"] is None
+    assert "rows_per_s" not in stages["fit"]
+    assert "read" in profiler.summary()
+
+
+def test_write_report_with_tracemalloc_and_cprofile(tmp_path):
+    profiler = StageProfiler(
+        "test", trace_memory=True, cprofile=True, log=None,
+    )
+    with profiler.stage("alloc", rows=1):
+        data = [bytearray(1 << 20) for _ in range(5)]
+    del data
+    path = tmp_path / "report.json"
+
+    profiler.write(str(path), inputs=["a.parquet"])
+
+    report = json.loads(path.read_text())
+    assert report["script"] == "test"
+    assert report["inputs"] == ["a.parquet"]
+    assert report["stages"][0]["traced_peak_mb"] >= 5
+    assert report["tracemalloc_top"]
+    assert (tmp_path / "report.prof").exists()
+    assert any("cumulative" in line for line in report["cprofile_top"])
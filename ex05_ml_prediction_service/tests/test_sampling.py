@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.sampling import (
+    Reservoir,
+    StratifiedReservoir,
+    allocate,
+    stratum_codes,
+)
+
+
+def test_reservoir_is_bounded_and_unbiased():
+    sample = Reservoir(size=500, seed=0)
+    for start in range(0, 20000, 1000):
+        sample.add(pd.DataFrame({"v": np.arange(start, start + 1000)}))
+
+    assert len(sample.frame) == 500
+    assert sample.n_seen == 20000
+    assert 8000 < sample.frame["v"].mean() < 12000
+
+
+def test_stratified_reservoir_keeps_rare_strata():
+    zones = np.r_[np.full(9990, 1), np.full(10, 2)]
+    df = pd.DataFrame({"pu_location_id": zones})
+    codes, counts = np.unique(
+        stratum_codes(df, ["pu_location_id"]), return_counts=True,
+    )
+    caps = allocate(dict(zip(codes, counts)), size=100, min_per_stratum=5)
+    sample = StratifiedReservoir(caps, ["pu_location_id"], seed=0)
+    for start in range(0, len(df), 1000):
+        sample.add(df.iloc[start:start + 1000])
+
+    counts = sample.frame["pu_location_id"].value_counts().to_dict()
+    assert counts == {1: 99, 2: 5}
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from taxi_ml.service import MicroBatcher, PredictionService
+
+
+def test_micro_batcher_groups_requests_and_splits_results():
+    calls = []
+
+    def predict(df):
+        calls.append(len(df))
+        return df["v"].to_numpy() * 2
+
+    batcher = MicroBatcher(predict, max_batch_rows=64, max_wait_ms=50)
+    frames = [pd.DataFrame({"v": [i, i + 100]}) for i in range(20)]
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = list(pool.map(batcher.submit, frames))
+    results = [f.result(timeout=5) for f in futures]
+
+    for i, res in enumerate(results):
+        assert res.tolist() == [2 * i, 2 * (i + 100)]
+    assert sum(calls) == 40
+    assert len(calls) < 20
+
+
+def test_micro_batcher_only_fails_the_faulty_request():
+    def predict(df):
+        if (df["v"] < 0).any():
+            raise ValueError("negative")
+        return df["v"].to_numpy() * 2
+
+    batcher = MicroBatcher(predict, max_batch_rows=64, max_wait_ms=50)
+    frames = [pd.DataFrame({"v": [v]}) for v in (1, -1, 3)]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = list(pool.map(batcher.submit, frames))
+
+    assert futures[0].result(timeout=5).tolist() == [2]
+    assert futures[2].result(timeout=5).tolist() == [6]
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+
+
+def test_service_rejects_unparsable_trip_alone():
+    class Model:
+        def predict(self, x):
+            return x["trip_distance"].to_numpy() * 2
+
+    service = PredictionService(Model())
+    trip = {
+        "tpep_pickup_datetime": "2024-12-01 08:15:00",
+        "tpep_dropoff_datetime": "2024-12-01 08:32:00",
+        "passenger_count": 1, "trip_distance": 3.0, "rate_code_id": 1,
+        "payment_type_id": 1, "pu_location_id": 161, "do_location_id": 236,
+    }
+
+    with pytest.raises(ValueError):
+        service.predict_records([{**trip, "tpep_pickup_datetime": "bad"}])
+    assert service.predict_records([trip]) == [6.0]
@@ -0,0 +1,44 @@
+import pandas as pd
+from benchmarks.run import compare
+from benchmarks.synthetic import TLC_COLUMNS, write_synthetic_parquet
+from taxi_ml.features import add_time_features
+from taxi_ml.io import read_parquet_any
+from taxi_ml.validate import (
+    ABERRANT_RULES,
+    TRAIN_REQUIRED_COLS,
+    check_rules,
+    validate_train_df,
+)
+
+
+def test_synthetic_parquet_goes_through_the_pipeline(tmp_path):
+    path = write_synthetic_parquet(tmp_path / "trips.parquet", 5000,
+                                   month="2024-02")
+    raw = pd.read_parquet(path)
+
+    assert list(raw.columns) == TLC_COLUMNS
+    assert raw["PULocationID"].between(1, 265).all()
+    assert set(raw["payment_type"]) <= {0, 1, 2, 3, 4, 5, 6}
+    assert raw["passenger_count"].isna().any()
+    assert raw["tpep_pickup_datetime"].dt.month.eq(2).all()
+
+    df = add_time_features(
+        read_parquet_any(path, columns=TRAIN_REQUIRED_COLS)
+    )
+    validate_train_df(df)
+    report = check_rules(df, ABERRANT_RULES)
+    assert 0 < report.n_invalid < 0.05 * len(df)
+
+
+def test_compare_flags_only_measurable_slowdowns():
+    baseline = {
+        "fit": {"rows": 100, "best_s": 1.0},
+        "tiny": {"rows": 100, "best_s": 0.001},
+    }
+    results = {
+        "fit": {"rows": 200, "best_s": 3.0},
+        "tiny": {"rows": 100, "best_s": 0.002},
+        "new": {"rows": 100, "best_s": 1.0},
+    }
+
+    assert compare(results, baseline, tolerance=0.1) == ["fit"]
@@ -0,0 +1,24 @@
+import pandas as pd
+from taxi_ml.training import NEEDED_COLS, prepare_training_frame
+
+
+def test_prepare_training_frame_keeps_valid_featurized_rows():
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pd.to_datetime(["2024-01-01 10:00"] * 3),
+        "tpep_dropoff_datetime": pd.to_datetime(["2024-01-01 10:15"] * 3),
+        "passenger_count": [1.0, 2.0, 1.0],
+        "trip_distance": [2.5, 3.0, 1.0],
+        "rate_code_id": [1, 1, 1],
+        "payment_type_id": [1, 2, 1],
+        "pu_location_id": [100, 132, 100],
+        "do_location_id": [200, 200, 161],
+        "total_amount": [15.0, 450.0, 9.5],
+    })[NEEDED_COLS]
+
+    out, report = prepare_training_frame(df)
+
+    assert report.violated() == {"total_amount_range": 1}
+    assert out.index.tolist() == [0, 1]
+    assert out["total_amount"].tolist() == [15.0, 9.5]
+    assert out["pickup_hour"].dtype == "uint8"
+    assert out["trip_duration_min"].tolist() == [15.0, 15.0]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from taxi_ml.tuning import (
+    month_codes,
+    month_label,
+    rung_budgets,
+    sample_candidates,
+    successive_halving,
+    time_folds,
+    write_shared_features,
+)
+
+
+def test_time_folds_expand_over_past_months():
+    months = month_codes(pd.to_datetime(
+        ["2023-12-05", "2024-01-10", "2024-02-01", "2024-03-31"]
+    ))
+
+    folds = time_folds(months, n_folds=2)
+
+    assert [(tuple(map(month_label, train)), month_label(valid))
+            for train, valid in folds] == [
+        (("2023-12", "2024-01"), "2024-02"),
+        (("2023-12", "2024-01", "2024-02"), "2024-03"),
+    ]
+
+
+def test_sample_candidates_are_distinct_and_start_from_defaults():
+    space = {"max_depth": [4, 8], "learning_rate": [0.05, 0.1]}
+
+    candidates = sample_candidates(space, n=10)
+
+    assert candidates[0]["max_depth"] == 8
+    assert len(candidates) == 5
+    assert len({tuple(sorted(c.items())) for c in candidates}) == 5
+
+
+def test_rung_budgets_grow_by_eta():
+    assert rung_budgets(9, 90_000, 1_000, eta=3) == [10_000, 30_000, 90_000]
+    assert rung_budgets(9, 90_000, 20_000, eta=3) == [20_000, 30_000, 90_000]
+
+
+def test_successive_halving_keeps_best_candidate(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 600
+    x = pd.DataFrame({"dist": rng.random(n), "zone": rng.integers(0, 3, n)})
+    y = 10 * x["dist"] + x["zone"]
+    months = np.repeat([24_288, 24_289, 24_290], n // 3)
+    write_shared_features(str(tmp_path), x, y, months)
+    candidates = [
+        {"max_iter": 1, "learning_rate": 0.01},
+        {"max_iter": 50, "learning_rate": 0.3},
+    ]
+
+    result = successive_halving(
+        str(tmp_path), candidates, time_folds(months), ["zone"],
+        max_rows=400, min_rows=100, eta=2, workers=1,
+        log=lambda msg: None,
+    )
+
+    assert result["params"] == candidates[1]
+    assert [h["n_rows"] for h in result["history"]] == [200, 200, 400]
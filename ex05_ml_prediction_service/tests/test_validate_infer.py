@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from taxi_ml.validate import validate_infer_df
+from taxi_ml.validate import ABERRANT_RULES, check_rules, validate_infer_df
 
 
 def test_validate_infer_ok():
@@ -21,3 +21,18 @@ def test_validate_infer_missing_cols():
     df = pd.DataFrame({"trip_distance": [1.0]})
     with pytest.raises(ValueError):
         validate_infer_df(df)
+
+
+def test_check_rules_counts_per_rule_across_blocks():
+    df = pd.DataFrame({
+        "total_amount": [10.0, 0.0, 250.0, None, 50.0],
+        "trip_distance": [1.0, 2.0, 3.0, 4.0, 150.0],
+        "trip_duration_min": [5.0] * 5,
+        "passenger_count": [1, 1, 1, 1, 1],
+    })
+
+    report = check_rules(df, ABERRANT_RULES, block_rows=2)
+
+    assert report.counts["total_amount_range"] == 3
+    assert report.counts["trip_distance_range"] == 1
+    assert report.mask.tolist() == [True, False, False, False, False]
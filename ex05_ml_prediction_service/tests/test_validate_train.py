@@ -22,3 +22,41 @@ def test_validate_train_missing_cols():
     df = pd.DataFrame({"total_amount": [10.0]})
     with pytest.raises(ValueError):
         validate_train_df(df)
+
+
+def _trips(**overrides):
+    data = {
+        "tpep_pickup_datetime": ["2025-01-01 10:00:00"] * 3,
+        "tpep_dropoff_datetime": ["2025-01-01 10:10:00"] * 3,
+        "passenger_count": [1, 2, -1],
+        "trip_distance": [2.5, -1.0, 3.0],
+        "rate_code_id": [1, 1, 1],
+        "payment_type_id": [1, 1, 1],
+        "pu_location_id": [100, 100, 100],
+        "do_location_id": [200, 200, 200],
+        "total_amount": [15.0, 12.0, 300.0],
+    }
+    data.update(overrides)
+    return pd.DataFrame(data)
+
+
+def test_validate_train_reports_every_violation():
+    with pytest.raises(ValueError) as exc:
+        validate_train_df(_trips())
+    assert "trip_distance" in str(exc.value)
+    assert "passenger_count" in str(exc.value)
+
+
+def test_validate_train_filter_mode():
+    report = validate_train_df(_trips(), on_invalid="filter")
+
+    assert report.mask.tolist() == [True, False, False]
+    assert report.violated() == {
+        "trip_distance_nonnegative": 1,
+        "passenger_count_nonnegative": 1,
+    }
+
+
+def test_validate_train_rejects_unknown_on_invalid():
+    with pytest.raises(ValueError, match="on_invalid"):
+        validate_train_df(_trips(), on_invalid="rasie")